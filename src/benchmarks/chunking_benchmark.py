@@ -0,0 +1,75 @@
+"""
+Chunking throughput (MB/s) of ProcessController.aiter_chunks against process_simpler_spliter.
+
+    cd src && python -m benchmarks.chunking_benchmark --size-mb 20 --chunk-size 500 --overlap-size 100
+"""
+from controllers import ProcessController
+from controllers.ProcessController import Document
+import argparse
+import asyncio
+import random
+import time
+
+WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit",
+         "sed", "do", "eiusmod", "tempor", "incididunt", "ut", "labore", "et", "dolore"]
+
+def build_pages(size_mb: float, page_size: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    lines = []
+    total_size = 0
+    while total_size < size_mb * 1024 * 1024:
+        line = " ".join(rng.choices(WORDS, k=rng.randint(3, 20))) + "\n"
+        lines.append(line)
+        total_size += len(line)
+
+    text = "".join(lines)
+    return [text[i:i + page_size] for i in range(0, len(text), page_size)]
+
+def run_simpler_spliter(process_controller, pages: list, chunk_size: int, overlap_size: int) -> int:
+    chunks = process_controller.process_simpler_spliter(texts=pages, metadatas=[], chunk_size=chunk_size)
+    return len(chunks)
+
+def run_chunks_engine(process_controller, pages: list, chunk_size: int, overlap_size: int) -> int:
+
+    async def iter_pages():
+        for page_no, page in enumerate(pages):
+            yield Document(page_content=page, metadata={"page": page_no})
+
+    async def consume():
+        no_chunks = 0
+        async for _ in process_controller.aiter_chunks(pages=iter_pages(), chunk_size=chunk_size,
+                                                       overlap_size=overlap_size):
+            no_chunks += 1
+        return no_chunks
+
+    return asyncio.run(consume())
+
+def measure(run, process_controller, pages: list, chunk_size: int, overlap_size: int, repeat: int):
+    # best of `repeat` runs
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        no_chunks = run(process_controller, pages, chunk_size, overlap_size)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, no_chunks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--page-size", type=int, default=3000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = build_pages(size_mb=args.size_mb, page_size=args.page_size)
+    size_mb = sum(len(page) for page in pages) / (1024 * 1024)
+    process_controller = ProcessController(project_id="benchmark")
+
+    for name, run in [("process_simpler_spliter", run_simpler_spliter), ("aiter_chunks", run_chunks_engine)]:
+        elapsed, no_chunks = measure(run, process_controller, pages, args.chunk_size, args.overlap_size, args.repeat)
+        print(f"{name:<24} {size_mb / elapsed:8.1f} MB/s  {no_chunks} chunks  {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
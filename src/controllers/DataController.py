@@ -2,6 +2,9 @@ from .BaseController import BaseController
 from .ProjectController import ProjectController
 from fastapi import UploadFile
 from models import ResponseSignal
+import aiofiles
+import hashlib
+import logging
 import re
 import os
 
@@ -10,17 +13,58 @@ class DataController(BaseController):
     def __init__(self):
         super().__init__()
         self.size_scale = 1048576 # convert MB to bytes
+        self.logger = logging.getLogger("uvicorn")
 
     def validate_uploaded_file(self, file: UploadFile):
 
         if file.content_type not in self.app_settings.FILE_ALLOWED_TYPES:
             return False, ResponseSignal.FILE_TYPE_NOT_SUPPORTED.value
 
-        if file.size > self.app_settings.FILE_MAX_SIZE * self.size_scale:
+        # early reject on the declared size, the bytes actually received are checked while writing
+        if file.size is not None and file.size > self.app_settings.FILE_MAX_SIZE * self.size_scale:
             return False, ResponseSignal.FILE_SIZE_EXCEEDED.value
 
         return True, ResponseSignal.FILE_VALIDATED_SUCCESS.value
 
+    def get_part_path(self, file_path: str):
+        return file_path + ".part"
+
+    async def write_uploaded_file(self, file: UploadFile, file_path: str):
+        # streams the upload to a .part file next to file_path, hashing and counting the bytes on the way.
+        # returns (is_written, signal, content_hash, file_size); the .part file is kept until
+        # commit_uploaded_file or discard_uploaded_file
+        part_path = self.get_part_path(file_path=file_path)
+        max_size = self.app_settings.FILE_MAX_SIZE * self.size_scale
+        content_hash = hashlib.sha256()
+        file_size = 0
+
+        try:
+            async with aiofiles.open(part_path, "wb") as f:
+                while chunk := await file.read(self.app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > max_size:
+                        break
+                    content_hash.update(chunk)
+                    await f.write(chunk)
+        except Exception as e:
+            self.logger.error(f"Error while uploading file: {e}")
+            self.discard_uploaded_file(file_path=file_path)
+            return False, ResponseSignal.FILE_UPLOAD_FAILED.value, None, file_size
+
+        if file_size > max_size:
+            self.discard_uploaded_file(file_path=file_path)
+            return False, ResponseSignal.FILE_SIZE_EXCEEDED.value, None, file_size
+
+        return True, ResponseSignal.FILE_UPLOAD_SUCCESS.value, content_hash.hexdigest(), file_size
+
+    def commit_uploaded_file(self, file_path: str):
+        os.replace(self.get_part_path(file_path=file_path), file_path)
+
+    def discard_uploaded_file(self, file_path: str):
+        part_path = self.get_part_path(file_path=file_path)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
     def generate_unique_filepath(self, orig_file_name: str, project_id: str):
 
         random_key = self.generate_random_string()
@@ -0,0 +1,655 @@
+from .BaseController import BaseController
+from .ProcessController import ProcessController
+from .NLPController import NLPController
+from models import ResponseSignal
+from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
+from models.db_schemes import Job
+from models.enums.AssetTypeEnum import AssetTypeEnum
+from models.enums.JobEnums import IngestionStageEnum
+from stores.llm.LLMEnums import DocumentTypeEnum
+from utils.job_manager import JobContext
+from collections import deque, defaultdict
+import numpy as np
+import asyncio
+import base64
+import logging
+
+class IngestionController(BaseController):
+    """
+    Job handlers for document processing and vector indexing, run by the JobManager outside the
+    request that submitted them. Progress and checkpoints go through the JobContext so an
+    interrupted job resumes where it stopped.
+    Also holds the parse/chunk/embed/index stage handlers run by the worker fleet (worker.py).
+
+    Runs are incremental: asset_config keeps the signature (content hash and chunking parameters)
+    an asset's chunks were built from ("processed") and pushed with ("indexed"), and assets whose
+    signature did not change are skipped. An upload with the file name of older assets of the project
+    is their new version: it takes over their chunks whose text did not change, and they are removed
+    once its chunks are in.
+    """
+
+    def __init__(self, db_client, parsing_executor, vectordb_client, embedding_client,
+                 generation_client, template_parser, task_streams=None):
+        super().__init__()
+        self.db_client = db_client
+        self.parsing_executor = parsing_executor
+        self.vectordb_client = vectordb_client
+        self.embedding_client = embedding_client
+        self.generation_client = generation_client
+        self.template_parser = template_parser
+        self.task_streams = task_streams
+        self.logger = logging.getLogger("uvicorn")
+
+    def get_nlp_controller(self):
+        return NLPController(
+            vectordb_client=self.vectordb_client,
+            embedding_client=self.embedding_client,
+            generation_client=self.generation_client,
+            template_parser=self.template_parser
+        )
+
+    async def get_asset_signature(self, process_controller: ProcessController, asset, file_id: str, params: dict):
+        # None for a missing or unsupported file
+        if process_controller.get_file_loader(file_id=file_id) is None:
+            return None
+
+        # assets never change after upload, which hashed their content; only older assets are read again
+        content_hash = (asset.asset_config or {}).get("content_hash")
+        if content_hash is None:
+            content_hash = await process_controller.aget_file_hash(file_id=file_id, executor=self.parsing_executor)
+        if content_hash is None:
+            return None
+
+        return {
+            "content_hash": content_hash,
+            "chunk_size": params["chunk_size"],
+            "overlap_size": params["overlap_size"],
+        }
+
+    def is_asset_index_stale(self, asset_config: dict):
+        # assets processed before signatures were recorded have neither key and are pushed once
+        asset_config = asset_config or {}
+        return "indexed" not in asset_config or asset_config["indexed"] != asset_config.get("processed")
+
+    async def reset_project(self, project_id: int):
+        chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+        asset_model = await AssetModel.create_instance(db_client=self.db_client)
+        collection_name = self.get_nlp_controller().create_collection_nmae(project_id=project_id)
+
+        _ = await self.vectordb_client.delete_collection(collection_name=collection_name)
+        _ = await chunk_model.delete_chunks_by_project_id(project_id=project_id)
+
+        project_assets = await asset_model.get_all_project_assets(asset_project_id=project_id,
+                                                                   asset_type=AssetTypeEnum.FILE.value)
+        _ = await asset_model.update_assets_config({
+            asset.asset_id: {"processed": None, "indexed": None}
+            for asset in project_assets
+        })
+
+    async def remove_chunks(self, project_id: int, chunk_ids: list, batch_size: int = 1000):
+        # vectors go before the chunks: an interruption in between leaves chunks
+        # that the next run removes again, never orphan vectors
+        chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+        collection_name = self.get_nlp_controller().create_collection_nmae(project_id=project_id)
+
+        for i in range(0, len(chunk_ids), batch_size):
+            batch_ids = chunk_ids[i:i+batch_size]
+            _ = await self.vectordb_client.delete_records(collection_name=collection_name, record_ids=batch_ids)
+            _ = await chunk_model.delete_chunks_by_ids(chunk_ids=batch_ids)
+
+    async def drop_asset_chunks(self, project_id: int, asset_id: int):
+        # the asset counts as unprocessed until its new chunks are in
+        chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+        asset_model = await AssetModel.create_instance(db_client=self.db_client)
+
+        _ = await asset_model.update_assets_config({asset_id: {"processed": None, "indexed": None}})
+
+        chunk_ids = await chunk_model.get_asset_chunk_ids(asset_id=asset_id)
+        await self.remove_chunks(project_id=project_id, chunk_ids=chunk_ids)
+
+    def get_asset_file_name(self, asset) -> str:
+        # asset names are the uploaded file name behind a random key (DataController.generate_unique_filepath)
+        return asset.asset_name.split("_", 1)[-1]
+
+    def get_replaced_assets(self, asset, project_assets: list) -> list:
+        # the older assets of the project uploaded with the same file name
+        file_name = self.get_asset_file_name(asset)
+        return [
+            project_asset for project_asset in project_assets
+            if project_asset.asset_id < asset.asset_id and self.get_asset_file_name(project_asset) == file_name
+        ]
+
+    async def get_latest_assets(self, project_id: int, assets: list) -> tuple:
+        # (assets, {asset_id: replaced assets}): an asset replaced by another one of the list is left out,
+        # its replacement takes care of it
+        asset_model = await AssetModel.create_instance(db_client=self.db_client)
+        project_assets = await asset_model.get_all_project_assets(asset_project_id=project_id,
+                                                                   asset_type=AssetTypeEnum.FILE.value)
+
+        replaced_assets = {asset.asset_id: self.get_replaced_assets(asset, project_assets) for asset in assets}
+        replaced_asset_ids = {
+            replaced_asset.asset_id
+            for asset_replaced_assets in replaced_assets.values()
+            for replaced_asset in asset_replaced_assets
+        }
+
+        latest_assets = [asset for asset in assets if asset.asset_id not in replaced_asset_ids]
+        return latest_assets, {asset.asset_id: replaced_assets[asset.asset_id] for asset in latest_assets}
+
+    async def retire_assets(self, project_id: int, assets: list):
+        # what is left of the chunks of replaced assets goes, then the assets and their files
+        chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+        asset_model = await AssetModel.create_instance(db_client=self.db_client)
+        process_controller = ProcessController(project_id=project_id)
+
+        for asset in assets:
+            chunk_ids = await chunk_model.get_asset_chunk_ids(asset_id=asset.asset_id)
+            await self.remove_chunks(project_id=project_id, chunk_ids=chunk_ids)
+            _ = await asset_model.delete_asset(asset_id=asset.asset_id)
+            process_controller.delete_file(file_id=asset.asset_name)
+
+    async def gather_assets(self, coroutines: list) -> list:
+        # like asyncio.gather, but an asset that fails (or a cancelled job) stops the other assets
+        # instead of letting them parse, embed and write until their next progress call
+        tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_process_job(self, job: Job, context: JobContext):
+        # checkpoint: {"reset_done": bool, "processed_asset_ids": [...], "kept_chunks": int, "deleted_chunks": int,
+        #              "replaced_files": int}
+        params = job.job_params
+        project_id = job.job_project_id
+
+        chunk_model = await ChunkModel.create_instance(
+            db_client=self.db_client
+        )
+
+        asset_model = await AssetModel.create_instance(
+            db_client=self.db_client
+        )
+
+        if params["do_reset"] == 1 and not context.checkpoint.get("reset_done"):
+            await self.reset_project(project_id=project_id)
+            await context.progress(checkpoint={"reset_done": True})
+
+        process_controller = ProcessController(project_id=project_id)
+        processed_asset_ids = set(context.checkpoint.get("processed_asset_ids", []))
+        skipped_asset_ids = set()
+        run_stats = {
+            "kept_chunks": context.checkpoint.get("kept_chunks", 0),
+            "deleted_chunks": context.checkpoint.get("deleted_chunks", 0),
+            "replaced_files": context.checkpoint.get("replaced_files", 0),
+        }
+
+        # assets are streamed page by page and several of them are processed at once;
+        # chunks are flushed in batches so memory stays flat whatever the file size
+        assets_semaphore = asyncio.Semaphore(self.app_settings.PROCESSING_MAX_CONCURRENT_ASSETS)
+
+        async def process_asset(asset, file_id: str, replaced_assets: list):
+            async with assets_semaphore:
+                signature = await self.get_asset_signature(process_controller=process_controller,
+                                                           asset=asset, file_id=file_id, params=params)
+                if signature is None:
+                    return None
+
+                if not replaced_assets and (asset.asset_config or {}).get("processed") == signature:
+                    skipped_asset_ids.add(asset.asset_id)
+                    return 0
+
+                # the asset counts as unprocessed until its chunks match the file again
+                _ = await asset_model.update_assets_config({asset.asset_id: {"processed": None, "indexed": None}})
+
+                # chunks whose text did not change, the asset's own or those of the assets it replaces, keep
+                # their id and vector, only their asset, order and metadata are rewritten (the metadata in the
+                # vector payload is left as it was, searches only read the text); new texts are inserted
+                # unindexed and the stored chunks left unmatched are removed
+                stored_chunks = defaultdict(deque)
+                for source_asset in [asset, *replaced_assets]:
+                    for chunk_id, chunk_hash in await chunk_model.get_asset_chunk_hashes(asset_id=source_asset.asset_id):
+                        stored_chunks[chunk_hash].append(chunk_id)
+
+                pages = process_controller.aiter_file_pages(file_id=file_id,
+                                                            executor=self.parsing_executor,
+                                                            pages_per_task=self.app_settings.PARSING_PDF_PAGES_PER_TASK)
+
+                no_chunks = 0
+                no_kept = 0
+                new_chunks_records = []
+                kept_chunks_records = []
+
+                async def flush_chunks():
+                    nonlocal new_chunks_records, kept_chunks_records, no_kept
+                    inserted_count = len(await chunk_model.bulk_insert_chunks(chunks=new_chunks_records))
+                    kept_count = await chunk_model.update_chunks(chunks=kept_chunks_records)
+                    no_kept += kept_count
+                    new_chunks_records = []
+                    kept_chunks_records = []
+                    await context.progress(count=inserted_count + kept_count)
+
+                async for chunk in process_controller.aiter_chunks(pages=pages,
+                                                                   chunk_size=params["chunk_size"],
+                                                                   overlap_size=params["overlap_size"]):
+                    no_chunks += 1
+                    chunk_hash = chunk_model.get_chunk_hash(chunk.page_content)
+
+                    if stored_chunks.get(chunk_hash):
+                        kept_chunks_records.append({
+                            "chunk_id": stored_chunks[chunk_hash].popleft(),
+                            "chunk_asset_id": asset.asset_id,
+                            "chunk_metadata": chunk.metadata,
+                            "chunk_order": no_chunks,
+                        })
+                    else:
+                        new_chunks_records.append(
+                            (chunk.page_content, chunk.metadata, no_chunks, project_id, asset.asset_id, chunk_hash)
+                        )
+
+                    if len(new_chunks_records) + len(kept_chunks_records) >= self.app_settings.PROCESSING_CHUNKS_FLUSH_SIZE:
+                        await flush_chunks()
+
+                if new_chunks_records or kept_chunks_records:
+                    await flush_chunks()
+
+                if no_chunks > 0:
+                    removed_chunk_ids = [chunk_id for chunk_ids in stored_chunks.values() for chunk_id in chunk_ids]
+                    await self.remove_chunks(project_id=project_id, chunk_ids=removed_chunk_ids)
+                    await self.retire_assets(project_id=project_id, assets=replaced_assets)
+
+                    _ = await asset_model.update_assets_config({asset.asset_id: {"processed": signature}})
+                    processed_asset_ids.add(asset.asset_id)
+                    run_stats["kept_chunks"] += no_kept
+                    run_stats["deleted_chunks"] += len(removed_chunk_ids)
+                    run_stats["replaced_files"] += len(replaced_assets)
+                    await context.progress(checkpoint={"processed_asset_ids": sorted(processed_asset_ids),
+                                                       **run_stats})
+
+                return no_chunks
+
+        file_ids = {
+            asset_id: file_id
+            for asset_id, file_id in params["assets"]
+            if asset_id not in processed_asset_ids
+        }
+        # assets deleted since the job was submitted are left out
+        pending_assets = await asset_model.get_assets_by_ids(asset_ids=list(file_ids.keys()))
+        pending_assets, replaced_assets = await self.get_latest_assets(project_id=project_id, assets=pending_assets)
+
+        assets_chunks = await self.gather_assets([
+            process_asset(asset=asset, file_id=file_ids[asset.asset_id],
+                          replaced_assets=replaced_assets[asset.asset_id])
+            for asset in pending_assets
+        ])
+
+        for asset, no_chunks in zip(pending_assets, assets_chunks):
+            file_id = file_ids[asset.asset_id]
+
+            if no_chunks is None:
+                self.logger.error(f"Error while processing file: {file_id}")
+                continue
+
+            if no_chunks == 0 and asset.asset_id not in skipped_asset_ids:
+                raise RuntimeError(f"{ResponseSignal.PROCESSING_FAILED.value}: {file_id}")
+
+        return {
+            "inserted_chunks": context.processed_count - run_stats["kept_chunks"],
+            **run_stats,
+            "processed_files": len(processed_asset_ids),
+            "skipped_files": len(skipped_asset_ids)
+        }
+
+    async def run_push_job(self, job: Job, context: JobContext):
+        # checkpoint: {"collection_created": bool, "indexed": {asset_id: signature}, "skipped_files": int}
+        # only chunks without a vector are pushed and each batch is flagged once inserted,
+        # so a resumed run carries on with what is left
+        params = job.job_params
+
+        project_model = await ProjectModel.create_instance(
+            self.db_client
+        )
+
+        chunk_model = await ChunkModel.create_instance(
+            self.db_client
+        )
+
+        asset_model = await AssetModel.create_instance(
+            self.db_client
+        )
+
+        project = await project_model.get_project_or_create_one(project_id=job.job_project_id)
+        nlp_controller = self.get_nlp_controller()
+
+        # the signatures of the stale assets are kept from the start,
+        # a process job running meanwhile marks its assets stale again
+        if "indexed" not in context.checkpoint:
+            project_assets = await asset_model.get_all_project_assets(asset_project_id=project.project_id,
+                                                                       asset_type=AssetTypeEnum.FILE.value)
+            stale_assets = [
+                asset for asset in project_assets
+                if params["do_reset"] == 1 or self.is_asset_index_stale(asset_config=asset.asset_config)
+            ]
+
+            if params["do_reset"] == 1:
+                _ = await chunk_model.reset_project_chunks_indexed(project_id=project.project_id)
+
+            await context.progress(checkpoint={
+                "indexed": {
+                    str(asset.asset_id): (asset.asset_config or {}).get("processed")
+                    for asset in stale_assets
+                },
+                "skipped_files": len(project_assets) - len(stale_assets)
+            })
+
+        indexed_assets_config = {
+            int(asset_id): {"indexed": signature}
+            for asset_id, signature in context.checkpoint["indexed"].items()
+        }
+
+        chunks_count = await chunk_model.get_total_chunks(project_id=project.project_id, only_unindexed=True)
+        if chunks_count == 0 and params["do_reset"] != 1:
+            # the changed assets only lost chunks, their vectors went with them
+            _ = await asset_model.update_assets_config(indexed_assets_config)
+            return {
+                "inserted_chunks": context.processed_count,
+                "skipped_files": context.checkpoint["skipped_files"]
+            }
+
+        # a resumed run keeps what was already pushed, the reset only happens on the first one
+        collection_name = nlp_controller.create_collection_nmae(project_id=project.project_id)
+        _ = await self.vectordb_client.create_collection(
+            collection_name=collection_name,
+            collection_size=self.embedding_client.embedding_size,
+            do_reset=0 if context.checkpoint.get("collection_created") else params["do_reset"]
+        )
+
+        await context.progress(checkpoint={"collection_created": True},
+                               total_count=context.processed_count + chunks_count)
+
+        async def on_progress(chunks):
+            _ = await chunk_model.set_chunks_indexed(chunk_ids=[chunk.chunk_id for chunk in chunks])
+            await context.progress(count=len(chunks))
+
+        inserted_items_count = await nlp_controller.index_chunks_pipeline(
+            project=project,
+            chunk_batches=chunk_model.iter_project_chunks(project_id=project.project_id,
+                                                          batch_size=self.app_settings.INDEX_PUSH_BATCH_SIZE,
+                                                          only_unindexed=True),
+            embed_workers=self.app_settings.INDEX_PUSH_EMBED_WORKERS,
+            insert_workers=self.app_settings.INDEX_PUSH_INSERT_WORKERS,
+            embed_queue_size=self.app_settings.INDEX_PUSH_EMBED_QUEUE_SIZE,
+            insert_queue_size=self.app_settings.INDEX_PUSH_INSERT_QUEUE_SIZE,
+            on_progress=on_progress
+        )
+
+        if inserted_items_count is None:
+            raise RuntimeError(ResponseSignal.CHUNKS_NOT_INSERTED_ERROR.value)
+
+        _ = await asset_model.update_assets_config(indexed_assets_config)
+
+        # build the ANN index once over the loaded rows
+        _ = await nlp_controller.build_vector_db_index(project=project)
+
+        return {
+            "inserted_chunks": context.processed_count,
+            "skipped_files": context.checkpoint["skipped_files"]
+        }
+
+    async def run_distributed_process_job(self, job: Job, context: JobContext):
+        # the worker fleet (worker.py) runs parse -> chunk -> embed -> index over Redis streams;
+        # this job publishes one parse task per changed asset and follows the fleet's counters.
+        # checkpoint: {"reset_done": bool, "dispatched": bool, "signatures": {asset_id: signature},
+        #              "replaced_asset_ids": [...]}; replaced assets are retired once the fleet is done
+        params = job.job_params
+        project_id = job.job_project_id
+
+        if not context.checkpoint.get("dispatched"):
+            if params["do_reset"] == 1 and not context.checkpoint.get("reset_done"):
+                await self.reset_project(project_id=project_id)
+                await context.progress(checkpoint={"reset_done": True})
+
+            asset_model = await AssetModel.create_instance(db_client=self.db_client)
+            process_controller = ProcessController(project_id=project_id)
+            assets_semaphore = asyncio.Semaphore(self.app_settings.PROCESSING_MAX_CONCURRENT_ASSETS)
+
+            file_ids = dict(params["assets"])
+            assets = await asset_model.get_assets_by_ids(asset_ids=list(file_ids.keys()))
+            assets, replaced_assets = await self.get_latest_assets(project_id=project_id, assets=assets)
+
+            def is_asset_current(asset, signature: dict) -> bool:
+                # the fleet processes and indexes in one go, so an asset is unchanged only when it is both
+                asset_config = asset.asset_config or {}
+                return asset_config.get("processed") == signature and asset_config.get("indexed") == signature
+
+            async def check_asset(asset):
+                async with assets_semaphore:
+                    signature = await self.get_asset_signature(process_controller=process_controller, asset=asset,
+                                                               file_id=file_ids[asset.asset_id], params=params)
+                    if signature is None:
+                        self.logger.error(f"Error while processing file: {file_ids[asset.asset_id]}")
+                        return None
+
+                    if not is_asset_current(asset=asset, signature=signature):
+                        await self.drop_asset_chunks(project_id=project_id, asset_id=asset.asset_id)
+                    return signature
+
+            checked_signatures = await self.gather_assets([check_asset(asset=asset) for asset in assets])
+            checked_assets = [
+                (asset, signature)
+                for asset, signature in zip(assets, checked_signatures)
+                if signature is not None
+            ]
+            signatures = {
+                str(asset.asset_id): signature
+                for asset, signature in checked_assets
+                if not is_asset_current(asset=asset, signature=signature)
+            }
+
+            await self.task_streams.publish(job_id=job.job_id, tasks=[
+                (
+                    IngestionStageEnum.PARSE.value,
+                    int(asset_id),
+                    {
+                        "project_id": project_id,
+                        "asset_id": int(asset_id),
+                        "file_id": file_ids[int(asset_id)],
+                        "chunk_size": params["chunk_size"],
+                        "overlap_size": params["overlap_size"],
+                    }
+                )
+                for asset_id in signatures
+            ])
+            # an unchanged asset still replaces the older uploads of its file name
+            replaced_asset_ids = [
+                replaced_asset.asset_id
+                for asset, _ in checked_assets
+                for replaced_asset in replaced_assets[asset.asset_id]
+            ]
+            await context.progress(checkpoint={"dispatched": True, "signatures": signatures,
+                                               "replaced_asset_ids": replaced_asset_ids,
+                                               "skipped_files": len(assets) - len(signatures)})
+
+        try:
+            while True:
+                state = await self.task_streams.get_job_state(job_id=job.job_id)
+                await context.progress(count=state["processed"] - context.processed_count,
+                                       total_count=state["total"] or None)
+                if state["pending"] <= 0:
+                    break
+                await asyncio.sleep(self.app_settings.INGESTION_POLL_SECONDS)
+        except asyncio.CancelledError:
+            if await context.is_cancelled():
+                # workers drop the job's remaining tasks
+                await self.task_streams.cancel_job(job_id=job.job_id)
+            raise
+
+        # the fleet wrote the vectors from other processes, their bumps only reach here through shared versions
+        await self.vectordb_client.bump_collection_version(
+            collection_name=self.get_nlp_controller().create_collection_nmae(project_id=project_id)
+        )
+
+        await self.task_streams.delete_job(job_id=job.job_id)
+        if state["failed"]:
+            raise RuntimeError(f"{state['failed']} ingestion tasks failed, last error: {state['error']}")
+
+        # the fleet does not reuse chunks, the replaced assets' chunks all go
+        asset_model = await AssetModel.create_instance(db_client=self.db_client)
+        retired_assets = await asset_model.get_assets_by_ids(
+            asset_ids=context.checkpoint.get("replaced_asset_ids", [])
+        )
+        await self.retire_assets(project_id=project_id, assets=retired_assets)
+
+        signatures = context.checkpoint["signatures"]
+        if signatures:
+            _ = await asset_model.update_assets_config({
+                int(asset_id): {"processed": signature, "indexed": signature}
+                for asset_id, signature in signatures.items()
+            })
+
+            project_model = await ProjectModel.create_instance(self.db_client)
+            project = await project_model.get_project_or_create_one(project_id=project_id)
+            _ = await self.get_nlp_controller().build_vector_db_index(project=project)
+
+        return {
+            "inserted_chunks": state["processed"],
+            "processed_files": len(signatures),
+            "replaced_files": len(context.checkpoint.get("replaced_asset_ids", [])),
+            "skipped_files": context.checkpoint.get("skipped_files", 0)
+        }
+
+    # stage handlers of the worker fleet: each takes a task payload and returns
+    # {"tasks": [(stage, shard_key, payload)], "processed": int, "total": int}
+
+    async def run_parse_task(self, payload: dict):
+        # splits the file into page ranges, each one is parsed and chunked by its own task
+        process_controller = ProcessController(project_id=payload["project_id"])
+        page_ranges = await process_controller.aget_page_ranges(file_id=payload["file_id"],
+                                                                executor=self.parsing_executor,
+                                                                pages_per_task=self.app_settings.PARSING_PDF_PAGES_PER_TASK)
+        if not page_ranges:
+            # missing or unsupported file
+            self.logger.error(f"Error while processing file: {payload['file_id']}")
+            return {}
+
+        return {
+            "tasks": [
+                (
+                    IngestionStageEnum.CHUNK.value,
+                    payload["asset_id"],
+                    {**payload, "range_no": range_no, "page_range": [start_page, end_page]}
+                )
+                for range_no, (start_page, end_page) in enumerate(page_ranges)
+            ]
+        }
+
+    async def run_chunk_task(self, payload: dict):
+        # chunks never span two page ranges; the range number is kept in chunk_metadata
+        # and chunk_order restarts at 1 in every range
+        chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+        asset_id = payload["asset_id"]
+        range_no = payload["range_no"]
+
+        chunk_ids = await chunk_model.insert_range_chunks_once(asset_id=asset_id, range_no=range_no, chunks=[])
+        if not chunk_ids:
+            process_controller = ProcessController(project_id=payload["project_id"])
+            pages = process_controller.aiter_file_pages(file_id=payload["file_id"],
+                                                        executor=self.parsing_executor,
+                                                        pages_per_task=self.app_settings.PARSING_PDF_PAGES_PER_TASK,
+                                                        page_range=tuple(payload["page_range"]))
+
+            file_chunks_records = []
+            async for chunk in process_controller.aiter_chunks(pages=pages,
+                                                               chunk_size=payload["chunk_size"],
+                                                               overlap_size=payload["overlap_size"]):
+                file_chunks_records.append(
+                    (chunk.page_content, {**chunk.metadata, "range_no": range_no},
+                     len(file_chunks_records) + 1, payload["project_id"], asset_id,
+                     chunk_model.get_chunk_hash(chunk.page_content))
+                )
+
+            chunk_ids = await chunk_model.insert_range_chunks_once(asset_id=asset_id, range_no=range_no,
+                                                                   chunks=file_chunks_records)
+
+        batch_size = self.app_settings.INDEX_PUSH_BATCH_SIZE
+        return {
+            "tasks": [
+                (
+                    IngestionStageEnum.EMBED.value,
+                    asset_id,
+                    {
+                        "project_id": payload["project_id"],
+                        "asset_id": asset_id,
+                        "chunk_ids": chunk_ids[i:i+batch_size],
+                    }
+                )
+                for i in range(0, len(chunk_ids), batch_size)
+            ],
+            "total": len(chunk_ids)
+        }
+
+    async def run_embed_task(self, payload: dict):
+        chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+
+        # chunks deleted meanwhile (reset, re-process) are skipped
+        chunks = await chunk_model.get_chunks_by_ids(chunk_ids=payload["chunk_ids"])
+        if not chunks:
+            return {}
+
+        vectors = await self.embedding_client.aembed_text(text=[chunk.chunk_text for chunk in chunks],
+                                                          document_type=DocumentTypeEnum.DOCUMENT.value)
+        if not vectors or len(vectors) != len(chunks):
+            raise RuntimeError(f"Error while embedding {len(chunks)} chunks")
+
+        # vectors travel as a float32 buffer rather than json floats
+        return {
+            "tasks": [
+                (
+                    IngestionStageEnum.INDEX.value,
+                    payload["asset_id"],
+                    {
+                        "project_id": payload["project_id"],
+                        "asset_id": payload["asset_id"],
+                        "chunk_ids": [chunk.chunk_id for chunk in chunks],
+                        "vectors": base64.b64encode(np.asarray(vectors, dtype=np.float32).tobytes()).decode(),
+                    }
+                )
+            ]
+        }
+
+    async def run_index_task(self, payload: dict):
+        chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+        nlp_controller = self.get_nlp_controller()
+
+        vectors = np.frombuffer(base64.b64decode(payload["vectors"]), dtype=np.float32) \
+                    .reshape(len(payload["chunk_ids"]), -1).tolist()
+        vectors = dict(zip(payload["chunk_ids"], vectors))
+
+        chunks = await chunk_model.get_chunks_by_ids(chunk_ids=payload["chunk_ids"])
+        if not chunks:
+            return {}
+
+        collection_name = nlp_controller.create_collection_nmae(project_id=payload["project_id"])
+        _ = await self.vectordb_client.create_collection(collection_name=collection_name,
+                                                         collection_size=self.embedding_client.embedding_size,
+                                                         do_reset=False)
+
+        # insert_many upserts by chunk_id, a redelivered task overwrites the records it wrote before
+        record_ids = [chunk.chunk_id for chunk in chunks]
+        is_inserted = await self.vectordb_client.insert_many(collection_name=collection_name,
+                                                             texts=[chunk.chunk_text for chunk in chunks],
+                                                             vectors=[vectors[chunk.chunk_id] for chunk in chunks],
+                                                             metadata=[chunk.chunk_metadata for chunk in chunks],
+                                                             record_ids=record_ids)
+        if not is_inserted:
+            raise RuntimeError(f"Error while inserting {len(chunks)} chunks into collection: {collection_name}")
+
+        _ = await chunk_model.set_chunks_indexed(chunk_ids=record_ids)
+
+        return {
+            "processed": len(chunks)
+        }
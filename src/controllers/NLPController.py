@@ -3,15 +3,21 @@ from models.db_schemes import Project
 from models.db_schemes import DataChunk
 from typing import List
 from stores.llm.LLMEnums import DocumentTypeEnum
+from utils.cache import get_query_hash
+import asyncio
 import json
+import logging
 
 class NLPController(BaseController):
-    def __init__(self,vectordb_client,embedding_client,generation_client,template_parser):
+    def __init__(self,vectordb_client,embedding_client,generation_client,template_parser,answer_cache=None,answer_flights=None):
         super().__init__()
         self.vectordb_client = vectordb_client
         self.embedding_client = embedding_client
         self.generation_client = generation_client
         self.template_parser = template_parser
+        self.answer_cache = answer_cache
+        self.answer_flights = answer_flights
+        self.logger = logging.getLogger("uvicorn")
     
     def create_collection_nmae(self,project_id: str):
         return f"collection_{self.vectordb_client.default_vector_size}_{project_id}".strip()
@@ -27,6 +33,16 @@ class NLPController(BaseController):
             json.dumps(collection_info,default=lambda x: x.__dict__)
         )
     
+    async def get_vector_db_index_status(self,project: Project):
+        collection_name = self.create_collection_nmae(project_id=project.project_id)
+        return await self.vectordb_client.get_vector_index_status(collection_name=collection_name)
+    
+    async def build_vector_db_index(self,project: Project,index_type: str = None,do_reset: bool = False):
+        collection_name = self.create_collection_nmae(project_id=project.project_id)
+        if do_reset and hasattr(self.vectordb_client,"reset_vector_index"):
+            return await self.vectordb_client.reset_vector_index(collection_name=collection_name,index_type=index_type)
+        return await self.vectordb_client.create_vector_index(collection_name=collection_name,index_type=index_type)
+    
     async def insert_into_vector_db(self,project: Project,
                               chunks: List[DataChunk], chunk_ids: List[int], do_reset:bool = False):
         # get collection name
@@ -35,7 +51,7 @@ class NLPController(BaseController):
         # get texts, metadatas, vectors
         texts = [chunk.chunk_text for chunk in chunks]
         metadatas = [metadata.chunk_metadata for metadata in chunks]
-        vectors = self.embedding_client.embed_text(text=texts,document_type=DocumentTypeEnum.DOCUMENT.value)
+        vectors = await self.embedding_client.aembed_text(text=texts,document_type=DocumentTypeEnum.DOCUMENT.value)
         
         #create collection if not exist
         _ = await self.vectordb_client.create_collection(collection_name=collection_name,
@@ -51,22 +67,99 @@ class NLPController(BaseController):
         
         return True
     
-    async def search_vector_db_collection(self,project:Project,text:str,limit:int = 5):
-        
+    async def index_chunks_pipeline(self, project: Project, chunk_batches,
+                                    embed_workers: int = 4, insert_workers: int = 1,
+                                    embed_queue_size: int = 8, insert_queue_size: int = 8,
+                                    on_progress = None):
+        # producer -> embedding workers -> vector db writers, connected by bounded queues so a slow
+        # stage applies backpressure on the one before it instead of buffering the whole project.
+        # on_progress is awaited with each batch of chunks once it is in the vector db.
         collection_name = self.create_collection_nmae(project_id=project.project_id)
-        query_vector = None
+
+        if embed_workers < 1 or insert_workers < 1:
+            # with no consumer the producer would wait on a full queue forever
+            self.logger.error(f"Indexing pipeline needs at least one embed and one insert worker, "
+                              f"got {embed_workers} and {insert_workers}")
+            return None
+
+        embed_queue = asyncio.Queue(maxsize=embed_queue_size)
+        insert_queue = asyncio.Queue(maxsize=insert_queue_size)
+        inserted_items_count = 0
+
+        async def produce():
+            async for chunks in chunk_batches:
+                await embed_queue.put(chunks)
+            for _ in range(embed_workers):
+                await embed_queue.put(None)
+
+        async def embed():
+            while (chunks := await embed_queue.get()) is not None:
+                texts = [chunk.chunk_text for chunk in chunks]
+                vectors = await self.embedding_client.aembed_text(text=texts,
+                                                                  document_type=DocumentTypeEnum.DOCUMENT.value)
+                if not vectors or len(vectors) != len(chunks):
+                    raise RuntimeError(f"Error while embedding {len(chunks)} chunks for collection: {collection_name}")
+                await insert_queue.put((chunks, vectors))
+
+        async def run_embedders():
+            await asyncio.gather(*[embed() for _ in range(embed_workers)])
+            for _ in range(insert_workers):
+                await insert_queue.put(None)
+
+        async def insert():
+            nonlocal inserted_items_count
+            while (item := await insert_queue.get()) is not None:
+                chunks, vectors = item
+                is_inserted = await self.vectordb_client.insert_many(collection_name=collection_name,
+                                                                     texts=[chunk.chunk_text for chunk in chunks],
+                                                                     vectors=vectors,
+                                                                     metadata=[chunk.chunk_metadata for chunk in chunks],
+                                                                     record_ids=[chunk.chunk_id for chunk in chunks])
+                if not is_inserted:
+                    raise RuntimeError(f"Error while inserting {len(chunks)} chunks into collection: {collection_name}")
+                inserted_items_count += len(chunks)
+                if on_progress:
+                    await on_progress(chunks)
+
+        async def run_inserters():
+            await asyncio.gather(*[insert() for _ in range(insert_workers)])
+
+        stages = [asyncio.create_task(stage()) for stage in (produce, run_embedders, run_inserters)]
+        try:
+            await asyncio.gather(*stages)
+        except Exception as e:
+            self.logger.error(f"Indexing pipeline failed: {e}")
+            return None
+        finally:
+            # also reached when the caller is cancelled, no stage may outlive the pipeline
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            # releases the source's server-side cursor and session now rather than at garbage collection
+            if hasattr(chunk_batches, "aclose"):
+                await chunk_batches.aclose()
+
+        return inserted_items_count
+
+    async def get_query_vector(self,text:str):
         
-        vectors = self.embedding_client.embed_text(
+        vectors = await self.embedding_client.aembed_text(
             text=text,document_type=DocumentTypeEnum.QUERY.value
         )
         
         if not vectors or len(vectors) == 0:
-            return False
+            return None
+        
+        return vectors[0]
+    
+    async def search_vector_db_collection(self,project:Project,text:str,limit:int = 5,query_vector:list = None):
+        
+        collection_name = self.create_collection_nmae(project_id=project.project_id)
         
-        if isinstance(vectors,list) and len(vectors)>0:
-            query_vector = vectors[0]
+        if query_vector is None:
+            query_vector = await self.get_query_vector(text=text)
         
-        if query_vector == None:
+        if query_vector is None:
             return False
         
         results = await self.vectordb_client.search_by_vector(
@@ -81,14 +174,104 @@ class NLPController(BaseController):
     
     async def answer_rag_question(self,project:Project,query:str,limit:int = 5):
         
+        if self.answer_flights is None:
+            return await self.generate_rag_answer(project=project,query=query,limit=limit)
+        
+        # concurrent identical questions wait for the one being answered instead of answering it again
+        query_hash = get_query_hash(query)
+        result = await self.answer_flights.do(
+            key=f"{project.project_id}:{limit}:{query_hash}",
+            fn=lambda: self.generate_rag_answer(project=project,query=query,limit=limit)
+        )
+        
+        # shared through redis, the tuple comes back as a list
+        return tuple(result) if result is not None else None
+    
+    async def generate_rag_answer(self,project:Project,query:str,limit:int = 5):
+        
+        collection_name = self.create_collection_nmae(project_id=project.project_id)
+        query_vector = await self.get_query_vector(text=query)
+        if query_vector is None:
+            return None
+        
+        # a close enough question answered against the current collection is answered again as is
+        # without a readable collection version the cache is neither read nor written
+        collection_version = None
+        if self.answer_cache is not None:
+            collection_version = await self.vectordb_client.get_collection_version(collection_name=collection_name)
+        if collection_version is not None:
+            cached_answer = self.answer_cache.get(collection_name=collection_name, version=collection_version,
+                                                  vector=query_vector, limit=limit)
+            if cached_answer is not None:
+                return cached_answer
+        
         retreived_documents = await self.search_vector_db_collection(
             project=project,
             text=query,
-            limit=limit
+            limit=limit,
+            query_vector=query_vector
         )
         if not retreived_documents or len(retreived_documents) == 0:
             return None
         
+        full_prompt, chat_history = self.construct_rag_prompt(query=query, retreived_documents=retreived_documents)
+        
+        answer = await self.generation_client.agenerate_text(
+            prompt = full_prompt,
+            chat_history = chat_history
+        )
+        
+        if answer and collection_version is not None:
+            # keyed by the version read before retrieval, a write meanwhile makes the entry unreachable
+            self.answer_cache.set(collection_name=collection_name, version=collection_version,
+                                  vector=query_vector, limit=limit,
+                                  value=(answer,full_prompt,chat_history))
+        
+        return answer,full_prompt,chat_history
+    
+    async def astream_rag_answer(self,project:Project,query:str,limit:int = 5):
+        # yields (event, data): the retrieved documents first, then the answer's text as it is generated;
+        # nothing when no documents were retrieved
+        
+        collection_name = self.create_collection_nmae(project_id=project.project_id)
+        query_vector = await self.get_query_vector(text=query)
+        if query_vector is None:
+            return
+        
+        collection_version = None
+        if self.answer_cache is not None:
+            collection_version = await self.vectordb_client.get_collection_version(collection_name=collection_name)
+        
+        retreived_documents = await self.search_vector_db_collection(
+            project=project,
+            text=query,
+            limit=limit,
+            query_vector=query_vector
+        )
+        if not retreived_documents or len(retreived_documents) == 0:
+            return
+        
+        yield "documents", [
+            {"doc_num": idx+1, "score": doc.score, "text": doc.text}
+            for idx,doc in enumerate(retreived_documents)
+        ]
+        
+        full_prompt, chat_history = self.construct_rag_prompt(query=query, retreived_documents=retreived_documents)
+        
+        answer_parts = []
+        async for text in self.generation_client.astream_text(prompt=full_prompt, chat_history=chat_history):
+            answer_parts.append(text)
+            yield "token", text
+        
+        # a complete streamed answer serves the next similar questions of the answer endpoint
+        answer = "".join(answer_parts)
+        if answer and collection_version is not None:
+            self.answer_cache.set(collection_name=collection_name, version=collection_version,
+                                  vector=query_vector, limit=limit,
+                                  value=(answer,full_prompt,chat_history))
+    
+    def construct_rag_prompt(self,query:str,retreived_documents:list):
+        
         system_prompt = self.template_parser.get("rag","system_prompt")
         
         document_prompt = "\n".join([
@@ -111,9 +294,4 @@ class NLPController(BaseController):
             [document_prompt,footer_prompt]
         )
         
-        answer = self.generation_client.generate_text(
-            prompt = full_prompt,
-            chat_history = chat_history
-        )
-        
-        return answer,full_prompt,chat_history
\ No newline at end of file
+        return full_prompt,chat_history
\ No newline at end of file
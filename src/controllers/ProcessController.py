@@ -3,15 +3,46 @@ from .ProjectController import ProjectController
 import os
 from langchain_community.document_loaders import TextLoader
 from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from models import ProcessingEnum
 from dataclasses import dataclass
+import asyncio
+import aiofiles
+import fitz
+import hashlib
+from collections import deque
 
 @dataclass
 class Document:
     page_content : str
     metadata : dict
 
+# the loaders below run inside the parsing process pool, so they stay module-level and picklable
+
+def count_pdf_pages(file_path: str) -> int:
+    with fitz.open(file_path) as pdf:
+        return pdf.page_count
+
+def load_pdf_pages(file_path: str, start_page: int, end_page: int) -> list:
+    with fitz.open(file_path) as pdf:
+        return [
+            Document(
+                page_content=pdf[page_no].get_text(),
+                metadata={
+                    "source": file_path,
+                    "page": page_no,
+                    "total_pages": pdf.page_count,
+                }
+            )
+            for page_no in range(start_page, end_page)
+        ]
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(block_size):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
 class ProcessController(BaseController):
 
     def __init__(self, project_id: str):
@@ -42,44 +73,117 @@ class ProcessController(BaseController):
         
         return None
 
-    def get_file_content(self, file_id: str):
+    def delete_file(self, file_id: str):
+        file_path = os.path.join(
+            self.project_path,
+            file_id
+        )
 
-        loader = self.get_file_loader(file_id=file_id)
-        if loader:
-            return loader.load()
+        if os.path.exists(file_path):
+            os.remove(file_path)
 
-        return None
+    async def aget_file_hash(self, file_id: str, executor):
+        # sha256 of the file content, None when the file is missing
+        file_path = os.path.join(
+            self.project_path,
+            file_id
+        )
 
-    def process_file_content(self, file_content: list, file_id: str,
-                            chunk_size: int=100, overlap_size: int=20):
+        if not os.path.exists(file_path):
+            return None
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=overlap_size,
-            length_function=len,
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, hash_file, file_path)
+
+    async def aget_page_ranges(self, file_id: str, executor, pages_per_task: int = 50):
+        # [(start_page, end_page)] a file can be split into, text files are a single range
+        file_ext = self.get_file_extension(file_id=file_id)
+        file_path = os.path.join(
+            self.project_path,
+            file_id
         )
 
-        file_content_texts = [
-            rec.page_content
-            for rec in file_content
-        ]
+        if not os.path.exists(file_path):
+            return None
 
-        file_content_metadata = [
-            rec.metadata
-            for rec in file_content
-        ]
+        if file_ext == ProcessingEnum.TXT.value:
+            return [(0, 1)]
 
-        # chunks = text_splitter.create_documents(
-        #     file_content_texts,
-        #     metadatas=file_content_metadata
-        # )
-        
-        chunks = self.process_simpler_spliter(texts=file_content_texts,
-                                              metadatas=file_content_metadata,
-                                              chunk_size=chunk_size)
+        if file_ext == ProcessingEnum.PDF.value:
+            loop = asyncio.get_running_loop()
+            total_pages = await loop.run_in_executor(executor, count_pdf_pages, file_path)
+            return [
+                (start_page, min(start_page + pages_per_task, total_pages))
+                for start_page in range(0, total_pages, pages_per_task)
+            ]
 
-        return chunks
-    
+        return None
+
+    async def aiter_file_pages(self, file_id: str, executor, pages_per_task: int = 50,
+                               max_pending_ranges: int = 4, text_block_size: int = 1024 * 1024,
+                               page_range: tuple = None):
+        # yields the file page by page without loading it whole: PDF page ranges are parsed in the pool
+        # with a bounded lookahead, text files are read in blocks cut at the last line break.
+        # page_range=(start_page, end_page) limits a PDF to those pages
+        file_ext = self.get_file_extension(file_id=file_id)
+        file_path = os.path.join(
+            self.project_path,
+            file_id
+        )
+
+        if not os.path.exists(file_path):
+            return
+
+        if file_ext == ProcessingEnum.TXT.value:
+            remainder = ""
+            async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
+                while block := await f.read(text_block_size):
+                    block = remainder + block
+                    cut = block.rfind("\n") + 1
+                    if cut == 0:
+                        remainder = block
+                        continue
+                    remainder = block[cut:]
+                    yield Document(page_content=block[:cut], metadata={"source": file_path})
+
+            if remainder:
+                yield Document(page_content=remainder, metadata={"source": file_path})
+            return
+
+        if file_ext == ProcessingEnum.PDF.value:
+            loop = asyncio.get_running_loop()
+            if page_range is None:
+                first_page = 0
+                last_page = await loop.run_in_executor(executor, count_pdf_pages, file_path)
+            else:
+                first_page, last_page = page_range
+
+            page_ranges = iter([
+                (start_page, min(start_page + pages_per_task, last_page))
+                for start_page in range(first_page, last_page, pages_per_task)
+            ])
+
+            pending = deque()
+            try:
+                for start_page, end_page in page_ranges:
+                    pending.append(loop.run_in_executor(executor, load_pdf_pages, file_path, start_page, end_page))
+                    if len(pending) >= max_pending_ranges:
+                        break
+
+                # ranges are awaited in submission order, so pages come out in document order
+                while pending:
+                    pages = await pending.popleft()
+                    next_range = next(page_ranges, None)
+                    if next_range is not None:
+                        pending.append(loop.run_in_executor(executor, load_pdf_pages, file_path, *next_range))
+
+                    for page in pages:
+                        yield page
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    # the line-based splitter the chunks used to come from, kept as the baseline of benchmarks/chunking_benchmark.py
     def process_simpler_spliter(self,texts:list[str],metadatas:list,chunk_size:int,splitter_tag:str="\n"):
         full_text = " ".join(texts)
         lines = [doc.strip() for doc in full_text.split(sep=splitter_tag) if len(doc.strip()) > 1]
@@ -110,3 +214,89 @@ class ProcessController(BaseController):
 
     
 
+    async def aiter_chunks(self, pages, chunk_size: int, overlap_size: int = 0, splitter_tag: str = "\n"):
+        """
+        Streams chunks out of an async iterator of pages in one linear pass.
+        Chunk boundaries are searched in the buffered text (the unfinished tail of the previous pages
+        plus the current page) instead of growing strings line by line. A chunk ends on the last
+        splitter_tag that keeps it within chunk_size (a longer line is cut), the next chunk starts
+        at the first line (or word) inside the last overlap_size characters, and every chunk records its
+        source pages and document character offsets.
+        """
+        overlap_size = max(0, min(overlap_size, chunk_size - 1))
+        tag_size = len(splitter_tag)
+
+        buffer = ""
+        buffer_offset = 0       # document offset of buffer[0]
+        emitted_until = 0       # buffer position up to which text was already emitted
+        page_offsets = []
+        page_numbers = []
+        page_index = 0
+
+        def build_chunk(start: int, end: int):
+            nonlocal page_index
+            text = buffer[start:end]
+            content = text.strip()
+            if not content:
+                return None
+
+            start_offset = buffer_offset + start + text.find(content[0])
+            end_offset = start_offset + len(content)
+            metadata = {
+                "start_offset": start_offset,
+                "end_offset": end_offset,
+            }
+
+            # chunk starts only move forward, so does the page lookup
+            while page_index + 1 < len(page_offsets) and page_offsets[page_index + 1] <= start_offset:
+                page_index += 1
+
+            if page_numbers[page_index] is not None:
+                end_index = page_index
+                while end_index + 1 < len(page_offsets) and page_offsets[end_index + 1] < end_offset:
+                    end_index += 1
+                metadata["page"] = page_numbers[page_index]
+                metadata["end_page"] = page_numbers[end_index]
+
+            return Document(page_content=content, metadata=metadata)
+
+        async for page in pages:
+            page_offsets.append(buffer_offset + len(buffer))
+            page_numbers.append(page.metadata.get("page"))
+            buffer += page.page_content
+
+            position = 0
+            while len(buffer) - position > chunk_size:
+                end = buffer.rfind(splitter_tag, position + 1, position + chunk_size + 1)
+                if end == -1:
+                    end = next_position = position + chunk_size
+                else:
+                    next_position = end + tag_size
+
+                chunk = build_chunk(start=position, end=end)
+                if chunk is not None:
+                    yield chunk
+                emitted_until = end
+
+                if overlap_size and end - position > overlap_size + tag_size:
+                    # prefer a line start inside the overlap, then a word start
+                    overlap_start = max(position, end - overlap_size - tag_size)
+                    line_start = buffer.find(splitter_tag, overlap_start, end)
+                    if line_start != -1:
+                        next_position = line_start + tag_size
+                    else:
+                        word_start = buffer.find(" ", overlap_start, end)
+                        if word_start != -1:
+                            next_position = word_start + 1
+
+                position = next_position
+
+            # keep only the unfinished tail, it is never longer than chunk_size
+            buffer = buffer[position:]
+            buffer_offset += position
+            emitted_until = max(0, emitted_until - position)
+
+        if buffer[emitted_until:].strip():
+            chunk = build_chunk(start=0, end=len(buffer))
+            if chunk is not None:
+                yield chunk
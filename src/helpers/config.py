@@ -10,6 +10,22 @@ class Settings(BaseSettings):
     FILE_MAX_SIZE: int
     FILE_DEFAULT_CHUNK_SIZE: int
 
+    PARSING_MAX_WORKERS: int = None
+    PARSING_PDF_PAGES_PER_TASK: int = 50
+    PROCESSING_MAX_CONCURRENT_ASSETS: int = 4
+    PROCESSING_CHUNKS_FLUSH_SIZE: int = 500
+
+    JOBS_HEARTBEAT_SECONDS: int = 30
+    JOBS_STALE_SECONDS: int = 120
+
+    REDIS_URL: str = "redis://localhost:6379"
+    INGESTION_BACKEND: str = "local"
+    INGESTION_STREAM_SHARDS: int = 4
+    INGESTION_POLL_SECONDS: int = 2
+    INGESTION_TASK_MAX_ATTEMPTS: int = 3
+    INGESTION_TASK_CLAIM_IDLE_MS: int = 600000
+    INGESTION_WORKER_CONCURRENCY: int = 1
+
     POSTGRES_USERNAME : str
     POSTGRES_PASSWORD : str
     POSTGRES_HOST : str
@@ -28,6 +44,25 @@ class Settings(BaseSettings):
     GENERATION_MODEL_ID: str = None
     EMBEDDING_MODEL_ID: str = None
     EMBEDDING_MODEL_SIZE: int = None
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PERSISTENT: bool = True
+    EMBEDDING_CACHE_MAX_SIZE: int = 10000
+    QUERY_EMBEDDING_CACHE_ENABLED: bool = True
+    QUERY_EMBEDDING_CACHE_MAX_SIZE: int = 10000
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: int = 3600
+    QUERY_EMBEDDING_CACHE_REDIS: bool = False
+    ANSWER_CACHE_ENABLED: bool = False
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    RETRIEVAL_CACHE_ENABLED: bool = True
+    RETRIEVAL_CACHE_MAX_SIZE: int = 10000
+    RETRIEVAL_CACHE_TTL_SECONDS: int = 600
+    ANSWER_SINGLE_FLIGHT_ENABLED: bool = True
+    ANSWER_SINGLE_FLIGHT_REDIS: bool = False
+    ANSWER_SINGLE_FLIGHT_TIMEOUT_SECONDS: int = 60
+    EMBEDDING_BATCH_MAX_RETRIES: int = 3
+    EMBEDDING_BATCH_MAX_CONCURRENCY: int = 4
     INPUT_DAFAULT_MAX_CHARACTERS: int = None
     GENERATION_DAFAULT_MAX_TOKENS: int = None
     GENERATION_DAFAULT_TEMPERATURE: float = None
@@ -36,7 +71,31 @@ class Settings(BaseSettings):
     VECTOR_DB_BACKEND : str
     VECTOR_DB_PATH : str
     VECTOR_DB_DISTANCE_METHOD : str
+    VECTOR_DB_COLLECTION_CACHE_TTL : int = 60
+    VECTOR_DB_VERSION_REDIS : bool = True
+    VECTOR_DB_VERSION_CACHE_TTL : float = 1
+    VECTOR_DB_QDRANT_MODE : str = "local"
+    VECTOR_DB_QDRANT_URL : str = None
+    VECTOR_DB_QDRANT_GRPC_PORT : int = 6334
+    VECTOR_DB_QDRANT_PREFER_GRPC : bool = True
+    VECTOR_DB_QDRANT_API_KEY : str = None
+    VECTOR_DB_QDRANT_UPLOAD_PARALLEL : int = 4
     VECTOR_DB_PGVEC_INDEX_THRESHOLD : int = 100
+    VECTOR_DB_PGVEC_BULK_LOAD : bool = True
+    VECTOR_DB_PGVEC_INDEX_TYPE : str = "hnsw"
+    VECTOR_DB_PGVEC_HNSW_M : int = 16
+    VECTOR_DB_PGVEC_HNSW_EF_CONSTRUCTION : int = 64
+    VECTOR_DB_PGVEC_IVFFLAT_LISTS : int = None
+    VECTOR_DB_PGVEC_MAINTENANCE_WORK_MEM : str = "1GB"
+    VECTOR_DB_PGVEC_MAX_PARALLEL_MAINTENANCE_WORKERS : int = 4
+    VECTOR_DB_PGVEC_HNSW_EF_SEARCH : int = 40
+    VECTOR_DB_PGVEC_IVFFLAT_PROBES : int = 10
+
+    INDEX_PUSH_BATCH_SIZE : int = 100
+    INDEX_PUSH_EMBED_WORKERS : int = 4
+    INDEX_PUSH_INSERT_WORKERS : int = 1
+    INDEX_PUSH_EMBED_QUEUE_SIZE : int = 8
+    INDEX_PUSH_INSERT_QUEUE_SIZE : int = 8
     
     PRIMARY_LANG : str = "en"
     DEFAULT_LANG : str = "en"
@@ -1,14 +1,25 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from routes import base, data,nlp
+from routes import base, data,nlp,jobs
 from helpers.config import get_settings
 from stores.llm.LLMProviderFactory import LLMProviderFactory
+from stores.llm.EmbeddingCache import EmbeddingCache
+from stores.llm.QueryEmbeddingCache import QueryEmbeddingCache
 from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
+from stores.vectordb.RetrievalCache import RetrievalCache
 from stores.llm.templates_folder.template_parser import TempelateParser
 from sqlalchemy.ext.asyncio import create_async_engine,AsyncSession
 from sqlalchemy.orm import sessionmaker
 from utils.metrics import setup_metrics
 from utils.limiter import SlidingWindowLogLimiter
+from utils.semantic_cache import SemanticAnswerCache
+from utils.single_flight import SingleFlight
+from utils.job_manager import JobManager
+from utils.task_streams import TaskStreams
+from controllers import IngestionController
+from models.enums.JobEnums import JobTypeEnum
+from concurrent.futures import ProcessPoolExecutor
+import os
 
 
 
@@ -36,18 +47,79 @@ async def lifespan(app:FastAPI):
     app.embedding_client = llm_provider_factory.create(provider=settings.EMBEDDING_BACKEND)
     app.embedding_client.set_embedding_model(model_id=settings.EMBEDDING_MODEL_ID,
                                              embedding_size=settings.EMBEDDING_MODEL_SIZE)
+    if settings.EMBEDDING_CACHE_ENABLED:
+        app.embedding_client = EmbeddingCache(embedding_client=app.embedding_client,
+                                              provider=settings.EMBEDDING_BACKEND,
+                                              db_client=app.db_client if settings.EMBEDDING_CACHE_PERSISTENT else None,
+                                              max_size=settings.EMBEDDING_CACHE_MAX_SIZE)
+    if settings.QUERY_EMBEDDING_CACHE_ENABLED:
+        app.embedding_client = QueryEmbeddingCache(embedding_client=app.embedding_client,
+                                                   provider=settings.EMBEDDING_BACKEND,
+                                                   max_size=settings.QUERY_EMBEDDING_CACHE_MAX_SIZE,
+                                                   ttl_seconds=settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+                                                   redis_url=settings.REDIS_URL if settings.QUERY_EMBEDDING_CACHE_REDIS else None)
+    # answers of similar questions, per collection, keyed by the (shared) collection version
+    app.answer_cache = None
+    if settings.ANSWER_CACHE_ENABLED:
+        app.answer_cache = SemanticAnswerCache(similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                                               max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+                                               ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS)
+    # identical questions in flight at the same time share one answer
+    app.answer_flights = None
+    if settings.ANSWER_SINGLE_FLIGHT_ENABLED:
+        app.answer_flights = SingleFlight(redis_url=settings.REDIS_URL if settings.ANSWER_SINGLE_FLIGHT_REDIS else None,
+                                          prefix="answer_flight",
+                                          lock_ttl_seconds=settings.ANSWER_SINGLE_FLIGHT_TIMEOUT_SECONDS)
     # vectordb client 
     app.vectordb_client = vectordb_provider_factory.create(provider=settings.VECTOR_DB_BACKEND)
     await app.vectordb_client.connect()
+    if settings.RETRIEVAL_CACHE_ENABLED:
+        app.vectordb_client = RetrievalCache(vectordb_client=app.vectordb_client,
+                                             max_size=settings.RETRIEVAL_CACHE_MAX_SIZE,
+                                             ttl_seconds=settings.RETRIEVAL_CACHE_TTL_SECONDS)
+    
+    # CPU-bound document parsing runs here instead of in the event loop
+    app.parsing_executor = ProcessPoolExecutor(max_workers=settings.PARSING_MAX_WORKERS or os.cpu_count())
     
     app.template_parser = TempelateParser(language=settings.PRIMARY_LANG,default_language=settings.DEFAULT_LANG)
     
-    app.limiter = SlidingWindowLogLimiter(limit=5,window_seconds=60)
+    app.limiter = SlidingWindowLogLimiter(limit=5,window_seconds=60,redis_url=settings.REDIS_URL)
     await app.limiter.connect()
     
+    # with the redis backend, process jobs only dispatch tasks to the worker fleet (worker.py)
+    app.task_streams = None
+    if settings.INGESTION_BACKEND == "redis":
+        app.task_streams = TaskStreams(redis_url=settings.REDIS_URL, shards=settings.INGESTION_STREAM_SHARDS)
+
+    # ingestion jobs, resumed from their checkpoint when a previous process left them unfinished
+    ingestion_controller = IngestionController(db_client=app.db_client,
+                                               parsing_executor=app.parsing_executor,
+                                               vectordb_client=app.vectordb_client,
+                                               embedding_client=app.embedding_client,
+                                               generation_client=app.generation_client,
+                                               template_parser=app.template_parser,
+                                               task_streams=app.task_streams)
+    app.job_manager = JobManager(db_client=app.db_client,
+                                 heartbeat_seconds=settings.JOBS_HEARTBEAT_SECONDS,
+                                 stale_seconds=settings.JOBS_STALE_SECONDS)
+    if app.task_streams is not None:
+        app.job_manager.register(JobTypeEnum.PROCESS.value, ingestion_controller.run_distributed_process_job)
+    else:
+        app.job_manager.register(JobTypeEnum.PROCESS.value, ingestion_controller.run_process_job)
+    app.job_manager.register(JobTypeEnum.INDEX_PUSH.value, ingestion_controller.run_push_job)
+    await app.job_manager.start()
+    
     yield 
+    await app.job_manager.stop()
+    if app.task_streams is not None:
+        await app.task_streams.close()
     await app.db_engine.dispose()
+    if isinstance(app.embedding_client, QueryEmbeddingCache):
+        await app.embedding_client.close()
+    if app.answer_flights is not None:
+        await app.answer_flights.close()
     await app.vectordb_client.disconnect()
+    app.parsing_executor.shutdown(wait=False, cancel_futures=True)
 
 
 app = FastAPI(lifespan=lifespan)
@@ -56,4 +128,5 @@ setup_metrics(app=app)
 app.include_router(base.base_router)
 app.include_router(data.data_router)
 app.include_router(nlp.nlp_router)
+app.include_router(jobs.jobs_router)
 
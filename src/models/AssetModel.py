@@ -3,6 +3,9 @@ from .db_schemes import Asset
 from .enums.DataBaseEnum import DataBaseEnum
 from bson import ObjectId
 from sqlalchemy.future import select
+from sqlalchemy import update, delete, func, cast
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import JSONB
 
 
 class AssetModel(BaseDataModel):
@@ -42,8 +45,62 @@ class AssetModel(BaseDataModel):
                 Asset.asset_name == asset_name
             )
             result = await session.execute(query)
-            record = result.scaler_one_or_none()
+            record = result.scalar_one_or_none()
         return record
 
 
     
+
+    async def get_assets_by_ids(self, asset_ids: list):
+        async with self.db_client() as session:
+            query = select(Asset).where(Asset.asset_id.in_(asset_ids)).order_by(Asset.asset_id)
+            result = await session.execute(query)
+            records = result.scalars().all()
+        return records
+
+    async def update_assets_config(self, assets_config: dict):
+        # {asset_id: {key: value}}: the keys are merged into each asset_config, the other keys are kept
+        if not assets_config:
+            return 0
+
+        async with self.db_client() as session:
+            async with session.begin():
+                for asset_id, config in assets_config.items():
+                    query = update(Asset).where(Asset.asset_id == asset_id).values(
+                        asset_config=func.coalesce(Asset.asset_config, cast({}, JSONB)).op("||")(cast(config, JSONB))
+                    )
+                    await session.execute(query)
+        return len(assets_config)
+
+    async def create_asset_unless_duplicate(self, asset: Asset):
+        # (asset, True) once created, (existing asset, False) when the project already holds its content hash;
+        # the unique ix_asset_project_id_content_hash settles concurrent uploads of the same content
+        try:
+            return await self.create_asset(asset=asset), True
+        except IntegrityError:
+            content_hash = (asset.asset_config or {}).get("content_hash")
+            asset_record = None
+            if content_hash is not None:
+                asset_record = await self.get_asset_by_content_hash(asset_project_id=asset.asset_project_id,
+                                                                    content_hash=content_hash)
+            if asset_record is None:
+                raise
+            return asset_record, False
+
+    async def get_asset_by_content_hash(self, asset_project_id: int, content_hash: str):
+        # served by ix_asset_project_id_content_hash
+        async with self.db_client() as session:
+            query = select(Asset).where(
+                Asset.asset_project_id == asset_project_id,
+                Asset.asset_config["content_hash"].astext == content_hash
+            ).order_by(Asset.asset_id).limit(1)
+            result = await session.execute(query)
+            record = result.scalar_one_or_none()
+        return record
+
+    async def delete_asset(self, asset_id: int):
+        # the asset's chunks have to be removed first
+        async with self.db_client() as session:
+            async with session.begin():
+                result = await session.execute(delete(Asset).where(Asset.asset_id == asset_id))
+        return result.rowcount
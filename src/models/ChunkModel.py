@@ -4,10 +4,14 @@ from .enums.DataBaseEnum import DataBaseEnum
 from bson.objectid import ObjectId
 from pymongo import InsertOne
 from sqlalchemy.future import select
-from sqlalchemy import func,delete
+from sqlalchemy import func,delete,insert,update
+import hashlib
 
 class ChunkModel(BaseDataModel):
 
+    # column order of the tuples accepted by bulk_insert_chunks
+    CHUNK_COLUMNS = ("chunk_text", "chunk_metadata", "chunk_order", "chunk_project_id", "chunk_asset_id", "chunk_hash")
+
     def __init__(self, db_client: object):
         super().__init__(db_client=db_client)
         self.db_client = db_client
@@ -17,6 +21,10 @@ class ChunkModel(BaseDataModel):
         instance = cls(db_client)
         return instance
 
+    @staticmethod
+    def get_chunk_hash(chunk_text: str) -> str:
+        return hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+
     async def create_chunk(self, chunk: DataChunk):
         async with self.db_client() as session:
             async with session.begin():
@@ -40,7 +48,98 @@ class ChunkModel(BaseDataModel):
                     batch = chunks[i:i+batch_size]
                     session.add_all(batch)
             return len(chunks)
-                    
+
+    async def bulk_insert_chunks(self, chunks: list, batch_size: int=1000) -> list:
+        # Core INSERT ... RETURNING chunk_id sent as executemany batches, no ORM objects or identity map.
+        # chunks are dicts keyed by column name or tuples in CHUNK_COLUMNS order; ids come back in input order
+        records = [
+            chunk if isinstance(chunk, dict) else dict(zip(self.CHUNK_COLUMNS, chunk))
+            for chunk in chunks
+        ]
+
+        chunk_ids = []
+        async with self.db_client() as session:
+            async with session.begin():
+                query = insert(DataChunk).returning(DataChunk.chunk_id, sort_by_parameter_order=True)
+                for i in range(0, len(records), batch_size):
+                    result = await session.execute(query, records[i:i+batch_size])
+                    chunk_ids.extend(result.scalars().all())
+
+        return chunk_ids
+
+    async def insert_range_chunks_once(self, asset_id: int, range_no: int, chunks: list) -> list:
+        # idempotent write of the chunks of one page range of an asset (chunk_metadata.range_no):
+        # a redelivered task gets back the chunk ids the first delivery committed instead of duplicates.
+        # the advisory lock serializes two deliveries of the same range running at once
+        async with self.db_client() as session:
+            async with session.begin():
+                await session.execute(select(func.pg_advisory_xact_lock(asset_id, range_no)))
+
+                query = select(DataChunk.chunk_id).where(
+                    DataChunk.chunk_asset_id == asset_id,
+                    DataChunk.chunk_metadata["range_no"].as_integer() == range_no
+                ).order_by(DataChunk.chunk_id)
+                result = await session.execute(query)
+                chunk_ids = result.scalars().all()
+                if chunk_ids or not chunks:
+                    return chunk_ids
+
+                records = [
+                    chunk if isinstance(chunk, dict) else dict(zip(self.CHUNK_COLUMNS, chunk))
+                    for chunk in chunks
+                ]
+                query = insert(DataChunk).returning(DataChunk.chunk_id, sort_by_parameter_order=True)
+                result = await session.execute(query, records)
+                chunk_ids = result.scalars().all()
+
+        return chunk_ids
+
+    async def get_asset_chunk_hashes(self, asset_id: int) -> list:
+        # [(chunk_id, chunk_hash)] of the asset, in chunk order
+        async with self.db_client() as session:
+            query = select(DataChunk.chunk_id, DataChunk.chunk_hash).where(
+                DataChunk.chunk_asset_id == asset_id
+            ).order_by(DataChunk.chunk_order, DataChunk.chunk_id)
+            result = await session.execute(query)
+            records = result.all()
+        return records
+
+    async def update_chunks(self, chunks: list, batch_size: int = 1000) -> int:
+        # bulk UPDATE by primary key: each dict holds chunk_id and the columns to set
+        async with self.db_client() as session:
+            async with session.begin():
+                for i in range(0, len(chunks), batch_size):
+                    await session.execute(update(DataChunk), chunks[i:i+batch_size])
+        return len(chunks)
+
+    async def set_chunks_indexed(self, chunk_ids: list, chunk_indexed: bool = True) -> int:
+        if not chunk_ids:
+            return 0
+
+        async with self.db_client() as session:
+            async with session.begin():
+                query = update(DataChunk).where(DataChunk.chunk_id.in_(chunk_ids)).values(chunk_indexed=chunk_indexed)
+                result = await session.execute(query)
+        return result.rowcount
+
+    async def reset_project_chunks_indexed(self, project_id: int) -> int:
+        # the collection is rebuilt from scratch, every chunk has to be pushed again
+        async with self.db_client() as session:
+            async with session.begin():
+                query = update(DataChunk).where(
+                    DataChunk.chunk_project_id == project_id,
+                    DataChunk.chunk_indexed
+                ).values(chunk_indexed=False)
+                result = await session.execute(query)
+        return result.rowcount
+
+    async def get_chunks_by_ids(self, chunk_ids: list):
+        async with self.db_client() as session:
+            query = select(DataChunk).where(DataChunk.chunk_id.in_(chunk_ids)).order_by(DataChunk.chunk_id)
+            result = await session.execute(query)
+            records = result.scalars().all()
+        return records
+
     async def delete_chunks_by_project_id(self, project_id: ObjectId):
         async with self.db_client() as session:
             query = delete(DataChunk).where(DataChunk.chunk_project_id==project_id)
@@ -48,17 +147,61 @@ class ChunkModel(BaseDataModel):
             await session.commit()
         return result.rowcount
     
+    async def delete_chunks_by_ids(self, chunk_ids: list):
+        if not chunk_ids:
+            return 0
+
+        async with self.db_client() as session:
+            query = delete(DataChunk).where(DataChunk.chunk_id.in_(chunk_ids))
+            result = await session.execute(query)
+            await session.commit()
+        return result.rowcount
+
+    async def delete_chunks_by_asset_id(self, asset_id: int):
+        async with self.db_client() as session:
+            query = delete(DataChunk).where(DataChunk.chunk_asset_id==asset_id)
+            result = await session.execute(query)
+            await session.commit()
+        return result.rowcount
+
+    async def get_asset_chunk_ids(self, asset_id: int):
+        async with self.db_client() as session:
+            query = select(DataChunk.chunk_id).where(DataChunk.chunk_asset_id==asset_id)
+            result = await session.execute(query)
+            chunk_ids = result.scalars().all()
+        return chunk_ids
+    
     async def get_project_chunks(self,project_id: ObjectId ,page_no:int = 1 ,page_size:int = 50):
         async with self.db_client() as session:
             query = select(DataChunk).where(DataChunk.chunk_project_id==project_id).offset((page_no-1)*page_size).limit(page_size)
             result = await session.execute(query)
             records = result.scalars().all()
         return records
-    
-    async def get_total_chunks(self,project_id: ObjectId):
+
+    async def iter_project_chunks(self, project_id: int, batch_size: int = 1000, after_chunk_id: int = 0,
+                                  only_unindexed: bool = False):
+        # keyset scan (chunk_id > after_chunk_id) over a server-side cursor, served by ix_chunk_project_id_chunk_id
+        # (ix_chunk_project_id_chunk_id_unindexed with only_unindexed).
+        # yields lists of at most batch_size chunks ordered by chunk_id, so callers can resume from the last id they saw.
+        async with self.db_client() as session:
+            query = select(DataChunk).where(
+                DataChunk.chunk_project_id == project_id,
+                DataChunk.chunk_id > after_chunk_id
+            )
+            if only_unindexed:
+                query = query.where(~DataChunk.chunk_indexed)
+            query = query.order_by(DataChunk.chunk_id).execution_options(yield_per=batch_size)
+
+            result = await session.stream(query)
+            async for batch in result.scalars().partitions(batch_size):
+                yield batch
+
+    async def get_total_chunks(self,project_id: ObjectId, only_unindexed: bool = False):
         total_count = 0
         async with self.db_client() as session:
             query = select(func.count(DataChunk.chunk_id)).where(DataChunk.chunk_project_id==project_id)
+            if only_unindexed:
+                query = query.where(~DataChunk.chunk_indexed)
             result = await session.execute(query)
             total_count = result.scalar()
         return total_count
@@ -0,0 +1,56 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemes import CachedEmbedding
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
+
+class EmbeddingCacheModel(BaseDataModel):
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.db_client = db_client
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        instance = cls(db_client)
+        return instance
+
+    async def get_embeddings(self, provider: str, model_id: str, document_type: str, text_hashes: list):
+        if not text_hashes:
+            return {}
+
+        async with self.db_client() as session:
+            query = select(CachedEmbedding.embedding_text_hash, CachedEmbedding.embedding_vector).where(
+                CachedEmbedding.embedding_provider == provider,
+                CachedEmbedding.embedding_model_id == model_id,
+                CachedEmbedding.embedding_document_type == document_type,
+                CachedEmbedding.embedding_text_hash.in_(text_hashes)
+            )
+            result = await session.execute(query)
+            records = result.all()
+
+        return {
+            record.embedding_text_hash: record.embedding_vector
+            for record in records
+        }
+
+    async def insert_embeddings(self, provider: str, model_id: str, document_type: str, embeddings: dict):
+        if not embeddings:
+            return 0
+
+        records = [
+            {
+                "embedding_provider": provider,
+                "embedding_model_id": model_id,
+                "embedding_document_type": document_type,
+                "embedding_text_hash": text_hash,
+                "embedding_vector": vector,
+            }
+            for text_hash, vector in embeddings.items()
+        ]
+
+        async with self.db_client() as session:
+            async with session.begin():
+                query = insert(CachedEmbedding).on_conflict_do_nothing()
+                await session.execute(query, records)
+
+        return len(records)
@@ -0,0 +1,104 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemes import Job
+from .enums.JobEnums import JobStatusEnum
+from sqlalchemy.future import select
+from sqlalchemy import update, func
+from datetime import timedelta
+
+class JobModel(BaseDataModel):
+
+    ACTIVE_STATUSES = [JobStatusEnum.PENDING.value, JobStatusEnum.RUNNING.value]
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.db_client = db_client
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        instance = cls(db_client)
+        return instance
+
+    async def create_job(self, job: Job):
+
+        async with self.db_client() as session:
+            async with session.begin():
+                session.add(job)
+            await session.refresh(job)
+        return job
+
+    async def get_job(self, job_id: int):
+
+        async with self.db_client() as session:
+            result = await session.execute(select(Job).where(Job.job_id == job_id))
+            job = result.scalar_one_or_none()
+        return job
+
+    async def update_job(self, job_id: int, only_active: bool = False, **fields):
+        # returns the updated job, or None when it does not exist (or is not active, with only_active)
+        async with self.db_client() as session:
+            async with session.begin():
+                query = update(Job).where(Job.job_id == job_id)
+                if only_active:
+                    query = query.where(Job.job_status.in_(self.ACTIVE_STATUSES))
+                result = await session.execute(query.values(**fields).returning(Job))
+                job = result.scalar_one_or_none()
+        return job
+
+    async def start_job(self, job_id: int):
+        return await self.update_job(job_id=job_id,
+                                     only_active=True,
+                                     job_status=JobStatusEnum.RUNNING.value,
+                                     job_run_start_count=Job.job_processed_count,
+                                     started_at=func.now(),
+                                     heartbeat_at=func.now())
+
+    async def update_job_progress(self, job_id: int, processed_count: int,
+                                  total_count: int = None, checkpoint: dict = None):
+        # returns the job status, so a runner notices a cancellation made by another process
+        fields = {"job_processed_count": processed_count, "heartbeat_at": func.now()}
+        if total_count is not None:
+            fields["job_total_count"] = total_count
+        if checkpoint is not None:
+            fields["job_checkpoint"] = checkpoint
+
+        async with self.db_client() as session:
+            async with session.begin():
+                query = update(Job).where(Job.job_id == job_id).values(**fields).returning(Job.job_status)
+                result = await session.execute(query)
+                job_status = result.scalar_one_or_none()
+        return job_status
+
+    async def finish_job(self, job_id: int, job_status: str, job_result: dict = None, job_error: str = None):
+        # only active jobs can be finished, a job cancelled meanwhile stays cancelled
+        return await self.update_job(job_id=job_id,
+                                     only_active=True,
+                                     job_status=job_status,
+                                     job_result=job_result,
+                                     job_error=job_error,
+                                     finished_at=func.now())
+
+    async def touch_jobs(self, job_ids: list):
+        if not job_ids:
+            return 0
+
+        async with self.db_client() as session:
+            async with session.begin():
+                query = update(Job).where(Job.job_id.in_(job_ids)).values(heartbeat_at=func.now())
+                result = await session.execute(query)
+        return result.rowcount
+
+    async def claim_stale_jobs(self, stale_seconds: int, limit: int = 10):
+        # takes over active jobs whose runner stopped sending heartbeats (crash, restart, deploy).
+        # SKIP LOCKED keeps two processes from claiming the same job
+        async with self.db_client() as session:
+            async with session.begin():
+                stale_jobs = select(Job.job_id).where(
+                    Job.job_status.in_(self.ACTIVE_STATUSES),
+                    Job.heartbeat_at < func.now() - timedelta(seconds=stale_seconds)
+                ).order_by(Job.job_id).limit(limit).with_for_update(skip_locked=True)
+
+                query = update(Job).where(Job.job_id.in_(stale_jobs.scalar_subquery())) \
+                                   .values(heartbeat_at=func.now()).returning(Job)
+                result = await session.execute(query)
+                jobs = result.scalars().all()
+        return jobs
@@ -1 +1 @@
-from models.db_schemes.minirag.schemes import Project,Asset,DataChunk,RetreivedDocument
\ No newline at end of file
+from models.db_schemes.minirag.schemes import Project,Asset,DataChunk,RetreivedDocument,CachedEmbedding,Job
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""make asset content hash index unique
+
+Revision ID: a9f2c6d84e17
+Revises: 7d3c9e1b4a26
+Create Date: 2026-02-21 09:42:18.207311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9f2c6d84e17'
+down_revision: Union[str, Sequence[str], None] = '7d3c9e1b4a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # concurrent uploads of the same file may have stored it twice, the oldest asset keeps the hash
+    op.execute(sa.text("""
+        UPDATE assets SET asset_config = asset_config - 'content_hash'
+        WHERE asset_id IN (
+            SELECT asset_id FROM (
+                SELECT asset_id, row_number() OVER (
+                    PARTITION BY asset_project_id, asset_config ->> 'content_hash' ORDER BY asset_id
+                ) AS duplicate_rank
+                FROM assets
+                WHERE asset_config ->> 'content_hash' IS NOT NULL
+            ) AS hashed_assets
+            WHERE duplicate_rank > 1
+        )
+    """))
+    op.drop_index('ix_asset_project_id_content_hash', table_name='assets')
+    op.create_index('ix_asset_project_id_content_hash', 'assets',
+                    ['asset_project_id', sa.text("(asset_config ->> 'content_hash')")], unique=True,
+                    postgresql_where=sa.text("(asset_config ->> 'content_hash') IS NOT NULL"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_asset_project_id_content_hash', table_name='assets')
+    op.create_index('ix_asset_project_id_content_hash', 'assets',
+                    ['asset_project_id', sa.text("(asset_config ->> 'content_hash')")], unique=False)
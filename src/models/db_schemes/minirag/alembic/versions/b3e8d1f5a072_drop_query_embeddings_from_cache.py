@@ -0,0 +1,30 @@
+"""drop query embeddings from cache
+
+Revision ID: b3e8d1f5a072
+Revises: a9f2c6d84e17
+Create Date: 2026-02-24 15:06:41.583920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8d1f5a072'
+down_revision: Union[str, Sequence[str], None] = 'a9f2c6d84e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # query embeddings are no longer stored here, one row was kept per distinct user query
+    op.execute(sa.text("DELETE FROM embeddings_cache WHERE embedding_document_type = 'query'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # the deleted rows are only a cache
+    pass
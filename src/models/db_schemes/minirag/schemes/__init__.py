@@ -1,4 +1,6 @@
 from .minirag_base import SQLAlchemyBase
 from .project import Project
 from .asset import Asset
-from .datachunk import DataChunk,RetreivedDocument
\ No newline at end of file
+from .datachunk import DataChunk,RetreivedDocument
+from .cached_embedding import CachedEmbedding
+from .job import Job
\ No newline at end of file
@@ -23,5 +23,8 @@ class Asset(SQLAlchemyBase):
     
     __table_args__ = (
         Index("ix_asset_project_id",asset_project_id),
-        Index("ix_asset_type",asset_type)
+        Index("ix_asset_type",asset_type),
+        # one asset per content in a project, uploads rely on it to deduplicate concurrent requests
+        Index("ix_asset_project_id_content_hash",asset_project_id,asset_config["content_hash"].astext,
+              unique=True,postgresql_where=asset_config["content_hash"].astext.isnot(None))
     )
\ No newline at end of file
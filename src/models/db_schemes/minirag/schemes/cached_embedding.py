@@ -0,0 +1,17 @@
+from .minirag_base import SQLAlchemyBase
+from sqlalchemy import Column, DateTime, String, func
+from sqlalchemy.dialects.postgresql import ARRAY, REAL
+
+class CachedEmbedding(SQLAlchemyBase):
+
+    __tablename__ = "embeddings_cache"
+
+    # content-addressed: the same text embedded by the same model is only paid for once.
+    embedding_provider = Column(String, primary_key=True)
+    embedding_model_id = Column(String, primary_key=True)
+    embedding_document_type = Column(String, primary_key=True)
+    embedding_text_hash = Column(String(64), primary_key=True)
+
+    embedding_vector = Column(ARRAY(REAL), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,5 +1,5 @@
 from .minirag_base import SQLAlchemyBase
-from sqlalchemy import Column, Integer, DateTime, func, String, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, func, String, ForeignKey, Boolean, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy import Index
@@ -16,6 +16,10 @@ class DataChunk(SQLAlchemyBase):
     chunk_text = Column(String, nullable=False)
     chunk_metadata = Column(JSONB, nullable=True)
     chunk_order = Column(Integer, nullable=False)
+    # sha256 of chunk_text: a re-processed asset keeps the chunks (and vectors) whose text did not change
+    chunk_hash = Column(String(64), nullable=True)
+    # set once the chunk's vector is in the project collection
+    chunk_indexed = Column(Boolean, nullable=False, default=False, server_default=text("false"))
 
     chunk_project_id = Column(Integer, ForeignKey("projects.project_id"), nullable=False)
     chunk_asset_id = Column(Integer, ForeignKey("assets.asset_id"), nullable=False)
@@ -29,6 +33,9 @@ class DataChunk(SQLAlchemyBase):
     __table_args__ = (
         Index('ix_chunk_project_id', chunk_project_id),
         Index('ix_chunk_asset_id', chunk_asset_id),
+        Index('ix_chunk_project_id_chunk_id', chunk_project_id, chunk_id),
+        Index('ix_chunk_project_id_chunk_id_unindexed', chunk_project_id, chunk_id,
+              postgresql_where=text("NOT chunk_indexed")),
     )
 
 class RetreivedDocument(BaseModel):
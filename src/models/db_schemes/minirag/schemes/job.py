@@ -0,0 +1,34 @@
+from .minirag_base import SQLAlchemyBase
+from sqlalchemy import Column,Integer,DateTime,String,func,ForeignKey,Index
+from sqlalchemy.dialects.postgresql import UUID,JSONB
+import uuid
+
+class Job(SQLAlchemyBase):
+
+    __tablename__ = "jobs"
+
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    job_uuid = Column(UUID(as_uuid=True),default=uuid.uuid4,unique=True,nullable=False)
+
+    job_type = Column(String,nullable=False)
+    job_status = Column(String,nullable=False)
+    job_params = Column(JSONB,nullable=True)
+    job_checkpoint = Column(JSONB,nullable=True) # where a resumed run picks up, owned by the job handler
+    job_result = Column(JSONB,nullable=True)
+    job_error = Column(String,nullable=True)
+
+    job_processed_count = Column(Integer,nullable=False,default=0)
+    job_total_count = Column(Integer,nullable=True)
+    job_run_start_count = Column(Integer,nullable=False,default=0) # processed count when the current run started
+
+    job_project_id = Column(Integer,ForeignKey("projects.project_id"),nullable=False)
+
+    created_at = Column(DateTime(timezone=True),server_default=func.now(),nullable=False)
+    started_at = Column(DateTime(timezone=True),nullable=True)
+    finished_at = Column(DateTime(timezone=True),nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True),server_default=func.now(),nullable=False) # a stale heartbeat means nobody runs the job
+
+    __table_args__ = (
+        Index("ix_job_project_id",job_project_id),
+        Index("ix_job_status_heartbeat_at",job_status,heartbeat_at),
+    )
@@ -7,6 +7,7 @@ class ResponseSignal(Enum):
     FILE_SIZE_EXCEEDED = "file_size_exceeded"
     FILE_UPLOAD_SUCCESS = "file_upload_success"
     FILE_UPLOAD_FAILED = "file_upload_failed"
+    FILE_ALREADY_EXISTS = "file_already_exists"
     PROCESSING_SUCCESS = "processing_success"
     PROCESSING_FAILED = "processing_failed"
     NO_FILES_ERROR = "not_found_files"
@@ -17,6 +18,13 @@ class ResponseSignal(Enum):
     VECTORDB_COLLECTION_RETRIEVD = "collection retrived successfully"
     VECTORDB_SEARCH_ERROR = "vectordb search error"
     VECTORDB_SEARCH_SUCCESS = "vectordb search success"
+    VECTORDB_INDEX_STATUS_RETRIEVED = "vector index status retrieved successfully"
+    VECTORDB_INDEX_BUILD_STARTED = "vector index build started"
+    JOB_SUBMITTED = "job submitted"
+    JOB_RETRIEVED = "job retrieved successfully"
+    JOB_NOT_FOUND_ERROR = "job not found"
+    JOB_CANCELLED = "job cancelled"
+    JOB_NOT_CANCELLABLE_ERROR = "job already finished"
     RAG_ANSWER_ERROR = "LLM Can't Generate Answer"
     RAG_ANSWER_SUCCESS = "LLM Generation Success"
     LIMIT_EXCEEDED = "Please try again Latter"
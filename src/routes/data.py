@@ -1,18 +1,15 @@
 from fastapi import FastAPI, APIRouter, Depends, UploadFile, File, status, Request
 from fastapi.responses import JSONResponse
-import os
 from helpers.config import get_settings, Settings
-from controllers import DataController, ProjectController, ProcessController
-import aiofiles
+from controllers import DataController, ProjectController
 from models import ResponseSignal
 import logging
 from .schemes.data import ProcessRequest
 from models.ProjectModel import ProjectModel
-from models.ChunkModel import ChunkModel
 from models.AssetModel import AssetModel
-from models.db_schemes import DataChunk, Asset
+from models.db_schemes import Asset
 from models.enums.AssetTypeEnum import AssetTypeEnum
-from controllers import NLPController
+from models.enums.JobEnums import JobTypeEnum
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -54,34 +51,61 @@ async def upload_data(request: Request, project_id: int, file: UploadFile = File
         project_id=project_id
     )
 
-    try:
-        async with aiofiles.open(file_path, "wb") as f:
-            while chunk := await file.read(app_settings.FILE_DEFAULT_CHUNK_SIZE):
-                await f.write(chunk)
-    except Exception as e:
-
-        logger.error(f"Error while uploading file: {e}")
+    # the size limit applies to the bytes received, and the content is hashed on the way
+    is_written, result_signal, content_hash, file_size = await data_controller.write_uploaded_file(
+        file=file,
+        file_path=file_path
+    )
 
+    if not is_written:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={
-                "signal": ResponseSignal.FILE_UPLOAD_FAILED.value
+                "signal": result_signal
             }
         )
 
-    # store the assets into the database
     asset_model = await AssetModel.create_instance(
         db_client=request.app.db_client
     )
 
+    # the same content uploaded again returns the existing asset, it is not stored (nor processed) twice
+    asset_record = await asset_model.get_asset_by_content_hash(
+        asset_project_id=project.project_id,
+        content_hash=content_hash
+    )
+
+    if asset_record is not None:
+        data_controller.discard_uploaded_file(file_path=file_path)
+        return JSONResponse(
+            content={
+                "signal": ResponseSignal.FILE_ALREADY_EXISTS.value,
+                "file_id": str(asset_record.asset_id),
+            }
+        )
+
+    # store the assets into the database
     asset_resource = Asset(
         asset_project_id=project.project_id,
         asset_type=AssetTypeEnum.FILE.value,
         asset_name=file_id,
-        asset_size=os.path.getsize(file_path)
+        asset_size=file_size,
+        asset_config={"content_hash": content_hash}
     )
 
-    asset_record = await asset_model.create_asset(asset=asset_resource)
+    # the check above is only a shortcut, a concurrent upload of the same content may still get in first
+    asset_record, is_created = await asset_model.create_asset_unless_duplicate(asset=asset_resource)
+
+    if not is_created:
+        data_controller.discard_uploaded_file(file_path=file_path)
+        return JSONResponse(
+            content={
+                "signal": ResponseSignal.FILE_ALREADY_EXISTS.value,
+                "file_id": str(asset_record.asset_id),
+            }
+        )
+
+    data_controller.commit_uploaded_file(file_path=file_path)
 
     return JSONResponse(
             content={
@@ -109,13 +133,6 @@ async def process_endpoint(request: Request, project_id: int, process_request: P
             db_client=request.app.db_client
         )
     
-    nlp_controller = NLPController(
-        vectordb_client=request.app.vectordb_client,
-        embedding_client=request.app.embedding_client,
-        generation_client=request.app.generation_client,
-        template_parser=request.app.template_parser
-    )
-
     project_files_ids = {}
     if process_request.file_id:
         asset_record = await asset_model.get_asset_record(
@@ -144,7 +161,7 @@ async def process_endpoint(request: Request, project_id: int, process_request: P
         )
 
         project_files_ids = {
-            record.asset_project_id: record.asset_name
+            record.asset_id: record.asset_name
             for record in project_files
         }
 
@@ -156,66 +173,22 @@ async def process_endpoint(request: Request, project_id: int, process_request: P
             }
         )
     
-    process_controller = ProcessController(project_id=project_id)
-
-    no_records = 0
-    no_files = 0
-
-    chunk_model = await ChunkModel.create_instance(
-                        db_client=request.app.db_client
-                    )
-
-    if do_reset == 1:
-        
-        collection_name = nlp_controller.create_collection_nmae(project_id=project_id)
-        
-        _ = await nlp_controller.vectordb_client.delete_collection(collection_name=collection_name) # delete the vecto
-        
-        _ = await chunk_model.delete_chunks_by_project_id( # delete the row contains this asset info
-            project_id=project.project_id 
-        )
-
-    for asset_id, file_id in project_files_ids.items():
-
-        file_content = process_controller.get_file_content(file_id=file_id)
-
-        if file_content is None:
-            logger.error(f"Error while processing file: {file_id}")
-            continue
-
-        file_chunks = process_controller.process_file_content(
-            file_content=file_content,
-            file_id=file_id,
-            chunk_size=chunk_size,
-            overlap_size=overlap_size
-        )
-
-        if file_chunks is None or len(file_chunks) == 0:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={
-                    "signal": ResponseSignal.PROCESSING_FAILED.value
-                }
-            )
-
-        file_chunks_records = [
-            DataChunk(
-                chunk_text=chunk.page_content,
-                chunk_metadata=chunk.metadata,
-                chunk_order=i+1,
-                chunk_project_id=project.project_id,
-                chunk_asset_id=asset_id
-            )
-            for i, chunk in enumerate(file_chunks)
-        ]
-
-        no_records += await chunk_model.insert_many_chunks(chunks=file_chunks_records)
-        no_files += 1
+    # parsing, chunking and storing run as a background job, its progress is served by the jobs routes
+    job = await request.app.job_manager.submit(
+        job_type=JobTypeEnum.PROCESS.value,
+        project_id=project.project_id,
+        params={
+            "assets": [[asset_id, file_id] for asset_id, file_id in project_files_ids.items()],
+            "chunk_size": chunk_size,
+            "overlap_size": overlap_size,
+            "do_reset": do_reset,
+        }
+    )
 
     return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
         content={
-            "signal": ResponseSignal.PROCESSING_SUCCESS.value,
-            "inserted_chunks": no_records,
-            "processed_files": no_files
+            "signal": ResponseSignal.JOB_SUBMITTED.value,
+            "job_id": job.job_id
         }
-    )
\ No newline at end of file
+    )
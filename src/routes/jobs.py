@@ -0,0 +1,58 @@
+from fastapi import APIRouter, status, Request
+from fastapi.responses import JSONResponse
+import logging
+from models import ResponseSignal
+
+logger = logging.getLogger('uvicorn.error')
+
+jobs_router = APIRouter(
+    prefix="/api/v1/jobs",
+    tags=["api_v1", "jobs"],
+)
+
+@jobs_router.get("/{job_id}")
+async def get_job(request: Request, job_id: int):
+
+    job_status = await request.app.job_manager.get_job_status(job_id=job_id)
+
+    if job_status is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.JOB_NOT_FOUND_ERROR.value
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.JOB_RETRIEVED.value,
+            "job": job_status
+        }
+    )
+
+@jobs_router.post("/{job_id}/cancel")
+async def cancel_job(request: Request, job_id: int):
+
+    is_cancelled = await request.app.job_manager.cancel(job_id=job_id)
+
+    if is_cancelled is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.JOB_NOT_FOUND_ERROR.value
+            }
+        )
+
+    if not is_cancelled:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.JOB_NOT_CANCELLABLE_ERROR.value
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.JOB_CANCELLED.value
+        }
+    )
@@ -1,15 +1,19 @@
-from fastapi import FastAPI, APIRouter, status, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, status, Request, Depends, BackgroundTasks
+from fastapi.responses import JSONResponse, StreamingResponse
+from utils.metrics import RAG_ANSWER_TIME_TO_FIRST_TOKEN
 import logging 
-from routes.schemes.nlp import PushRequest,SearchRequest
+import json
+import time
+from routes.schemes.nlp import PushRequest,SearchRequest,VectorIndexRequest
 from models.ProjectModel import ProjectModel
 from models.ChunkModel import ChunkModel
 from controllers import NLPController
 from models import ResponseSignal
-from tqdm.auto import tqdm
+from models.enums.JobEnums import JobTypeEnum
+from helpers.config import get_settings, Settings
 
 
-logger = logging.error("uvicorn.error")
+logger = logging.getLogger("uvicorn.error")
 
 nlp_router = APIRouter(prefix="/api/v1/nlp",
                        tags=["nlp","ap1_v1"])
@@ -21,10 +25,6 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
         request.app.db_client
     )
     
-    chunk_model = await ChunkModel.create_instance(
-        request.app.db_client
-    )
-    
     project = await project_model.get_project_or_create_one(project_id=project_id)
     
     if not project:
@@ -35,6 +35,34 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
+    # embedding and vector db loading run as a background job, its progress is served by the jobs routes
+    job = await request.app.job_manager.submit(
+        job_type=JobTypeEnum.INDEX_PUSH.value,
+        project_id=project.project_id,
+        params={
+            "do_reset": push_request.do_reset
+        }
+    )
+        
+    return JSONResponse(
+        content={
+            "signal":ResponseSignal.JOB_SUBMITTED.value,
+            "job_id":job.job_id
+            },
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+@nlp_router.get("/index/info/{project_id}")
+async def get_project_index_info(request:Request,project_id:int):
+    
+    project_model = await ProjectModel.create_instance(
+        request.app.db_client
+    )
+    
+    
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+    
     nlp_controller = NLPController(
         vectordb_client=request.app.vectordb_client,
         embedding_client=request.app.embedding_client,
@@ -42,65 +70,46 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
         template_parser=request.app.template_parser
     )
     
-    has_records = True
-    page_no = 1 
-    inserted_items_count = 0
-    idx = 0
+    collection_info = await nlp_controller.get_vector_db_collection_info(project=project)
     
-    collection_name = nlp_controller.create_collection_nmae(project_id=project_id)
-    _ = await request.app.vectordb_client.create_collection(
-        collection_name=collection_name,
-        collection_size = request.app.embedding_client.embedding_size,
-        do_reset = push_request.do_reset
+    return JSONResponse(
+            content={
+                "signal":ResponseSignal.VECTORDB_COLLECTION_RETRIEVD.value,
+                "Inserted Chunks Count": collection_info
+                })
+    
+@nlp_router.get("/index/vector-index/{project_id}")
+async def get_project_vector_index_status(request:Request,project_id:int):
+    
+    project_model = await ProjectModel.create_instance(
+        request.app.db_client
     )
     
-    chunks_count = await chunk_model.get_total_chunks(project_id=project_id)
-    progress_bar = tqdm(total=chunks_count,desc="vector indexing",position=0)
+    project = await project_model.get_project_or_create_one(project_id=project_id)
     
+    nlp_controller = NLPController(
+        vectordb_client=request.app.vectordb_client,
+        embedding_client=request.app.embedding_client,
+        generation_client=request.app.generation_client,
+        template_parser=request.app.template_parser
+    )
     
-    while has_records:
-        page_chunks = await chunk_model.get_project_chunks(project_id=project.project_id,page_no=page_no,page_size=10)
-        if len(page_chunks):
-            page_no+=1
-        if len(page_chunks) == 0 or not page_chunks:
-            has_records = False
-            break
+    index_status = await nlp_controller.get_vector_db_index_status(project=project)
     
-        chunk_ids = [c.chunk_id for c in page_chunks]
-        idx+= len(page_chunks)
-        
-        is_inserted = await nlp_controller.insert_into_vector_db(
-            project=project,
-            chunks=page_chunks,
-            chunk_ids=chunk_ids
-        )
-        
-        if not is_inserted:
-            return JSONResponse(
-                content={
-                    "signal":ResponseSignal.CHUNKS_NOT_INSERTED_ERROR.value
-                    },
-                status_code=status.HTTP_400_BAD_REQUEST
-            )
-        progress_bar.update(len(page_chunks))
-        inserted_items_count+=len(page_chunks)
-        
-    if is_inserted:
-        return JSONResponse(
+    return JSONResponse(
             content={
-                "signal":ResponseSignal.CHUNKS_INSERTED_SUCCESS.value,
-                "Inserted Chunks Count":inserted_items_count
+                "signal":ResponseSignal.VECTORDB_INDEX_STATUS_RETRIEVED.value,
+                "Index Status": index_status
                 })
 
-
-@nlp_router.get("/index/info/{project_id}")
-async def get_project_index_info(request:Request,project_id:int):
+@nlp_router.post("/index/vector-index/{project_id}")
+async def build_project_vector_index(request:Request,project_id:int,index_request:VectorIndexRequest,
+                                     background_tasks: BackgroundTasks):
     
     project_model = await ProjectModel.create_instance(
         request.app.db_client
     )
     
-    
     project = await project_model.get_project_or_create_one(project_id=project_id)
     
     nlp_controller = NLPController(
@@ -110,12 +119,15 @@ async def get_project_index_info(request:Request,project_id:int):
         template_parser=request.app.template_parser
     )
     
-    collection_info = await nlp_controller.get_vector_db_collection_info(project=project)
+    background_tasks.add_task(nlp_controller.build_vector_db_index,
+                              project=project,
+                              index_type=index_request.index_type,
+                              do_reset=index_request.do_reset == 1)
     
     return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
             content={
-                "signal":ResponseSignal.VECTORDB_COLLECTION_RETRIEVD.value,
-                "Inserted Chunks Count": collection_info
+                "signal":ResponseSignal.VECTORDB_INDEX_BUILD_STARTED.value
                 })
     
 @nlp_router.post("/index/search/{project_id}")
@@ -157,9 +169,11 @@ async def get_project_index_info(request:Request,project_id:int,search_request:S
 @nlp_router.post("/index/answer/{project_id}")
 async def answer_rag(request:Request,project_id:int,search_request:SearchRequest):
     
-    if not request.app.limiter.is_allowed(request.client.host):
+    if not await request.app.limiter.is_allowed(request.client.host):
         return JSONResponse(
-            content=ResponseSignal.LIMIT_EXCEEDED,
+            content={
+                "signal":ResponseSignal.LIMIT_EXCEEDED.value
+            },
             status_code=status.HTTP_429_TOO_MANY_REQUESTS
         )
     
@@ -173,13 +187,15 @@ async def answer_rag(request:Request,project_id:int,search_request:SearchRequest
         vectordb_client=request.app.vectordb_client,
         embedding_client=request.app.embedding_client,
         generation_client=request.app.generation_client,
-        template_parser = request.app.template_parser
+        template_parser = request.app.template_parser,
+        answer_cache=request.app.answer_cache,
+        answer_flights=request.app.answer_flights
     )
     
-    answer,full_prompt,chat_histor = await nlp_controller.answer_rag_question(
+    result = await nlp_controller.answer_rag_question(
         project=project,query=search_request.text,limit=search_request.limit
     )
-    
+    answer = result[0] if result else None
     
     if not answer:
         return JSONResponse(
@@ -194,4 +210,76 @@ async def answer_rag(request:Request,project_id:int,search_request:SearchRequest
             "signal":ResponseSignal.RAG_ANSWER_SUCCESS.value,
             "Answer":answer
         }
-    )
\ No newline at end of file
+    )
+
+def format_sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@nlp_router.post("/index/answer/stream/{project_id}")
+async def answer_rag_stream(request:Request,project_id:int,search_request:SearchRequest):
+    
+    started_at = time.perf_counter()
+    
+    if not await request.app.limiter.is_allowed(request.client.host):
+        return JSONResponse(
+            content={
+                "signal":ResponseSignal.LIMIT_EXCEEDED.value
+            },
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+    
+    project_model = await ProjectModel.create_instance(
+        request.app.db_client
+    )
+    
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+    
+    nlp_controller = NLPController(
+        vectordb_client=request.app.vectordb_client,
+        embedding_client=request.app.embedding_client,
+        generation_client=request.app.generation_client,
+        template_parser = request.app.template_parser,
+        answer_cache=request.app.answer_cache
+    )
+    
+    events = nlp_controller.astream_rag_answer(
+        project=project,query=search_request.text,limit=search_request.limit
+    )
+    
+    # retrieval runs before the response starts, so a question without documents still gets a plain error
+    first_event = await anext(events, None)
+    if first_event is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal":ResponseSignal.RAG_ANSWER_ERROR.value
+            }
+        )
+    
+    async def stream_events():
+        # documents, then one event per generated token, then done (or error when nothing was generated)
+        yield format_sse_event(*first_event)
+        
+        has_answer = False
+        try:
+            async for event, data in events:
+                if event == "token" and not has_answer:
+                    has_answer = True
+                    RAG_ANSWER_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started_at)
+                yield format_sse_event(event, data)
+        except Exception as e:
+            # the response has started, the failure can only be reported in the stream
+            logger.error(f"Error while streaming the answer: {e}")
+            has_answer = False
+        
+        if has_answer:
+            yield format_sse_event("done", {"signal": ResponseSignal.RAG_ANSWER_SUCCESS.value})
+        else:
+            yield format_sse_event("error", {"signal": ResponseSignal.RAG_ANSWER_ERROR.value})
+    
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        # keeps nginx from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
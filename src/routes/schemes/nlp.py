@@ -6,4 +6,8 @@ class PushRequest(BaseModel):
 
 class SearchRequest(BaseModel):
     text : str 
-    limit : Optional[int] = 5
\ No newline at end of file
+    limit : Optional[int] = 5
+
+class VectorIndexRequest(BaseModel):
+    index_type : Optional[str] = None
+    do_reset : Optional[int] = 0
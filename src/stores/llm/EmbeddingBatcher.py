@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+
+class EmbeddingBatcher:
+    """
+    Splits embedding inputs into sub-batches that respect a provider's per-request item and token
+    limits, sends them, retries only the sub-batches that failed and reassembles vectors in input order.
+    Inputs over the provider's per-input token limit fail the call up front, without retries.
+    Tokens are counted with count_tokens (the provider's tokenizer) when given, estimated otherwise.
+    """
+
+    def __init__(self, max_items: int, max_tokens: int = None, max_input_tokens: int = None,
+                       max_retries: int = 3, retry_backoff: float = 1.0,
+                       max_concurrency: int = 4, count_tokens = None):
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.max_input_tokens = max_input_tokens
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_concurrency = max_concurrency
+        self.count_tokens = count_tokens or self.estimate_tokens
+
+        self.logger = logging.getLogger(__name__)
+
+    def estimate_tokens(self, text: str) -> int:
+        # ~4 characters per token for latin text with the BPE/sentencepiece tokenizers these providers use,
+        # while other scripts (CJK, arabic, ...) take up to a token per character
+        non_ascii = sum(1 for c in text if ord(c) > 127)
+        return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+    def get_oversized_inputs(self, token_counts: list) -> list:
+        if self.max_input_tokens is None:
+            return []
+        return [(i, tokens) for i, tokens in enumerate(token_counts) if tokens > self.max_input_tokens]
+
+    def check_inputs(self, texts: list):
+        # token counts of the inputs, None when one of them can never be embedded
+        token_counts = [self.count_tokens(text) for text in texts]
+
+        oversized = self.get_oversized_inputs(token_counts)
+        if oversized:
+            i, tokens = oversized[0]
+            self.logger.error(f"{len(oversized)} embedding inputs exceed the limit of {self.max_input_tokens} "
+                              f"tokens per input (input {i} has {tokens}), not sent")
+            return None
+
+        return token_counts
+
+    def split(self, texts: list, token_counts: list = None) -> list:
+        if token_counts is None:
+            token_counts = [self.count_tokens(text) for text in texts]
+
+        batches = []
+        start = 0
+        batch_tokens = 0
+        for i, text_tokens in enumerate(token_counts):
+            is_full = (i - start) >= self.max_items or (
+                self.max_tokens is not None and batch_tokens + text_tokens > self.max_tokens
+            )
+            if is_full and i > start:
+                batches.append((start, i))
+                start = i
+                batch_tokens = 0
+            batch_tokens += text_tokens
+
+        if start < len(texts):
+            batches.append((start, len(texts)))
+
+        return batches
+
+    def is_valid_result(self, vectors, expected_size: int) -> bool:
+        return vectors is not None and not isinstance(vectors, BaseException) and len(vectors) == expected_size
+
+    def reassemble(self, results: dict, batches: list) -> list:
+        vectors = []
+        for i in range(len(batches)):
+            vectors.extend(results[i])
+        return vectors
+
+    def embed(self, texts: list, embed_batch) -> list:
+
+        token_counts = self.check_inputs(texts)
+        if token_counts is None:
+            return None
+
+        batches = self.split(texts, token_counts=token_counts)
+        results = {}
+        pending = list(range(len(batches)))
+
+        for attempt in range(self.max_retries + 1):
+            failed = []
+            for i in pending:
+                start, end = batches[i]
+                try:
+                    vectors = embed_batch(texts[start:end])
+                except Exception as e:
+                    self.logger.error(f"Error while embedding batch [{start}:{end}]: {e}")
+                    vectors = None
+
+                if self.is_valid_result(vectors, end - start):
+                    results[i] = vectors
+                else:
+                    failed.append(i)
+
+            pending = failed
+            if not pending:
+                return self.reassemble(results=results, batches=batches)
+
+            if attempt < self.max_retries:
+                time.sleep(self.retry_backoff * (2 ** attempt))
+
+        self.logger.error(f"Embedding failed for {len(pending)} of {len(batches)} batches")
+        return None
+
+    async def aembed(self, texts: list, embed_batch) -> list:
+
+        token_counts = self.check_inputs(texts)
+        if token_counts is None:
+            return None
+
+        batches = self.split(texts, token_counts=token_counts)
+        results = {}
+        pending = list(range(len(batches)))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(i):
+            start, end = batches[i]
+            async with semaphore:
+                return await embed_batch(texts[start:end])
+
+        for attempt in range(self.max_retries + 1):
+            outcomes = await asyncio.gather(*[run(i) for i in pending], return_exceptions=True)
+
+            failed = []
+            for i, vectors in zip(pending, outcomes):
+                start, end = batches[i]
+                if self.is_valid_result(vectors, end - start):
+                    results[i] = vectors
+                else:
+                    if isinstance(vectors, BaseException):
+                        self.logger.error(f"Error while embedding batch [{start}:{end}]: {vectors}")
+                    failed.append(i)
+
+            pending = failed
+            if not pending:
+                return self.reassemble(results=results, batches=batches)
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+        self.logger.error(f"Embedding failed for {len(pending)} of {len(batches)} batches")
+        return None
@@ -0,0 +1,117 @@
+from models.EmbeddingCacheModel import EmbeddingCacheModel
+from .LLMEnums import DocumentTypeEnum
+from utils.cache import LRUCache
+from utils.metrics import EMBEDDING_CACHE_HITS, EMBEDDING_CACHE_MISSES
+import numpy as np
+import hashlib
+import logging
+
+class EmbeddingCache:
+    """
+    Embedding client wrapper keyed by (provider, model id, document type, sha256(text)).
+    Looks up an in-process LRU, then the embeddings_cache table, and only sends misses to the provider.
+    The LRU holds packed float32 vectors (4 bytes per dimension instead of a list of Python floats).
+    Query embeddings skip the table, one row per distinct user query would never stop growing;
+    QueryEmbeddingCache keeps them with a TTL.
+    """
+
+    def __init__(self, embedding_client, provider: str, db_client=None, max_size: int = 10000):
+        self.embedding_client = embedding_client
+        self.provider = provider
+        self.memory_cache = LRUCache(max_size=max_size)
+        self.embedding_cache_model = EmbeddingCacheModel(db_client=db_client) if db_client else None
+
+        self.logger = logging.getLogger("uvicorn")
+
+    def __getattr__(self, name):
+        if name == "embedding_client":
+            raise AttributeError(name)
+        return getattr(self.embedding_client, name)
+
+    def get_text_hash(self, text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_cache_key(self, document_type: str, text_hash: str) -> tuple:
+        return (self.provider, self.embedding_client.embedding_model_id, str(document_type), text_hash)
+
+    def lookup_memory(self, texts: list, document_type: str):
+        # returns the vectors found in memory and {text_hash: text} for the misses
+        text_hashes = [self.get_text_hash(t) for t in texts]
+        vectors = {}
+        missing = {}
+        for text, text_hash in zip(texts, text_hashes):
+            vector = self.memory_cache.get(self.get_cache_key(document_type, text_hash))
+            if vector is not None:
+                vectors[text_hash] = vector.tolist()
+            else:
+                missing[text_hash] = text
+
+        EMBEDDING_CACHE_HITS.labels(tier="memory").inc(len(vectors))
+        return text_hashes, vectors, missing
+
+    def store_memory(self, document_type: str, vectors: dict):
+        for text_hash, vector in vectors.items():
+            self.memory_cache.set(self.get_cache_key(document_type, text_hash), np.asarray(vector, dtype=np.float32))
+
+    def embed_text(self, text: str | list[str], document_type: str = None):
+        # the durable tier is async only, sync callers get the in-memory tier
+        if isinstance(text, str):
+            text = [text]
+
+        text_hashes, vectors, missing = self.lookup_memory(texts=text, document_type=document_type)
+
+        if missing:
+            EMBEDDING_CACHE_MISSES.inc(len(missing))
+            new_vectors = self.embedding_client.embed_text(text=list(missing.values()), document_type=document_type)
+            if not new_vectors or len(new_vectors) != len(missing):
+                return None
+
+            new_vectors = dict(zip(missing.keys(), new_vectors))
+            self.store_memory(document_type=document_type, vectors=new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[text_hash] for text_hash in text_hashes]
+
+    async def aembed_text(self, text: str | list[str], document_type: str = None):
+        if isinstance(text, str):
+            text = [text]
+
+        text_hashes, vectors, missing = self.lookup_memory(texts=text, document_type=document_type)
+        model_id = self.embedding_client.embedding_model_id
+        is_persisted = self.embedding_cache_model is not None and document_type != DocumentTypeEnum.QUERY.value
+
+        if missing and is_persisted:
+            try:
+                stored_vectors = await self.embedding_cache_model.get_embeddings(provider=self.provider,
+                                                                                 model_id=model_id,
+                                                                                 document_type=str(document_type),
+                                                                                 text_hashes=list(missing.keys()))
+            except Exception as e:
+                self.logger.error(f"Error while reading the embeddings cache: {e}")
+                stored_vectors = {}
+
+            EMBEDDING_CACHE_HITS.labels(tier="database").inc(len(stored_vectors))
+            self.store_memory(document_type=document_type, vectors=stored_vectors)
+            vectors.update(stored_vectors)
+            missing = {text_hash: t for text_hash, t in missing.items() if text_hash not in stored_vectors}
+
+        if missing:
+            EMBEDDING_CACHE_MISSES.inc(len(missing))
+            new_vectors = await self.embedding_client.aembed_text(text=list(missing.values()), document_type=document_type)
+            if not new_vectors or len(new_vectors) != len(missing):
+                return None
+
+            new_vectors = dict(zip(missing.keys(), new_vectors))
+            self.store_memory(document_type=document_type, vectors=new_vectors)
+            vectors.update(new_vectors)
+
+            if is_persisted:
+                try:
+                    await self.embedding_cache_model.insert_embeddings(provider=self.provider,
+                                                                       model_id=model_id,
+                                                                       document_type=str(document_type),
+                                                                       embeddings=new_vectors)
+                except Exception as e:
+                    self.logger.error(f"Error while writing the embeddings cache: {e}")
+
+        return [vectors[text_hash] for text_hash in text_hashes]
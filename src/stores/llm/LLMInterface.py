@@ -11,14 +11,29 @@ class LLMInterface(ABC):
         pass
 
     @abstractmethod
-    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+    def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
                             temperature: float = None):
         pass
 
+    @abstractmethod
+    async def agenerate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                   temperature: float = None):
+        pass
+
+    @abstractmethod
+    async def astream_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                 temperature: float = None):
+        # async generator of the answer's text deltas, as the provider returns them
+        pass
+
     @abstractmethod
     def embed_text(self, text: str, document_type: str = None):
         pass
 
+    @abstractmethod
+    async def aembed_text(self, text: str, document_type: str = None):
+        pass
+
     @abstractmethod
     def construct_prompt(self, prompt: str, role: str):
         pass
@@ -12,7 +12,9 @@ class LLMProviderFactory:
                 api_url = self.config.OPENAI_API_URL,
                 default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                embedding_max_retries=self.config.EMBEDDING_BATCH_MAX_RETRIES,
+                embedding_max_concurrency=self.config.EMBEDDING_BATCH_MAX_CONCURRENCY
             )
 
         if provider == LLMEnums.COHERE.value:
@@ -20,7 +22,9 @@ class LLMProviderFactory:
                 api_key = self.config.COHERE_API_KEY,
                 default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                embedding_max_retries=self.config.EMBEDDING_BATCH_MAX_RETRIES,
+                embedding_max_concurrency=self.config.EMBEDDING_BATCH_MAX_CONCURRENCY
             )
 
         if provider == LLMEnums.GEMINI.value:
@@ -28,7 +32,9 @@ class LLMProviderFactory:
                 api_key = self.config.GEMINI_API_KEY,
                 default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                embedding_max_retries=self.config.EMBEDDING_BATCH_MAX_RETRIES,
+                embedding_max_concurrency=self.config.EMBEDDING_BATCH_MAX_CONCURRENCY
             )
 
         return None
@@ -0,0 +1,136 @@
+from .LLMEnums import DocumentTypeEnum
+from utils.cache import LRUCache, get_query_hash
+from utils.metrics import QUERY_EMBEDDING_CACHE_HITS, QUERY_EMBEDDING_CACHE_MISSES
+from redis.asyncio import Redis
+import numpy as np
+import logging
+
+class QueryEmbeddingCache:
+    """
+    Embedding client wrapper for search queries, keyed by (provider, model id, normalized query text).
+    Looks up an in-process LRU with a TTL, then an optional Redis tier shared by all workers,
+    and only sends misses to the wrapped client. Document embeddings pass through untouched.
+    """
+
+    def __init__(self, embedding_client, provider: str, max_size: int = 10000,
+                 ttl_seconds: int = 3600, redis_url: str = None, prefix: str = "query_embedding"):
+        self.embedding_client = embedding_client
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.memory_cache = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.redis = Redis.from_url(redis_url) if redis_url else None
+        self.prefix = prefix
+
+        self.logger = logging.getLogger("uvicorn")
+
+    def __getattr__(self, name):
+        if name == "embedding_client":
+            raise AttributeError(name)
+        return getattr(self.embedding_client, name)
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    def get_cache_key(self, text: str) -> str:
+        query_hash = get_query_hash(text)
+        return f"{self.prefix}:{self.provider}:{self.embedding_client.embedding_model_id}:{query_hash}"
+
+    def lookup_memory(self, texts: list):
+        # returns the cache keys, the vectors found in memory and {cache_key: text} for the misses
+        cache_keys = [self.get_cache_key(t) for t in texts]
+        vectors = {}
+        missing = {}
+        for text, cache_key in zip(texts, cache_keys):
+            vector = self.memory_cache.get(cache_key)
+            if vector is not None:
+                vectors[cache_key] = vector
+            else:
+                missing[cache_key] = text
+
+        QUERY_EMBEDDING_CACHE_HITS.labels(tier="memory").inc(len(vectors))
+        return cache_keys, vectors, missing
+
+    async def lookup_redis(self, cache_keys: list) -> dict:
+        if self.redis is None or not cache_keys:
+            return {}
+
+        try:
+            values = await self.redis.mget(cache_keys)
+        except Exception as e:
+            self.logger.error(f"Error while reading the query embeddings cache: {e}")
+            return {}
+
+        vectors = {
+            cache_key: np.frombuffer(value, dtype=np.float32).tolist()
+            for cache_key, value in zip(cache_keys, values)
+            if value is not None
+        }
+        QUERY_EMBEDDING_CACHE_HITS.labels(tier="redis").inc(len(vectors))
+        return vectors
+
+    async def store_redis(self, vectors: dict):
+        if self.redis is None or not vectors:
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipeline:
+                for cache_key, vector in vectors.items():
+                    pipeline.set(cache_key, np.asarray(vector, dtype=np.float32).tobytes(), ex=self.ttl_seconds)
+                await pipeline.execute()
+        except Exception as e:
+            self.logger.error(f"Error while writing the query embeddings cache: {e}")
+
+    def store_memory(self, vectors: dict):
+        for cache_key, vector in vectors.items():
+            self.memory_cache.set(cache_key, vector)
+
+    def embed_text(self, text: str | list[str], document_type: str = None):
+        # the redis tier is async only, sync callers get the in-memory tier
+        if document_type != DocumentTypeEnum.QUERY.value:
+            return self.embedding_client.embed_text(text=text, document_type=document_type)
+
+        if isinstance(text, str):
+            text = [text]
+
+        cache_keys, vectors, missing = self.lookup_memory(texts=text)
+
+        if missing:
+            QUERY_EMBEDDING_CACHE_MISSES.inc(len(missing))
+            new_vectors = self.embedding_client.embed_text(text=list(missing.values()), document_type=document_type)
+            if not new_vectors or len(new_vectors) != len(missing):
+                return None
+
+            new_vectors = dict(zip(missing.keys(), new_vectors))
+            self.store_memory(vectors=new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[cache_key] for cache_key in cache_keys]
+
+    async def aembed_text(self, text: str | list[str], document_type: str = None):
+        if document_type != DocumentTypeEnum.QUERY.value:
+            return await self.embedding_client.aembed_text(text=text, document_type=document_type)
+
+        if isinstance(text, str):
+            text = [text]
+
+        cache_keys, vectors, missing = self.lookup_memory(texts=text)
+
+        if missing:
+            stored_vectors = await self.lookup_redis(cache_keys=list(missing.keys()))
+            self.store_memory(vectors=stored_vectors)
+            vectors.update(stored_vectors)
+            missing = {cache_key: t for cache_key, t in missing.items() if cache_key not in stored_vectors}
+
+        if missing:
+            QUERY_EMBEDDING_CACHE_MISSES.inc(len(missing))
+            new_vectors = await self.embedding_client.aembed_text(text=list(missing.values()), document_type=document_type)
+            if not new_vectors or len(new_vectors) != len(missing):
+                return None
+
+            new_vectors = dict(zip(missing.keys(), new_vectors))
+            self.store_memory(vectors=new_vectors)
+            await self.store_redis(vectors=new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[cache_key] for cache_key in cache_keys]
@@ -1,14 +1,21 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import CoHereEnums, DocumentTypeEnum
+from ..EmbeddingBatcher import EmbeddingBatcher
 import cohere
 import logging
 
 class CoHereProvider(LLMInterface):
 
+    # the embed endpoint accepts at most 96 texts per call, each truncated to 512 tokens
+    EMBEDDING_MAX_ITEMS = 96
+    EMBEDDING_MAX_TOKENS = None
+
     def __init__(self, api_key: str,
                        default_input_max_characters: int=1000,
                        default_generation_max_output_tokens: int=1000,
-                       default_generation_temperature: float=0.1):
+                       default_generation_temperature: float=0.1,
+                       embedding_max_retries: int=3,
+                       embedding_max_concurrency: int=4):
         
         self.api_key = api_key
 
@@ -22,7 +29,12 @@ class CoHereProvider(LLMInterface):
         self.embedding_size = None
 
         self.client = cohere.Client(api_key=self.api_key)
+        self.async_client = cohere.AsyncClient(api_key=self.api_key)
         
+        self.embedding_batcher = EmbeddingBatcher(max_items=self.EMBEDDING_MAX_ITEMS,
+                                                  max_tokens=self.EMBEDDING_MAX_TOKENS,
+                                                  max_retries=embedding_max_retries,
+                                                  max_concurrency=embedding_max_concurrency)
         self.enums = CoHereEnums
 
         self.logger = logging.getLogger(__name__)
@@ -37,7 +49,7 @@ class CoHereProvider(LLMInterface):
     def process_text(self, text: str):
         return text[:self.default_input_max_characters].strip()
 
-    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+    def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
                             temperature: float = None):
 
         if not self.client:
@@ -53,7 +65,7 @@ class CoHereProvider(LLMInterface):
 
         response = self.client.chat(
             model = self.generation_model_id,
-            chat_history = chat_history,
+            chat_history = chat_history or [],
             message = self.process_text(prompt),
             temperature = temperature,
             max_tokens = max_output_tokens
@@ -64,6 +76,95 @@ class CoHereProvider(LLMInterface):
             return None
         
         return response.text
+
+    async def agenerate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                   temperature: float = None):
+
+        if not self.async_client:
+            self.logger.error("CoHere async client was not set")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for CoHere was not set")
+            return None
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        response = await self.async_client.chat(
+            model = self.generation_model_id,
+            chat_history = chat_history or [],
+            message = self.process_text(prompt),
+            temperature = temperature,
+            max_tokens = max_output_tokens
+        )
+
+        if not response or not response.text:
+            self.logger.error("Error while generating text with CoHere")
+            return None
+        
+        return response.text
+
+    async def astream_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                 temperature: float = None):
+
+        if not self.async_client:
+            self.logger.error("CoHere async client was not set")
+            return
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for CoHere was not set")
+            return
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        stream = self.async_client.chat_stream(
+            model = self.generation_model_id,
+            chat_history = chat_history or [],
+            message = self.process_text(prompt),
+            temperature = temperature,
+            max_tokens = max_output_tokens
+        )
+
+        async for event in stream:
+            if event.event_type == "text-generation" and event.text:
+                yield event.text
+
+    def get_embedding_input_type(self, document_type: str = None):
+        if document_type == DocumentTypeEnum.QUERY.value:
+            return CoHereEnums.QUERY.value
+        return CoHereEnums.DOCUMENT.value
+    
+    def embed_batch(self, texts: list, document_type: str = None):
+
+        response = self.client.embed(
+            model = self.embedding_model_id,
+            texts = [self.process_text(t) for t in texts],
+            input_type = self.get_embedding_input_type(document_type=document_type),
+            embedding_types=['float'],
+        )
+
+        if not response or not response.embeddings or not response.embeddings.float:
+            self.logger.error("Error while embedding text with CoHere")
+            return None
+        
+        return [f for f in response.embeddings.float]
+
+    async def aembed_batch(self, texts: list, document_type: str = None):
+
+        response = await self.async_client.embed(
+            model = self.embedding_model_id,
+            texts = [self.process_text(t) for t in texts],
+            input_type = self.get_embedding_input_type(document_type=document_type),
+            embedding_types=['float'],
+        )
+
+        if not response or not response.embeddings or not response.embeddings.float:
+            self.logger.error("Error while embedding text with CoHere")
+            return None
+        
+        return [f for f in response.embeddings.float]
     
     def embed_text(self, text: str | list[str], document_type: str = None):
         
@@ -78,22 +179,28 @@ class CoHereProvider(LLMInterface):
         if isinstance(text,str):
             text = [text]
         
-        input_type = CoHereEnums.DOCUMENT
-        if document_type == DocumentTypeEnum.QUERY:
-            input_type = CoHereEnums.QUERY
-
-        response = self.client.embed(
-            model = self.embedding_model_id,
-            texts = [self.process_text(t) for t in text],
-            input_type = input_type,
-            embedding_types=['float'],
+        return self.embedding_batcher.embed(
+            texts=text,
+            embed_batch=lambda batch: self.embed_batch(texts=batch, document_type=document_type)
         )
 
-        if not response or not response.embeddings or not response.embeddings.float:
-            self.logger.error("Error while embedding text with CoHere")
+    async def aembed_text(self, text: str | list[str], document_type: str = None):
+        
+        if not self.async_client:
+            self.logger.error("CoHere async client was not set")
             return None
         
-        return [f for f in response.embeddings.float]
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for CoHere was not set")
+            return None
+        
+        if isinstance(text,str):
+            text = [text]
+
+        return await self.embedding_batcher.aembed(
+            texts=text,
+            embed_batch=lambda batch: self.aembed_batch(texts=batch, document_type=document_type)
+        )
     
     def construct_prompt(self, prompt: str, role: str):
         return {
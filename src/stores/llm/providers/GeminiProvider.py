@@ -1,14 +1,21 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import GeminiEnums
+from ..EmbeddingBatcher import EmbeddingBatcher
 import google.generativeai as genai
 import logging
 
 class GeminiProvider(LLMInterface):
 
+    # batchEmbedContents accepts at most 100 requests per call
+    EMBEDDING_MAX_ITEMS = 100
+    EMBEDDING_MAX_TOKENS = None
+
     def __init__(self, api_key: str,
                        default_input_max_characters: int=1000,
                        default_generation_max_output_tokens: int=1000,
-                       default_generation_temperature: float=0.1):
+                       default_generation_temperature: float=0.1,
+                       embedding_max_retries: int=3,
+                       embedding_max_concurrency: int=4):
         
         self.api_key = api_key
 
@@ -20,6 +27,10 @@ class GeminiProvider(LLMInterface):
         self.embedding_model_id = None
         self.embedding_size = None
         
+        self.embedding_batcher = EmbeddingBatcher(max_items=self.EMBEDDING_MAX_ITEMS,
+                                                  max_tokens=self.EMBEDDING_MAX_TOKENS,
+                                                  max_retries=embedding_max_retries,
+                                                  max_concurrency=embedding_max_concurrency)
         self.enums = GeminiEnums
 
         genai.configure(api_key=self.api_key)
@@ -36,21 +47,13 @@ class GeminiProvider(LLMInterface):
     def process_text(self, text: str):
         return text[:self.default_input_max_characters].strip()
 
-    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
-                            temperature: float = None):
-        
-        if not self.generation_model_id:
-            self.logger.error("Generation model for Gemini was not set")
-            return None
-        
-        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
-        temperature = temperature if temperature else self.default_generation_temperature
+    def build_generation_request(self, prompt: str, chat_history: list=None):
 
         # Process chat history
         gemini_history = []
         system_instruction = None
 
-        for msg in chat_history:
+        for msg in chat_history or []:
             role = msg.get("role")
             content = msg.get("content")
 
@@ -73,6 +76,20 @@ class GeminiProvider(LLMInterface):
         else:
             model = genai.GenerativeModel(self.generation_model_id)
 
+        return model, gemini_history
+
+    def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                            temperature: float = None):
+        
+        if not self.generation_model_id:
+            self.logger.error("Generation model for Gemini was not set")
+            return None
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        model, gemini_history = self.build_generation_request(prompt=prompt, chat_history=chat_history)
+
         try:
             response = model.generate_content(
                 gemini_history,
@@ -92,6 +109,108 @@ class GeminiProvider(LLMInterface):
             self.logger.error(f"Error while generating text with Gemini: {e}")
             return None
 
+    async def agenerate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                   temperature: float = None):
+        
+        if not self.generation_model_id:
+            self.logger.error("Generation model for Gemini was not set")
+            return None
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        model, gemini_history = self.build_generation_request(prompt=prompt, chat_history=chat_history)
+
+        try:
+            response = await model.generate_content_async(
+                gemini_history,
+                generation_config=genai.types.GenerationConfig(
+                    max_output_tokens=max_output_tokens,
+                    temperature=temperature
+                )
+            )
+
+            if not response.text:
+                self.logger.error("Gemini returned empty text or blocked response")
+                return None
+
+            return response.text
+
+        except Exception as e:
+            self.logger.error(f"Error while generating text with Gemini: {e}")
+            return None
+
+    async def astream_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                 temperature: float = None):
+        
+        if not self.generation_model_id:
+            self.logger.error("Generation model for Gemini was not set")
+            return
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        model, gemini_history = self.build_generation_request(prompt=prompt, chat_history=chat_history)
+
+        try:
+            response = await model.generate_content_async(
+                gemini_history,
+                generation_config=genai.types.GenerationConfig(
+                    max_output_tokens=max_output_tokens,
+                    temperature=temperature
+                ),
+                stream=True
+            )
+
+            async for chunk in response:
+                # a blocked chunk has no text, reading it raises
+                if chunk.parts:
+                    yield chunk.text
+
+        except Exception as e:
+            self.logger.error(f"Error while streaming text with Gemini: {e}")
+            return
+
+
+    def get_embedding_task_type(self, document_type: str = None):
+        return "retrieval_document" if document_type == "document" else "retrieval_query"
+
+    def embed_batch(self, texts: list, document_type: str = None):
+        try:
+            # a list of contents is sent as a single batchEmbedContents call
+            response = genai.embed_content(
+                model=self.embedding_model_id,
+                content=texts,
+                task_type=self.get_embedding_task_type(document_type=document_type)
+            )
+            
+            if 'embedding' not in response:
+                self.logger.error("Error embedding text with Gemini: No embedding in response")
+                return None
+
+            return response['embedding']
+
+        except Exception as e:
+            self.logger.error(f"Error while embedding text with Gemini: {e}")
+            return None
+
+    async def aembed_batch(self, texts: list, document_type: str = None):
+        try:
+            response = await genai.embed_content_async(
+                model=self.embedding_model_id,
+                content=texts,
+                task_type=self.get_embedding_task_type(document_type=document_type)
+            )
+            
+            if 'embedding' not in response:
+                self.logger.error("Error embedding text with Gemini: No embedding in response")
+                return None
+
+            return response['embedding']
+
+        except Exception as e:
+            self.logger.error(f"Error while embedding text with Gemini: {e}")
+            return None
 
     def embed_text(self, text: str | list[str], document_type: str = None):
         
@@ -102,29 +221,24 @@ class GeminiProvider(LLMInterface):
         if isinstance(text,str):
             text = [text]
         
-        embeddings = []
-        for t in text:
-            try:
-                # task_type mapping
-                task_type = "retrieval_document" if document_type == "document" else "retrieval_query"
-                
-                response = genai.embed_content(
-                    model=self.embedding_model_id,
-                    content=t,
-                    task_type=task_type
-                )
-                
-                if 'embedding' not in response:
-                    self.logger.error("Error embedding text with Gemini: No embedding in response")
-                    return None
-                    
-                embeddings.append(response['embedding'])
-
-            except Exception as e:
-                self.logger.error(f"Error while embedding text with Gemini: {e}")
-                return None
+        return self.embedding_batcher.embed(
+            texts=text,
+            embed_batch=lambda batch: self.embed_batch(texts=batch, document_type=document_type)
+        )
 
-        return embeddings
+    async def aembed_text(self, text: str | list[str], document_type: str = None):
+        
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for Gemini was not set")
+            return None
+        
+        if isinstance(text,str):
+            text = [text]
+        
+        return await self.embedding_batcher.aembed(
+            texts=text,
+            embed_batch=lambda batch: self.aembed_batch(texts=batch, document_type=document_type)
+        )
 
     def construct_prompt(self, prompt: str, role: str):
         return {
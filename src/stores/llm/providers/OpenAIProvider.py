@@ -1,14 +1,27 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import OpenAIEnums
-from openai import OpenAI
+from ..EmbeddingBatcher import EmbeddingBatcher
+from openai import OpenAI, AsyncOpenAI
 import logging
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 class OpenAIProvider(LLMInterface):
 
+    # per-request limits of the embeddings endpoint
+    EMBEDDING_MAX_ITEMS = 2048
+    EMBEDDING_MAX_TOKENS = 300000
+    EMBEDDING_MAX_INPUT_TOKENS = 8191
+
     def __init__(self, api_key: str, api_url: str=None,
                        default_input_max_characters: int=1000,
                        default_generation_max_output_tokens: int=1000,
-                       default_generation_temperature: float=0.1):
+                       default_generation_temperature: float=0.1,
+                       embedding_max_retries: int=3,
+                       embedding_max_concurrency: int=4):
         
         self.api_key = api_key
         self.api_url = api_url
@@ -26,6 +39,15 @@ class OpenAIProvider(LLMInterface):
             api_key = self.api_key,
             base_url= self.api_url if self.api_url and len(self.api_url) else None
         )
+        self.async_client = AsyncOpenAI(
+            api_key = self.api_key,
+            base_url= self.api_url if self.api_url and len(self.api_url) else None
+        )
+        self.embedding_batcher = EmbeddingBatcher(max_items=self.EMBEDDING_MAX_ITEMS,
+                                                  max_tokens=self.EMBEDDING_MAX_TOKENS,
+                                                  max_input_tokens=self.EMBEDDING_MAX_INPUT_TOKENS,
+                                                  max_retries=embedding_max_retries,
+                                                  max_concurrency=embedding_max_concurrency)
         self.enums = OpenAIEnums
 
         self.logger = logging.getLogger(__name__)
@@ -36,11 +58,25 @@ class OpenAIProvider(LLMInterface):
     def set_embedding_model(self, model_id: str, embedding_size: int):
         self.embedding_model_id = model_id
         self.embedding_size = embedding_size
+        self.embedding_batcher.count_tokens = self.get_token_counter(model_id=model_id)
+
+    def get_token_counter(self, model_id: str):
+        # exact counts with tiktoken when it is installed, the batcher's estimate otherwise
+        if tiktoken is None:
+            return self.embedding_batcher.estimate_tokens
+
+        try:
+            encoding = tiktoken.encoding_for_model(model_id)
+        except KeyError:
+            # unknown to tiktoken (e.g. served behind api_url), the encoding of the current embedding models
+            encoding = tiktoken.get_encoding("cl100k_base")
+
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
 
     def process_text(self, text: str):
         return text[:self.default_input_max_characters].strip()
 
-    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+    def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
                             temperature: float = None):
         
         if not self.client:
@@ -54,13 +90,14 @@ class OpenAIProvider(LLMInterface):
         max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
         temperature = temperature if temperature else self.default_generation_temperature
 
-        chat_history.append(
+        # a new list, the caller's chat history is left as is
+        messages = list(chat_history or []) + [
             self.construct_prompt(prompt=prompt, role=OpenAIEnums.USER.value)
-        )
+        ]
 
         response = self.client.chat.completions.create(
             model = self.generation_model_id,
-            messages = chat_history,
+            messages = messages,
             max_tokens = max_output_tokens,
             temperature = temperature
         )
@@ -71,6 +108,94 @@ class OpenAIProvider(LLMInterface):
 
         return response.choices[0].message.content
 
+    async def agenerate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                   temperature: float = None):
+        
+        if not self.async_client:
+            self.logger.error("OpenAI async client was not set")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for OpenAI was not set")
+            return None
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        # a new list, the caller's chat history is left as is
+        messages = list(chat_history or []) + [
+            self.construct_prompt(prompt=prompt, role=OpenAIEnums.USER.value)
+        ]
+
+        response = await self.async_client.chat.completions.create(
+            model = self.generation_model_id,
+            messages = messages,
+            max_tokens = max_output_tokens,
+            temperature = temperature
+        )
+
+        if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
+            self.logger.error("Error while generating text with OpenAI")
+            return None
+
+        return response.choices[0].message.content
+
+    async def astream_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                 temperature: float = None):
+        
+        if not self.async_client:
+            self.logger.error("OpenAI async client was not set")
+            return
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for OpenAI was not set")
+            return
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        # a new list, the caller's chat history is left as is
+        messages = list(chat_history or []) + [
+            self.construct_prompt(prompt=prompt, role=OpenAIEnums.USER.value)
+        ]
+
+        stream = await self.async_client.chat.completions.create(
+            model = self.generation_model_id,
+            messages = messages,
+            max_tokens = max_output_tokens,
+            temperature = temperature,
+            stream = True
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def embed_batch(self, texts: list):
+
+        response = self.client.embeddings.create(
+            model = self.embedding_model_id,
+            input = texts,
+        )
+
+        if not response or not response.data or len(response.data) == 0 or not response.data[0].embedding:
+            self.logger.error("Error while embedding text with OpenAI")
+            return None
+
+        return [rec.embedding for rec in response.data]
+
+    async def aembed_batch(self, texts: list):
+
+        response = await self.async_client.embeddings.create(
+            model = self.embedding_model_id,
+            input = texts,
+        )
+
+        if not response or not response.data or len(response.data) == 0 or not response.data[0].embedding:
+            self.logger.error("Error while embedding text with OpenAI")
+            return None
+
+        return [rec.embedding for rec in response.data]
 
     def embed_text(self, text: str | list[str], document_type: str = None):
         
@@ -85,16 +210,22 @@ class OpenAIProvider(LLMInterface):
         if isinstance(text,str):
             text = [text]
         
-        response = self.client.embeddings.create(
-            model = self.embedding_model_id,
-            input = text,
-        )
+        return self.embedding_batcher.embed(texts=text, embed_batch=self.embed_batch)
 
-        if not response or not response.data or len(response.data) == 0 or not response.data[0].embedding:
-            self.logger.error("Error while embedding text with OpenAI")
+    async def aembed_text(self, text: str | list[str], document_type: str = None):
+        
+        if not self.async_client:
+            self.logger.error("OpenAI async client was not set")
             return None
 
-        return [rec.embedding for rec in response.data]
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for OpenAI was not set")
+            return None
+        
+        if isinstance(text,str):
+            text = [text]
+        
+        return await self.embedding_batcher.aembed(texts=text, embed_batch=self.aembed_batch)
 
     def construct_prompt(self, prompt: str, role: str):
         return {
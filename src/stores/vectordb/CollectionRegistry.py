@@ -0,0 +1,88 @@
+from utils.cache import LRUCache
+from redis.asyncio import Redis
+import logging
+
+class CollectionRegistry:
+    """
+    Per-provider cache of collection metadata (existence, dimension, distance, index state, unique record ids).
+    Entries expire after ttl_seconds so changes made by other workers are picked up.
+    Also keeps a version per collection that caches of search results and answers are keyed by.
+    With redis (redis_url or a client), versions are shared: every write of any process increments
+    them, and a read is reused for at most version_cache_ttl seconds. Without, they only count this process' writes.
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_size: int = 10000,
+                 redis_url: str = None, redis: Redis = None, prefix: str = "vectordb",
+                 version_cache_ttl: float = 1):
+        self.collections = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+        # an existing client (e.g. fakeredis) can be passed instead of a url
+        self.redis = redis if redis is not None else (Redis.from_url(redis_url) if redis_url else None)
+        self.prefix = prefix
+        self.versions = LRUCache(max_size=max_size, ttl_seconds=version_cache_ttl if self.redis is not None else None)
+
+        self.logger = logging.getLogger("uvicorn")
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    def get(self, collection_name: str) -> dict:
+        return self.collections.get(collection_name)
+
+    def is_existed(self, collection_name: str) -> bool:
+        # None means unknown, the caller has to ask the backend
+        collection = self.get(collection_name)
+        if collection is None:
+            return None
+        return collection["is_existed"]
+
+    def set(self, collection_name: str, **fields):
+        collection = self.get(collection_name) or {
+            "is_existed": True,
+            "dimension": None,
+            "distance": None,
+            "index_state": None,
+            "chunk_id_unique": None,
+        }
+        collection.update(fields)
+        self.collections.set(collection_name, collection)
+
+    def invalidate(self, collection_name: str):
+        self.collections.delete(collection_name)
+
+    def version_key(self, collection_name: str) -> str:
+        return f"{self.prefix}:collection_version:{collection_name}"
+
+    async def get_version(self, collection_name: str) -> int:
+        # None when the shared version can't be read, callers must not use their caches then
+        version = self.versions.get(collection_name)
+        if version is not None or self.redis is None:
+            return version or 0
+
+        try:
+            version = int(await self.redis.get(self.version_key(collection_name)) or 0)
+        except Exception as e:
+            self.logger.error(f"Error while reading the version of {collection_name}: {e}")
+            return None
+
+        self.versions.set(collection_name, version)
+        return version
+
+    async def bump_version(self, collection_name: str) -> int:
+        if self.redis is None:
+            version = (self.versions.get(collection_name) or 0) + 1
+            self.versions.set(collection_name, version)
+            return version
+
+        try:
+            version = await self.redis.incr(self.version_key(collection_name))
+        except Exception as e:
+            # other processes keep serving cached results until their entries expire
+            self.versions.delete(collection_name)
+            self.logger.error(f"Error while bumping the version of {collection_name}: {e}")
+            return None
+
+        # this process sees its own writes right away
+        self.versions.set(collection_name, version)
+        return version
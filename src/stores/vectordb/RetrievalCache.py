@@ -0,0 +1,58 @@
+from utils.cache import LRUCache
+from utils.metrics import RETRIEVAL_CACHE_HITS, RETRIEVAL_CACHE_MISSES
+import numpy as np
+import hashlib
+
+class RetrievalCache:
+    """
+    Vector DB client wrapper caching search results in memory, keyed by
+    (collection, collection version, query vector hash, limit, search parameters).
+    Every write, of this or another process sharing the versions, bumps the collection version,
+    so results retrieved before a write are not served again; everything else is delegated.
+    """
+
+    def __init__(self, vectordb_client, max_size: int = 10000, ttl_seconds: int = 600):
+        self.vectordb_client = vectordb_client
+        self.results_cache = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def __getattr__(self, name):
+        if name == "vectordb_client":
+            raise AttributeError(name)
+        return getattr(self.vectordb_client, name)
+
+    async def get_cache_key(self, collection_name: str, vector: list, limit: int, **search_params) -> tuple:
+        # None when the collection version can't be read
+        collection_version = await self.vectordb_client.get_collection_version(collection_name=collection_name)
+        if collection_version is None:
+            return None
+
+        vector_hash = hashlib.sha256(np.asarray(vector, dtype=np.float32).tobytes()).hexdigest()
+        return (
+            collection_name,
+            collection_version,
+            vector_hash,
+            limit,
+            tuple(sorted(search_params.items())),
+        )
+
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int = 5, **search_params):
+
+        # keyed by the version read before the search, a write meanwhile makes the entry unreachable
+        cache_key = await self.get_cache_key(collection_name, vector, limit, **search_params)
+        if cache_key is None:
+            return await self.vectordb_client.search_by_vector(collection_name=collection_name, vector=vector,
+                                                               limit=limit, **search_params)
+
+        results = self.results_cache.get(cache_key)
+        if results is not None:
+            RETRIEVAL_CACHE_HITS.inc()
+            return results
+
+        RETRIEVAL_CACHE_MISSES.inc()
+        results = await self.vectordb_client.search_by_vector(collection_name=collection_name, vector=vector,
+                                                              limit=limit, **search_params)
+        # failed or empty searches are not cached
+        if results:
+            self.results_cache.set(cache_key, results)
+
+        return results
@@ -4,6 +4,10 @@ class VectorDBEnums(Enum):
     QUDRANT = "QUDRANT"
     PGVECTOR = "PGVECTOR"
     
+class QdrantModeEnums(Enum):
+    LOCAL = "local"
+    SERVER = "server"
+
 class DistanceMethodEnums(Enum):
     COSINE = "cosine" 
     DOT = "dot"
@@ -18,7 +22,14 @@ class PgVectorTableSchemeEnums(Enum):
     
 class PgVectorDistanceMethodEnums(Enum):
     COSINE = "vector_cosine_ops"
-    DOT = "vector_l2_ops"
+    DOT = "vector_ip_ops"
+    L2 = "vector_l2_ops"
+
+class PgVectorDistanceOperatorEnums(Enum):
+    # operator served by the index built with the matching opclass above
+    COSINE = "<=>"
+    DOT = "<#>"
+    L2 = "<->"
 
 class PgVectorIndexTypeEnums(Enum):
     HNSW = "hnsw"
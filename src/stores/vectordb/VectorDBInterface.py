@@ -39,12 +39,32 @@ class VectorDBInterface(ABC):
                         metadata:dict = None, record_id:str = None):
         pass
     
+    # insert_one / insert_many upsert by record_id: pushing a record again replaces it
     @abstractmethod
     def insert_many(self,collection_name:str,
                         texts:list,vectors:list,
                         metadatas:list = None, record_ids:str = None, batch_size:int = 50):
         pass
     
+    @abstractmethod
+    def delete_records(self,collection_name:str,record_ids:list) -> bool:
+        pass
+    
+    @abstractmethod
+    def create_vector_index(self,collection_name:str,index_type:str = None) -> bool:
+        pass
+    
+    @abstractmethod
+    def get_vector_index_status(self,collection_name:str) -> dict:
+        pass
+    
     @abstractmethod 
     def search_by_vector(self,collection_name:str , vector:list, limit:int) -> List[RetreivedDocument]:
-        pass
\ No newline at end of file
+        pass
+
+    # bumped on every write to the collection; cached search results and answers are keyed by it
+    async def get_collection_version(self,collection_name:str) -> int:
+        return await self.collection_registry.get_version(collection_name)
+
+    async def bump_collection_version(self,collection_name:str) -> int:
+        return await self.collection_registry.bump_version(collection_name)
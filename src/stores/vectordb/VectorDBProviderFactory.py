@@ -8,21 +8,45 @@ class VectorDBProviderFactory:
         self.config = config
         self.base_controller = BaseController()
         self.db_client = db_client
-        
+
+    def get_version_redis_url(self):
+        # collection versions are shared by the api workers and the ingestion fleet through redis
+        return self.config.REDIS_URL if self.config.VECTOR_DB_VERSION_REDIS else None
+
     def create(self,provider):
         if provider == VectorDBEnums.QUDRANT.value:
             return QdrantDBProvider(
                 db_client=self.base_controller.get_database_path(db_name=self.config.VECTOR_DB_PATH),
                 default_vector_size=self.config.EMBEDDING_MODEL_SIZE,
                 distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
-                index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD
-                
+                index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD,
+                collection_cache_ttl=self.config.VECTOR_DB_COLLECTION_CACHE_TTL,
+                mode=self.config.VECTOR_DB_QDRANT_MODE,
+                url=self.config.VECTOR_DB_QDRANT_URL,
+                grpc_port=self.config.VECTOR_DB_QDRANT_GRPC_PORT,
+                prefer_grpc=self.config.VECTOR_DB_QDRANT_PREFER_GRPC,
+                api_key=self.config.VECTOR_DB_QDRANT_API_KEY,
+                upload_parallel=self.config.VECTOR_DB_QDRANT_UPLOAD_PARALLEL,
+                redis_url=self.get_version_redis_url(),
+                version_cache_ttl=self.config.VECTOR_DB_VERSION_CACHE_TTL
             )
         if provider == VectorDBEnums.PGVECTOR.value:
             return PGVectorProvider(
                 db_client=self.db_client,
-                defult_vector_size=self.config.EMBEDDING_MODEL_SIZE,
+                default_vector_size=self.config.EMBEDDING_MODEL_SIZE,
                 distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
-                index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD
+                index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD,
+                bulk_load=self.config.VECTOR_DB_PGVEC_BULK_LOAD,
+                index_type=self.config.VECTOR_DB_PGVEC_INDEX_TYPE,
+                hnsw_m=self.config.VECTOR_DB_PGVEC_HNSW_M,
+                hnsw_ef_construction=self.config.VECTOR_DB_PGVEC_HNSW_EF_CONSTRUCTION,
+                ivfflat_lists=self.config.VECTOR_DB_PGVEC_IVFFLAT_LISTS,
+                maintenance_work_mem=self.config.VECTOR_DB_PGVEC_MAINTENANCE_WORK_MEM,
+                max_parallel_maintenance_workers=self.config.VECTOR_DB_PGVEC_MAX_PARALLEL_MAINTENANCE_WORKERS,
+                hnsw_ef_search=self.config.VECTOR_DB_PGVEC_HNSW_EF_SEARCH,
+                ivfflat_probes=self.config.VECTOR_DB_PGVEC_IVFFLAT_PROBES,
+                collection_cache_ttl=self.config.VECTOR_DB_COLLECTION_CACHE_TTL,
+                redis_url=self.get_version_redis_url(),
+                version_cache_ttl=self.config.VECTOR_DB_VERSION_CACHE_TTL
             )
     
\ No newline at end of file
@@ -1,33 +1,63 @@
 from ..VectorDBInterface import VectorDBInterface
+from ..CollectionRegistry import CollectionRegistry
 from ..VectorDBEnums import (DistanceMethodEnums, PgVectorTableSchemeEnums, 
-                             PgVectorDistanceMethodEnums, PgVectorIndexTypeEnums)
+                             PgVectorDistanceMethodEnums, PgVectorIndexTypeEnums,
+                             PgVectorDistanceOperatorEnums)
 import logging
 from typing import List
 from models.db_schemes import RetreivedDocument
 from sqlalchemy.sql import text as sql_text
 import json
+import math
 
 class PGVectorProvider(VectorDBInterface):
 
     def __init__(self, db_client, default_vector_size: int = 786,
-                       distance_method: str = None, index_threshold: int=100):
+                       distance_method: str = None, index_threshold: int=100,
+                       bulk_load: bool = True,
+                       index_type: str = PgVectorIndexTypeEnums.HNSW.value,
+                       hnsw_m: int = 16, hnsw_ef_construction: int = 64,
+                       ivfflat_lists: int = None,
+                       maintenance_work_mem: str = "1GB",
+                       max_parallel_maintenance_workers: int = 4,
+                       hnsw_ef_search: int = 40, ivfflat_probes: int = 10,
+                       collection_cache_ttl: int = 60,
+                       redis_url: str = None, version_cache_ttl: float = 1):
         
         self.db_client = db_client
         self.default_vector_size = default_vector_size
         
         self.index_threshold = index_threshold
+        self.bulk_load = bulk_load
 
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.ivfflat_lists = ivfflat_lists
+        self.maintenance_work_mem = maintenance_work_mem
+        self.max_parallel_maintenance_workers = max_parallel_maintenance_workers
+
+        self.hnsw_ef_search = hnsw_ef_search
+        self.ivfflat_probes = ivfflat_probes
+
+        self.collection_registry = CollectionRegistry(ttl_seconds=collection_cache_ttl, redis_url=redis_url,
+                                                      version_cache_ttl=version_cache_ttl)
+
+        distance_operator = PgVectorDistanceOperatorEnums.COSINE.value
         if distance_method == DistanceMethodEnums.COSINE.value:
             distance_method = PgVectorDistanceMethodEnums.COSINE.value
         elif distance_method == DistanceMethodEnums.DOT.value:
             distance_method = PgVectorDistanceMethodEnums.DOT.value
+            distance_operator = PgVectorDistanceOperatorEnums.DOT.value
         self.distance_method = distance_method
+        self.distance_operator = distance_operator
 
         self.pgvector_table_prefix = PgVectorTableSchemeEnums._PREFIX.value
         
 
         self.logger = logging.getLogger("uvicorn")
         self.default_index_name = lambda collection_name: f"{collection_name}_vector_idx"
+        self.chunk_id_index_name = lambda collection_name: f"{collection_name}_chunk_id_idx"
 
 
     async def connect(self):
@@ -39,10 +69,13 @@ class PGVectorProvider(VectorDBInterface):
                 await session.commit()
 
     async def disconnect(self):
-        pass
+        await self.collection_registry.close()
 
     async def is_collection_existed(self, collection_name: str) -> bool:
 
+        if self.collection_registry.is_existed(collection_name):
+            return True
+
         record = None
         async with self.db_client() as session:
             async with session.begin():
@@ -50,7 +83,11 @@ class PGVectorProvider(VectorDBInterface):
                 results = await session.execute(list_tbl, {"collection_name": collection_name})
                 record = results.scalar_one_or_none()
 
-        return record
+        # only positive answers are cached, another worker may create the table at any time
+        if record:
+            self.collection_registry.set(collection_name, is_existed=True)
+
+        return bool(record)
     
     async def list_all_collections(self) -> List:
         records = []
@@ -100,11 +137,14 @@ class PGVectorProvider(VectorDBInterface):
                 delete_sql = sql_text(f'DROP TABLE IF EXISTS {collection_name}')
                 await session.execute(delete_sql)
                 await session.commit()
+
+        self.collection_registry.invalidate(collection_name)
+        await self.collection_registry.bump_version(collection_name)
         
         return True
 
     async def create_collection(self, collection_name: str,
-                                      embedding_size: int,
+                                      collection_size: int,
                                       do_reset: bool = False):
         
         if do_reset:
@@ -116,22 +156,72 @@ class PGVectorProvider(VectorDBInterface):
             async with self.db_client() as session:
                 async with session.begin():
                     create_sql = sql_text(
-                        f'CREATE TABLE {collection_name} ('
+                        f'CREATE TABLE IF NOT EXISTS {collection_name} ('
                             f'{PgVectorTableSchemeEnums.ID.value} bigserial PRIMARY KEY,'
                             f'{PgVectorTableSchemeEnums.TEXT.value} text, '
-                            f'{PgVectorTableSchemeEnums.VECTOR.value} vector({embedding_size}), '
+                            f'{PgVectorTableSchemeEnums.VECTOR.value} vector({collection_size}), '
                             f'{PgVectorTableSchemeEnums.METADATA.value} jsonb DEFAULT \'{{}}\', '
                             f'{PgVectorTableSchemeEnums.CHUNK_ID.value} integer, '
-                            f'FOREIGN KEY ({PgVectorTableSchemeEnums.CHUNK_ID.value}) REFERENCES chunks(chunk_id)'
+                            f'FOREIGN KEY ({PgVectorTableSchemeEnums.CHUNK_ID.value}) REFERENCES chunks(chunk_id) '
+                            'DEFERRABLE INITIALLY IMMEDIATE'
                         ')'
                     )
                     await session.execute(create_sql)
+                    await session.execute(sql_text(
+                        f'CREATE UNIQUE INDEX IF NOT EXISTS {self.chunk_id_index_name(collection_name)} '
+                        f'ON {collection_name} ({PgVectorTableSchemeEnums.CHUNK_ID.value})'
+                    ))
                     await session.commit()
+
+            self.collection_registry.set(collection_name, is_existed=True,
+                                         dimension=collection_size,
+                                         distance=self.distance_method,
+                                         chunk_id_unique=True)
             
             return True
 
         return False
     
+    async def ensure_chunk_id_unique(self, collection_name: str):
+        # upserts need the unique chunk_id index; collections created before it may hold
+        # the same chunk several times, only its newest row is kept
+        collection = self.collection_registry.get(collection_name)
+        if collection and collection["chunk_id_unique"]:
+            return
+
+        index_name = self.chunk_id_index_name(collection_name)
+        chunk_id = PgVectorTableSchemeEnums.CHUNK_ID.value
+        record_id = PgVectorTableSchemeEnums.ID.value
+        async with self.db_client() as session:
+            async with session.begin():
+                check_sql = sql_text('SELECT 1 FROM pg_indexes WHERE tablename = :collection_name AND indexname = :index_name')
+                results = await session.execute(check_sql, {"collection_name": collection_name, "index_name": index_name})
+
+                if not results.scalar_one_or_none():
+                    self.logger.info(f"Adding unique chunk_id index to collection: {collection_name}")
+                    await session.execute(sql_text(f'LOCK TABLE {collection_name} IN SHARE ROW EXCLUSIVE MODE'))
+                    await session.execute(sql_text(
+                        f'DELETE FROM {collection_name} a USING {collection_name} b '
+                        f'WHERE a.{chunk_id} = b.{chunk_id} AND a.{record_id} < b.{record_id}'
+                    ))
+                    await session.execute(sql_text(
+                        f'CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {collection_name} ({chunk_id})'
+                    ))
+
+        self.collection_registry.set(collection_name, chunk_id_unique=True)
+
+    def get_upsert_sql(self, collection_name: str, source_sql: str) -> str:
+        # a single INSERT ... SELECT, rows whose chunk_id is already in the collection are overwritten
+        columns = (f'{PgVectorTableSchemeEnums.TEXT.value}, {PgVectorTableSchemeEnums.VECTOR.value}, '
+                   f'{PgVectorTableSchemeEnums.METADATA.value}, {PgVectorTableSchemeEnums.CHUNK_ID.value}')
+        return (
+            f'INSERT INTO {collection_name} ({columns}) {source_sql} '
+            f'ON CONFLICT ({PgVectorTableSchemeEnums.CHUNK_ID.value}) DO UPDATE SET '
+            f'{PgVectorTableSchemeEnums.TEXT.value} = EXCLUDED.{PgVectorTableSchemeEnums.TEXT.value}, '
+            f'{PgVectorTableSchemeEnums.VECTOR.value} = EXCLUDED.{PgVectorTableSchemeEnums.VECTOR.value}, '
+            f'{PgVectorTableSchemeEnums.METADATA.value} = EXCLUDED.{PgVectorTableSchemeEnums.METADATA.value}'
+        )
+
     async def is_index_existed(self, collection_name: str) -> bool:
         index_name = self.default_index_name(collection_name)
         async with self.db_client() as session:
@@ -145,44 +235,176 @@ class PGVectorProvider(VectorDBInterface):
                 results = await session.execute(check_sql, {"index_name": index_name, "collection_name": collection_name})
                 
                 return bool(results.scalar_one_or_none())
-            
+
+    def get_ivfflat_lists(self, records_count: int) -> int:
+        # pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) above that
+        if self.ivfflat_lists:
+            return self.ivfflat_lists
+        if records_count <= 1_000_000:
+            return max(records_count // 1000, 1)
+        return int(math.sqrt(records_count))
+
+    def get_index_options(self, index_type: str, records_count: int) -> str:
+        if index_type == PgVectorIndexTypeEnums.IVFFLAT.value:
+            return f'lists = {self.get_ivfflat_lists(records_count=records_count)}'
+        return f'm = {self.hnsw_m}, ef_construction = {self.hnsw_ef_construction}'
+
+    def get_index_progress_sql(self):
+        # a concurrent build reports its index from its first phase on, a plain one reports index_relid = 0
+        return sql_text('''
+            SELECT p.phase, p.blocks_done, p.blocks_total, p.tuples_done, p.tuples_total
+            FROM pg_stat_progress_create_index p
+            WHERE p.relid = CAST(:collection_name AS regclass)
+            AND (p.index_relid = 0 OR p.index_relid = (SELECT oid FROM pg_class WHERE relname = :index_name))
+        ''')
+
+    async def get_vector_index_status(self, collection_name: str) -> dict:
+        # read from the catalogs, so a build running in any process or worker shows up
+        index_name = self.default_index_name(collection_name)
+        status = {
+            "index_name": index_name,
+            "is_existed": False,
+            "is_valid": False,
+            "index_type": None,
+            "index_size": None,
+            "progress": None,
+            "build": None,
+        }
+
+        if not await self.is_collection_existed(collection_name=collection_name):
+            return status
+
+        async with self.db_client() as session:
+            async with session.begin():
+                index_sql = sql_text('''
+                    SELECT i.indisvalid, am.amname, pg_relation_size(c.oid)
+                    FROM pg_class c
+                    JOIN pg_index i ON i.indexrelid = c.oid
+                    JOIN pg_am am ON am.oid = c.relam
+                    WHERE c.relname = :index_name
+                ''')
+
+                index_record = (await session.execute(index_sql, {"index_name": index_name})).fetchone()
+                progress_record = (await session.execute(self.get_index_progress_sql(),
+                                                         {"collection_name": collection_name,
+                                                          "index_name": index_name})).fetchone()
+
+        if index_record:
+            status["is_existed"] = True
+            status["is_valid"] = index_record[0]
+            status["index_type"] = index_record[1]
+            status["index_size"] = index_record[2]
+
+        if progress_record:
+            status["build"] = "building"
+            status["progress"] = {
+                "phase": progress_record[0],
+                "blocks_done": progress_record[1],
+                "blocks_total": progress_record[2],
+                "tuples_done": progress_record[3],
+                "tuples_total": progress_record[4],
+            }
+        elif status["is_valid"]:
+            status["build"] = "ready"
+        elif status["is_existed"]:
+            # left invalid by a failed concurrent build
+            status["build"] = "failed"
+
+        return status
+
     async def create_vector_index(self, collection_name: str,
-                                        index_type: str = PgVectorIndexTypeEnums.HNSW.value):
-        is_index_existed = await self.is_index_existed(collection_name=collection_name)
-        if is_index_existed:
+                                        index_type: str = None,
+                                        do_reset: bool = False):
+        # built once after a load rather than on every insert, so bulk loads don't pay
+        # for incremental HNSW maintenance. CONCURRENTLY keeps the table writable meanwhile.
+        index_type = index_type if index_type else self.index_type
+        index_name = self.default_index_name(collection_name)
+
+        if not await self.is_collection_existed(collection_name=collection_name):
             return False
-        
+
         async with self.db_client() as session:
-            async with session.begin():
-                count_sql = sql_text(f'SELECT COUNT(*) FROM {collection_name}')
-                result = await session.execute(count_sql)
-                records_count = result.scalar_one()
+            connection = await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+
+            # one build per index across all processes, held by this connection until unlocked
+            lock_sql = sql_text('SELECT pg_try_advisory_lock(hashtext(:index_name))')
+            if not (await connection.execute(lock_sql, {"index_name": index_name})).scalar_one():
+                self.logger.info(f"Vector index of collection {collection_name} is already being built")
+                return False
+
+            try:
+                return await self.build_vector_index(connection=connection, collection_name=collection_name,
+                                                     index_name=index_name, index_type=index_type,
+                                                     do_reset=do_reset)
+            finally:
+                await connection.execute(sql_text('SELECT pg_advisory_unlock(hashtext(:index_name))'),
+                                         {"index_name": index_name})
+
+    async def build_vector_index(self, connection, collection_name: str, index_name: str,
+                                       index_type: str, do_reset: bool = False) -> bool:
+        # runs under the build lock of the index
+
+        index_sql = sql_text('''
+            SELECT i.indisvalid
+            FROM pg_class c
+            JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.relname = :index_name
+        ''')
+        index_record = (await connection.execute(index_sql, {"index_name": index_name})).fetchone()
+
+        if index_record and index_record[0] and not do_reset:
+            return False
 
-                if records_count < self.index_threshold:
-                    return False
-                
-                self.logger.info(f"START: Creating vector index for collection: {collection_name}")
-                
-                index_name = self.default_index_name(collection_name)
-                create_idx_sql = sql_text(
-                                            f'CREATE INDEX {index_name} ON {collection_name} '
-                                            f'USING {index_type} ({PgVectorTableSchemeEnums.VECTOR.value} {self.distance_method})'
-                                          )
+        if index_record:
+            # an index still reported by pg_stat_progress_create_index is being built (e.g. by a process
+            # from before the lock), dropping it would kill that build
+            progress_record = (await connection.execute(self.get_index_progress_sql(),
+                                                        {"collection_name": collection_name,
+                                                         "index_name": index_name})).fetchone()
+            if progress_record:
+                self.logger.info(f"Vector index of collection {collection_name} is already being built")
+                return False
+
+            # left invalid by a failed concurrent build, or replaced on reset
+            await connection.execute(sql_text(f'DROP INDEX CONCURRENTLY IF EXISTS {index_name}'))
+
+        count_sql = sql_text(f'SELECT COUNT(*) FROM {collection_name}')
+        records_count = (await connection.execute(count_sql)).scalar_one()
+
+        if records_count < self.index_threshold:
+            return False
+
+        self.logger.info(f"START: Creating vector index for collection: {collection_name}")
+
+        try:
+            await connection.execute(sql_text(f"SET maintenance_work_mem = '{self.maintenance_work_mem}'"))
+            await connection.execute(sql_text(f'SET max_parallel_maintenance_workers = {self.max_parallel_maintenance_workers}'))
+
+            create_idx_sql = sql_text(
+                                        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {collection_name} '
+                                        f'USING {index_type} ({PgVectorTableSchemeEnums.VECTOR.value} {self.distance_method}) '
+                                        f'WITH ({self.get_index_options(index_type=index_type, records_count=records_count)})'
+                                      )
+            await connection.execute(create_idx_sql)
+
+        except Exception as e:
+            self.logger.error(f"Error while creating vector index for collection: {collection_name}: {e}")
+            return False
 
-                await session.execute(create_idx_sql)
+        finally:
+            await connection.execute(sql_text('RESET maintenance_work_mem'))
+            await connection.execute(sql_text('RESET max_parallel_maintenance_workers'))
 
-                self.logger.info(f"END: Created vector index for collection: {collection_name}")
+        self.collection_registry.set(collection_name, index_state="ready")
+        self.logger.info(f"END: Created vector index for collection: {collection_name}")
+
+        return True
 
     async def reset_vector_index(self, collection_name: str, 
-                                       index_type: str = PgVectorIndexTypeEnums.HNSW.value) -> bool:
-        
-        index_name = self.default_index_name(collection_name)
-        async with self.db_client() as session:
-            async with session.begin():
-                drop_sql = sql_text(f'DROP INDEX IF EXISTS {index_name}')
-                await session.execute(drop_sql)
-        
-        return await self.create_vector_index(collection_name=collection_name, index_type=index_type)
+                                       index_type: str = None) -> bool:
+        # dropped and rebuilt under the build lock, a build in progress is left alone
+        return await self.create_vector_index(collection_name=collection_name, index_type=index_type,
+                                              do_reset=True)
 
     
     async def insert_one(self, collection_name: str, text: str, vector: list,
@@ -198,12 +420,14 @@ class PGVectorProvider(VectorDBInterface):
             self.logger.error(f"Can not insert new record without chunk_id: {collection_name}")
             return False
         
+        await self.ensure_chunk_id_unique(collection_name=collection_name)
+
         async with self.db_client() as session:
             async with session.begin():
-                insert_sql = sql_text(f'INSERT INTO {collection_name} '
-                                      f'({PgVectorTableSchemeEnums.TEXT.value}, {PgVectorTableSchemeEnums.VECTOR.value}, {PgVectorTableSchemeEnums.METADATA.value}, {PgVectorTableSchemeEnums.CHUNK_ID.value}) '
-                                      'VALUES (:text, :vector, :metadata, :chunk_id)'
-                                      )
+                insert_sql = sql_text(self.get_upsert_sql(
+                    collection_name=collection_name,
+                    source_sql='SELECT CAST(:text AS text), CAST(:vector AS vector), CAST(:metadata AS jsonb), CAST(:chunk_id AS integer)'
+                ))
                 
                 metadata_json = json.dumps(metadata, ensure_ascii=False) if metadata is not None else "{}"
                 await session.execute(insert_sql, {
@@ -212,15 +436,68 @@ class PGVectorProvider(VectorDBInterface):
                     'metadata': metadata_json,
                     'chunk_id': record_id
                 })
-
-        await self.create_vector_index(collection_name=collection_name)
         
+        await self.collection_registry.bump_version(collection_name)
         return True
     
 
+    async def copy_many(self, collection_name: str, texts: list,
+                        vectors: list, metadata: list,
+                        record_ids: list):
+        
+        # binary COPY: vectors travel as float4[] through asyncpg's builtin array codec and are cast
+        # to vector by Postgres, so neither side formats/parses a text literal per float and no
+        # vector codec has to be registered on the pooled connection.
+        # COPY can not resolve conflicts, so it fills a staging table that is then upserted in one statement
+        staging_table = f"staging_{collection_name}"
+        records = (
+            (
+                _text,
+                _vector,
+                json.dumps(_metadata, ensure_ascii=False) if _metadata is not None else "{}",
+                _record_id
+            )
+            for _text, _vector, _metadata, _record_id in zip(texts, vectors, metadata, record_ids)
+        )
+
+        async with self.db_client() as session:
+            async with session.begin():
+                # the chunks FK is checked once at commit instead of per row
+                await session.execute(sql_text('SET CONSTRAINTS ALL DEFERRED'))
+                await session.execute(sql_text(
+                    f'CREATE TEMP TABLE {staging_table} ('
+                    f'{PgVectorTableSchemeEnums.TEXT.value} text, {PgVectorTableSchemeEnums.VECTOR.value} real[], '
+                    f'{PgVectorTableSchemeEnums.METADATA.value} jsonb, {PgVectorTableSchemeEnums.CHUNK_ID.value} integer'
+                    f') ON COMMIT DROP'
+                ))
+
+                connection = await session.connection()
+                raw_connection = await connection.get_raw_connection()
+                await raw_connection.driver_connection.copy_records_to_table(
+                    staging_table,
+                    records=records,
+                    columns=[
+                        PgVectorTableSchemeEnums.TEXT.value,
+                        PgVectorTableSchemeEnums.VECTOR.value,
+                        PgVectorTableSchemeEnums.METADATA.value,
+                        PgVectorTableSchemeEnums.CHUNK_ID.value,
+                    ]
+                )
+
+                await session.execute(sql_text(self.get_upsert_sql(
+                    collection_name=collection_name,
+                    source_sql=f'SELECT {PgVectorTableSchemeEnums.TEXT.value}, '
+                               f'CAST({PgVectorTableSchemeEnums.VECTOR.value} AS vector), '
+                               f'{PgVectorTableSchemeEnums.METADATA.value}, {PgVectorTableSchemeEnums.CHUNK_ID.value} '
+                               f'FROM {staging_table}'
+                )))
+
+        return True
+
     async def insert_many(self, collection_name: str, texts: list,
                          vectors: list, metadata: list = None,
-                         record_ids: list = None, batch_size: int = 50):
+                         record_ids: list = None, batch_size: int = 50,
+                         bulk_load: bool = None):
         
         is_collection_existed = await self.is_collection_existed(collection_name=collection_name)
         if not is_collection_existed:
@@ -233,65 +510,110 @@ class PGVectorProvider(VectorDBInterface):
         
         if not metadata or len(metadata) == 0:
             metadata = [None] * len(texts)
-        
+
+        await self.ensure_chunk_id_unique(collection_name=collection_name)
+
+        # one statement can not update a row twice, the last record of a chunk wins
+        records = {
+            _record_id: (_text, _vector, _metadata)
+            for _text, _vector, _metadata, _record_id in zip(texts, vectors, metadata, record_ids)
+        }
+        record_ids = list(records.keys())
+        texts, vectors, metadata = [list(column) for column in zip(*records.values())] if records else ([], [], [])
+
+        bulk_load = self.bulk_load if bulk_load is None else bulk_load
+        if bulk_load:
+            _ = await self.copy_many(collection_name=collection_name, texts=texts,
+                                     vectors=vectors, metadata=metadata,
+                                     record_ids=record_ids)
+            await self.collection_registry.bump_version(collection_name)
+            return True
+
+        # each batch is a single upsert over unnested arrays instead of one row per parameter set
+        upsert_sql = sql_text(self.get_upsert_sql(
+            collection_name=collection_name,
+            source_sql='SELECT _text, CAST(_vector AS vector), CAST(_metadata AS jsonb), _chunk_id '
+                       'FROM unnest(CAST(:texts AS text[]), CAST(:vectors AS text[]), '
+                       'CAST(:metadata AS text[]), CAST(:chunk_ids AS integer[])) '
+                       'AS records(_text, _vector, _metadata, _chunk_id)'
+        ))
+
         async with self.db_client() as session:
             async with session.begin():
                 for i in range(0, len(texts), batch_size):
-                    batch_texts = texts[i:i+batch_size]
-                    batch_vectors = vectors[i:i + batch_size]
-                    batch_metadata = metadata[i:i + batch_size]
-                    batch_record_ids = record_ids[i:i + batch_size]
-
-                    values = []
-
-                    for _text, _vector, _metadata, _record_id in zip(batch_texts, batch_vectors, batch_metadata, batch_record_ids):
-                        
-                        metadata_json = json.dumps(_metadata, ensure_ascii=False) if _metadata is not None else "{}"
-                        values.append({
-                            'text': _text,
-                            'vector': "[" + ",".join([ str(v) for v in _vector ]) + "]",
-                            'metadata': metadata_json,
-                            'chunk_id': _record_id
-                        })
-                    
-                    batch_insert_sql = sql_text(f'INSERT INTO {collection_name} '
-                                    f'({PgVectorTableSchemeEnums.TEXT.value}, '
-                                    f'{PgVectorTableSchemeEnums.VECTOR.value}, '
-                                    f'{PgVectorTableSchemeEnums.METADATA.value}, '
-                                    f'{PgVectorTableSchemeEnums.CHUNK_ID.value}) '
-                                    f'VALUES (:text, :vector, :metadata, :chunk_id)')
-                    
-                    await session.execute(batch_insert_sql, values)
-                    
-        await self.create_vector_index(collection_name=collection_name)
-
-
+                    await session.execute(upsert_sql, {
+                        'texts': texts[i:i+batch_size],
+                        'vectors': [
+                            "[" + ",".join([ str(v) for v in _vector ]) + "]"
+                            for _vector in vectors[i:i+batch_size]
+                        ],
+                        'metadata': [
+                            json.dumps(_metadata, ensure_ascii=False) if _metadata is not None else "{}"
+                            for _metadata in metadata[i:i+batch_size]
+                        ],
+                        'chunk_ids': record_ids[i:i+batch_size],
+                    })
+
+        await self.collection_registry.bump_version(collection_name)
         return True
     
-    async def search_by_vector(self, collection_name: str, vector: list, limit: int):
+    async def delete_records(self, collection_name: str, record_ids: list) -> bool:
+        
+        if not record_ids or not await self.is_collection_existed(collection_name=collection_name):
+            return False
+        
+        async with self.db_client() as session:
+            async with session.begin():
+                delete_sql = sql_text(f'DELETE FROM {collection_name} '
+                                      f'WHERE {PgVectorTableSchemeEnums.CHUNK_ID.value} = ANY(:record_ids)')
+                await session.execute(delete_sql, {'record_ids': list(record_ids)})
+        
+        await self.collection_registry.bump_version(collection_name)
+        return True
+    
+    def get_score(self, distance: float) -> float:
+        if self.distance_operator == PgVectorDistanceOperatorEnums.COSINE.value:
+            return 1 - distance
+        # <#> returns the negative inner product, <-> the euclidean distance
+        return -distance
+
+    def get_search_sql(self, collection_name: str) -> str:
+        # ORDER BY <vector op param> LIMIT k is the shape the ANN index can serve;
+        # ordering by a derived score forces a sequential scan.
+        distance_sql = f'{PgVectorTableSchemeEnums.VECTOR.value} {self.distance_operator} CAST(:vector AS vector)'
+        return (f'SELECT {PgVectorTableSchemeEnums.TEXT.value} as text, {distance_sql} as distance'
+                f' FROM {collection_name}'
+                f' ORDER BY {distance_sql} '
+                'LIMIT :limit')
+
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int,
+                               ef_search: int = None, probes: int = None):
 
         is_collection_existed = await self.is_collection_existed(collection_name=collection_name)
         if not is_collection_existed:
             self.logger.error(f"Can not search for records in a non-existed collection: {collection_name}")
             return False
         
+        # hnsw returns at most ef_search candidates, keep it above the requested limit
+        ef_search = max(int(ef_search if ef_search else self.hnsw_ef_search), int(limit))
+        probes = int(probes if probes else self.ivfflat_probes)
+
         vector = "[" + ",".join([ str(v) for v in vector ]) + "]"
         async with self.db_client() as session:
             async with session.begin():
-                search_sql = sql_text(f'SELECT {PgVectorTableSchemeEnums.TEXT.value} as text, 1 - ({PgVectorTableSchemeEnums.VECTOR.value} <=> :vector) as score'
-                                      f' FROM {collection_name}'
-                                      ' ORDER BY score DESC '
-                                      f'LIMIT {limit}'
-                                      )
+                await session.execute(sql_text(f'SET LOCAL hnsw.ef_search = {ef_search}'))
+                await session.execute(sql_text(f'SET LOCAL ivfflat.probes = {probes}'))
+
+                search_sql = sql_text(self.get_search_sql(collection_name=collection_name))
                 
-                result = await session.execute(search_sql, {"vector": vector})
+                result = await session.execute(search_sql, {"vector": vector, "limit": limit})
 
                 records = result.fetchall()
 
                 return [
                     RetreivedDocument(
                         text=record.text,
-                        score=record.score
+                        score=self.get_score(record.distance)
                     )
                     for record in records
-                ]
\ No newline at end of file
+                ]
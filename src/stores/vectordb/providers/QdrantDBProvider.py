@@ -1,6 +1,8 @@
-from qdrant_client import QdrantClient,models
+from qdrant_client import AsyncQdrantClient,models
 from ..VectorDBInterface import VectorDBInterface
-from ..VectorDBEnums import DistanceMethodEnums
+from ..VectorDBEnums import DistanceMethodEnums, QdrantModeEnums
+from ..CollectionRegistry import CollectionRegistry
+import asyncio
 import logging
 from models.db_schemes import RetreivedDocument
 from typing import List
@@ -9,13 +11,30 @@ class QdrantDBProvider(VectorDBInterface):
     def __init__(self,db_client:str,
                  default_vector_size:int = 786,
                  distance_method:str = None,
-                 index_threshold: int = 100):
+                 index_threshold: int = 100,
+                 collection_cache_ttl: int = 60,
+                 mode: str = QdrantModeEnums.LOCAL.value,
+                 url: str = None,
+                 grpc_port: int = 6334,
+                 prefer_grpc: bool = True,
+                 api_key: str = None,
+                 upload_parallel: int = 4,
+                 redis_url: str = None,
+                 version_cache_ttl: float = 1):
         super().__init__()
         self.client = None
         self.db_client = db_client
+        self.mode = mode
+        self.url = url
+        self.grpc_port = grpc_port
+        self.prefer_grpc = prefer_grpc
+        self.api_key = api_key
+        self.upload_parallel = upload_parallel
         self.default_vector_size = default_vector_size
         self.distance_method = None
         self.index_threshold = index_threshold
+        self.collection_registry = CollectionRegistry(ttl_seconds=collection_cache_ttl, redis_url=redis_url,
+                                                      version_cache_ttl=version_cache_ttl)
         
         if distance_method == DistanceMethodEnums.DOT.value:
             self.distance_method = models.Distance.DOT
@@ -25,24 +44,47 @@ class QdrantDBProvider(VectorDBInterface):
         self.logger = logging.getLogger("uvicorn")
         
     async def connect(self):
-        self.client = QdrantClient(path=self.db_client)
+        # one client per provider, reused by every request of this worker
+        if self.client is not None:
+            return
+        
+        if self.mode == QdrantModeEnums.SERVER.value:
+            self.client = AsyncQdrantClient(url=self.url,
+                                            grpc_port=self.grpc_port,
+                                            prefer_grpc=self.prefer_grpc,
+                                            api_key=self.api_key)
+        else:
+            # embedded mode locks the storage folder, a single worker only
+            self.client = AsyncQdrantClient(path=self.db_client)
     
     async def disconnect(self):
+        if self.client is not None:
+            await self.client.close()
         self.client = None
+        await self.collection_registry.close()
         
     async def is_collection_existed(self,collection_name:str) -> bool :
-        return self.client.collection_exists(collection_name=collection_name)
+        if self.collection_registry.is_existed(collection_name):
+            return True
+        
+        is_existed = await self.client.collection_exists(collection_name=collection_name)
+        if is_existed:
+            self.collection_registry.set(collection_name, is_existed=True)
+        return is_existed
     
     async def list_all_collections(self) -> list:
-        return self.client.get_collections()
+        return await self.client.get_collections()
     
     async def get_collection_info(self, collection_name):
-        return self.client.get_collection(collection_name=collection_name)
+        return await self.client.get_collection(collection_name=collection_name)
     
     async def delete_collection(self,collection_name:str):
         if await self.is_collection_existed(collection_name=collection_name):
             self.logger.info(f"Deleting collection: {collection_name}")
-            return self.client.delete_collection(collection_name=collection_name) 
+            self.collection_registry.invalidate(collection_name)
+            result = await self.client.delete_collection(collection_name=collection_name)
+            await self.collection_registry.bump_version(collection_name)
+            return result
     
     
     async def create_collection(self,collection_name:str,
@@ -55,10 +97,13 @@ class QdrantDBProvider(VectorDBInterface):
         if not await self.is_collection_existed(collection_name=collection_name):
             self.logger.info(f"Creating new qdrant collection: {collection_name}")
             
-            self.client.create_collection(
-            collection_name=collection_name,
-            vectors_config=models.VectorParams(size=collection_size, distance=self.distance_method)
-        )
+            await self.client.create_collection(
+                collection_name=collection_name,
+                vectors_config=models.VectorParams(size=collection_size, distance=self.distance_method)
+            )
+            self.collection_registry.set(collection_name, is_existed=True,
+                                         dimension=collection_size,
+                                         distance=str(self.distance_method))
         else:
             return False
     
@@ -71,11 +116,11 @@ class QdrantDBProvider(VectorDBInterface):
             return False
         
         try:
-            _ = self.client.upload_records(
+            _ = await self.client.upsert(
                 collection_name=collection_name,
-                records=[
-                    models.Record(
-                        id=[record_id],
+                points=[
+                    models.PointStruct(
+                        id=record_id,
                         vector=vector,
                         payload={
                             "text": text, "metadata": metadata
@@ -86,6 +131,8 @@ class QdrantDBProvider(VectorDBInterface):
         except Exception as e:
             self.logger.error(f"Error while inserting batch: {e}")
             return False
+        finally:
+            await self.collection_registry.bump_version(collection_name)
 
         return True
     
@@ -99,43 +146,80 @@ class QdrantDBProvider(VectorDBInterface):
         if record_ids is None:
             record_ids = list(range(0, len(texts)))
 
-        for i in range(0, len(texts), batch_size):
-            batch_end = i + batch_size
+        points = [
+            models.PointStruct(
+                id=record_ids[x],
+                vector=vectors[x],
+                payload={
+                    "text": texts[x], "metadata": metadata[x]
+                }
+            )
+            for x in range(len(texts))
+        ]
 
-            batch_texts = texts[i:batch_end]
-            batch_vectors = vectors[i:batch_end]
-            batch_metadata = metadata[i:batch_end]
-            batch_record_ids = record_ids[i:batch_end]
+        # the embedded storage is written by one caller at a time, a server takes concurrent batches
+        parallel = self.upload_parallel if self.mode == QdrantModeEnums.SERVER.value else 1
+        semaphore = asyncio.Semaphore(parallel)
 
-            batch_records = [
-                models.Record(
-                    id=batch_record_ids[x],
-                    vector=batch_vectors[x],
-                    payload={
-                        "text": batch_texts[x], "metadata": batch_metadata[x]
-                    }
-                )
+        async def upsert_batch(batch: list):
+            # wait=True: done only once qdrant applied the points, callers mark the chunks indexed after it
+            async with semaphore:
+                await self.client.upsert(collection_name=collection_name, points=batch, wait=True)
 
-                for x in range(len(batch_texts))
-            ]
+        try:
+            await asyncio.gather(*[
+                upsert_batch(points[i:i+batch_size])
+                for i in range(0, len(points), batch_size)
+            ])
+        except Exception as e:
+            self.logger.error(f"Error while inserting batch: {e}")
+            return False
+        finally:
+            await self.collection_registry.bump_version(collection_name)
 
-            try:
-                _ = self.client.upload_records(
-                    collection_name=collection_name,
-                    records=batch_records,
-                )
-            except Exception as e:
-                self.logger.error(f"Error while inserting batch: {e}")
-                return False
+        return True
+    
+    async def delete_records(self, collection_name: str, record_ids: list) -> bool:
+        
+        if not record_ids or not await self.is_collection_existed(collection_name):
+            return False
+        
+        try:
+            _ = await self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=record_ids)
+            )
+        except Exception as e:
+            self.logger.error(f"Error while deleting records: {e}")
+            return False
+        finally:
+            await self.collection_registry.bump_version(collection_name)
 
         return True
     
+    async def create_vector_index(self, collection_name: str, index_type: str = None) -> bool:
+        # qdrant builds the HNSW graph itself once a segment passes its indexing threshold
+        return False
+    
+    async def get_vector_index_status(self, collection_name: str) -> dict:
+        if not await self.is_collection_existed(collection_name=collection_name):
+            return {"is_existed": False}
+        
+        collection_info = await self.client.get_collection(collection_name=collection_name)
+        return {
+            "is_existed": True,
+            "status": str(collection_info.status),
+            "points_count": collection_info.points_count,
+            "indexed_vectors_count": collection_info.indexed_vectors_count,
+        }
      
-    async def search_by_vector(self,collection_name:str , vector:list, limit:int = 5) -> List[RetreivedDocument]:
-        results =  self.client.search(
+    async def search_by_vector(self,collection_name:str , vector:list, limit:int = 5,
+                               ef_search:int = None, probes:int = None) -> List[RetreivedDocument]:
+        results = await self.client.search(
             collection_name=collection_name,
             query_vector=vector,
-            limit=limit
+            limit=limit,
+            search_params=models.SearchParams(hnsw_ef=ef_search) if ef_search else None
         )
         if not results or len(results) == 0 :
             return None
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from stores.vectordb.CollectionRegistry import CollectionRegistry
+
+COLLECTION_NAME = "collection_1"
+
+def run(test, version_cache_ttl: float = 0):
+    # two registries on the same redis stand for two processes (an api worker and an ingestion worker)
+    async def main():
+        server = fakeredis.FakeServer()
+        registries = [
+            CollectionRegistry(redis=fakeredis.aioredis.FakeRedis(server=server), version_cache_ttl=version_cache_ttl)
+            for _ in range(2)
+        ]
+        try:
+            await test(*registries)
+        finally:
+            for registry in registries:
+                await registry.close()
+
+    asyncio.run(main())
+
+def test_bump_is_seen_by_other_processes():
+
+    async def test(reader: CollectionRegistry, writer: CollectionRegistry):
+        assert await reader.get_version(COLLECTION_NAME) == 0
+
+        assert await writer.bump_version(COLLECTION_NAME) == 1
+        assert await writer.bump_version(COLLECTION_NAME) == 2
+        assert await reader.get_version(COLLECTION_NAME) == 2
+        assert await reader.get_version("collection_2") == 0
+
+    run(test)
+
+def test_version_is_reused_for_version_cache_ttl():
+
+    async def test(reader: CollectionRegistry, writer: CollectionRegistry):
+        assert await reader.get_version(COLLECTION_NAME) == 0
+
+        await writer.bump_version(COLLECTION_NAME)
+        assert await reader.get_version(COLLECTION_NAME) == 0
+        # a process sees its own writes right away
+        assert await writer.get_version(COLLECTION_NAME) == 1
+
+        reader.versions.clear()
+        assert await reader.get_version(COLLECTION_NAME) == 1
+
+    run(test, version_cache_ttl=60)
+
+def test_unreadable_version_is_none():
+
+    # caches are bypassed rather than keyed by a version that may be outdated
+    async def main():
+        server = fakeredis.FakeServer()
+        server.connected = False
+        registry = CollectionRegistry(redis=fakeredis.aioredis.FakeRedis(server=server))
+        try:
+            assert await registry.get_version(COLLECTION_NAME) is None
+            assert await registry.bump_version(COLLECTION_NAME) is None
+        finally:
+            await registry.close()
+
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+import os
+import pytest
+
+# runs against the database configured through POSTGRES_* (with the alembic migrations applied)
+POSTGRES_SETTINGS = ["POSTGRES_USERNAME", "POSTGRES_PASSWORD", "POSTGRES_HOST",
+                     "POSTGRES_PORT", "POSTGRES_MAIN_DATABASE"]
+if not all(os.environ.get(name) for name in POSTGRES_SETTINGS):
+    pytest.skip("POSTGRES_* is not set", allow_module_level=True)
+
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import text as sql_text
+from stores.vectordb.providers import PGVectorProvider
+from stores.vectordb.VectorDBEnums import DistanceMethodEnums, PgVectorIndexTypeEnums
+
+COLLECTION_NAME = "pgvector_test_search_plan"
+RECORDS_COUNT = 2000
+
+async def get_search_plan() -> list:
+
+    db_engine = create_async_engine(
+        f"postgresql+asyncpg://{os.environ['POSTGRES_USERNAME']}:{os.environ['POSTGRES_PASSWORD']}"
+        f"@{os.environ['POSTGRES_HOST']}:{os.environ['POSTGRES_PORT']}/{os.environ['POSTGRES_MAIN_DATABASE']}"
+    )
+    db_client = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    provider = PGVectorProvider(db_client=db_client, default_vector_size=3,
+                                distance_method=DistanceMethodEnums.COSINE.value,
+                                index_type=PgVectorIndexTypeEnums.HNSW.value,
+                                index_threshold=1)
+
+    try:
+        async with db_client() as session:
+            if (await session.execute(sql_text("SELECT to_regclass('chunks')"))).scalar_one() is None:
+                pytest.skip("the chunks table is missing, run the alembic migrations first")
+
+        await provider.connect()
+        await provider.create_collection(collection_name=COLLECTION_NAME, collection_size=3, do_reset=True)
+
+        # the collection's chunk_id references chunks, the rows are loaded without one
+        async with db_client() as session:
+            async with session.begin():
+                await session.execute(sql_text(
+                    f"INSERT INTO {COLLECTION_NAME} (text, vector) "
+                    f"SELECT 'doc ' || i, CAST(ARRAY[random(), random(), random()] AS vector) "
+                    f"FROM generate_series(1, {RECORDS_COUNT}) AS i"
+                ))
+                await session.execute(sql_text(f"ANALYZE {COLLECTION_NAME}"))
+
+        assert await provider.create_vector_index(collection_name=COLLECTION_NAME)
+
+        async with db_client() as session:
+            async with session.begin():
+                # the tiny table is cheap to scan, this shows whether the query can use the index at all
+                await session.execute(sql_text("SET LOCAL enable_seqscan = off"))
+                plan = await session.execute(
+                    sql_text("EXPLAIN " + provider.get_search_sql(collection_name=COLLECTION_NAME)),
+                    {"vector": "[0.1,0.2,0.3]", "limit": 5}
+                )
+                return plan.scalars().all()
+    finally:
+        await provider.delete_collection(collection_name=COLLECTION_NAME)
+        await db_engine.dispose()
+
+def test_search_uses_vector_index():
+    plan = asyncio.run(get_search_plan())
+
+    assert any(f"Index Scan using {COLLECTION_NAME}_vector_idx" in line for line in plan), "\n".join(plan)
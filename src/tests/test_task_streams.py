@@ -0,0 +1,130 @@
+import asyncio
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from utils.task_streams import TaskStreams
+
+STAGES = ["parse", "chunk"]
+
+def run(test):
+    # each test gets its own empty redis
+    async def main():
+        task_streams = TaskStreams(shards=2, redis=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+        await task_streams.ensure_groups(stages=STAGES)
+        try:
+            await test(task_streams)
+        finally:
+            await task_streams.close()
+
+    asyncio.run(main())
+
+async def read(task_streams: TaskStreams, stage: str, consumer: str = "worker-0") -> list:
+    return await task_streams.read(stage=stage, consumer=consumer, count=100, block_ms=None)
+
+async def count_unacked(task_streams: TaskStreams, stage: str) -> int:
+    counts = [
+        (await task_streams.redis.xpending(task_streams.stream_key(stage, shard), stage))["pending"]
+        for shard in range(task_streams.shards)
+    ]
+    return sum(counts)
+
+def test_publish_and_complete_track_pending_tasks():
+
+    async def test(task_streams: TaskStreams):
+        await task_streams.publish(job_id=1, tasks=[("parse", 1, {"asset_id": 1}), ("parse", 2, {"asset_id": 2})])
+        assert (await task_streams.get_job_state(job_id=1))["pending"] == 2
+
+        first, second = sorted(await read(task_streams, "parse"), key=lambda m: m["payload"]["asset_id"])
+        assert first["job_id"] == 1 and first["attempt"] == 0
+
+        # a parent is replaced by its children in the same transaction that acks it
+        await task_streams.complete(message=first, tasks=[("chunk", 1, {"part": 0}), ("chunk", 1, {"part": 1})],
+                                    total=2)
+        assert (await task_streams.get_job_state(job_id=1))["pending"] == 3
+
+        await task_streams.complete(message=second)
+        assert (await task_streams.get_job_state(job_id=1))["pending"] == 2
+
+        chunk_messages = await read(task_streams, "chunk")
+        assert sorted(m["payload"]["part"] for m in chunk_messages) == [0, 1]
+        for message in chunk_messages:
+            await task_streams.complete(message=message, processed=1)
+
+        state = await task_streams.get_job_state(job_id=1)
+        assert (state["pending"], state["processed"], state["total"], state["failed"]) == (0, 2, 2, 0)
+        assert await count_unacked(task_streams, "parse") == 0
+        assert await count_unacked(task_streams, "chunk") == 0
+
+    run(test)
+
+def test_failing_task_is_retried_up_to_max_attempts_then_failed():
+
+    async def test(task_streams: TaskStreams):
+        attempts = []
+
+        async def handler(payload):
+            attempts.append(payload)
+            raise RuntimeError("parser crashed")
+
+        await task_streams.publish(job_id=2, tasks=[("parse", 1, {"asset_id": 1})])
+
+        for attempt in range(3):
+            messages = await read(task_streams, "parse")
+            assert [m["attempt"] for m in messages] == [attempt]
+            await task_streams.process(message=messages[0], handler=handler, max_attempts=3)
+
+        assert len(attempts) == 3
+        assert await read(task_streams, "parse") == []
+
+        state = await task_streams.get_job_state(job_id=2)
+        assert (state["pending"], state["failed"]) == (0, 1)
+        assert state["error"] == "parse: parser crashed"
+        assert await count_unacked(task_streams, "parse") == 0
+
+    run(test)
+
+def test_unacked_task_is_claimed_by_another_consumer():
+
+    async def test(task_streams: TaskStreams):
+        await task_streams.publish(job_id=3, tasks=[("parse", 1, {"asset_id": 1})])
+
+        # delivered to a worker that dies before acking it
+        delivered = await read(task_streams, "parse", consumer="worker-dead")
+        assert len(delivered) == 1
+
+        assert await task_streams.claim_stale(stage="parse", consumer="worker-1", min_idle_ms=60000) == []
+
+        claimed = await task_streams.claim_stale(stage="parse", consumer="worker-1", min_idle_ms=0)
+        assert [m["message_id"] for m in claimed] == [delivered[0]["message_id"]]
+        assert claimed[0]["payload"] == {"asset_id": 1}
+
+        await task_streams.process(message=claimed[0], handler=lambda payload: asyncio.sleep(0, result={}))
+
+        assert (await task_streams.get_job_state(job_id=3))["pending"] == 0
+        assert await count_unacked(task_streams, "parse") == 0
+
+    run(test)
+
+def test_cancelled_job_drops_its_tasks():
+
+    async def test(task_streams: TaskStreams):
+        handled = []
+
+        async def handler(payload):
+            handled.append(payload)
+            return {"tasks": [("chunk", 1, {"part": 0})]}
+
+        await task_streams.publish(job_id=4, tasks=[("parse", 1, {"asset_id": 1}), ("parse", 2, {"asset_id": 2})])
+        await task_streams.cancel_job(job_id=4)
+        assert (await task_streams.get_job_state(job_id=4))["cancelled"]
+
+        for message in await read(task_streams, "parse"):
+            await task_streams.process(message=message, handler=handler)
+
+        assert handled == []
+        assert await read(task_streams, "chunk") == []
+        assert (await task_streams.get_job_state(job_id=4))["pending"] == 0
+        assert await count_unacked(task_streams, "parse") == 0
+
+    run(test)
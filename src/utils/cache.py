@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import unicodedata
+import hashlib
+import time
+
+def normalize_query(text: str) -> str:
+    # casing, unicode forms and whitespace don't make a different question
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+def get_query_hash(text: str) -> str:
+    # the one key of a question for every cache and flight keyed by it, so they can't drift apart
+    return hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+
+class LRUCache:
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            return default
+
+        value, expires_at = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._items[key]
+            return default
+
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._items[key] = (value, expires_at)
+        self._items.move_to_end(key)
+
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._items.pop(key, None)
+
+    def clear(self):
+        self._items.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,191 @@
+from models.JobModel import JobModel
+from models.db_schemes import Job
+from models.enums.JobEnums import JobStatusEnum
+from datetime import datetime, timezone
+import asyncio
+import logging
+
+class JobContext:
+    """
+    Handed to a job handler: keeps the processed count and checkpoint of the run and persists them,
+    which also refreshes the heartbeat. Raises CancelledError when the job was cancelled elsewhere.
+    """
+
+    def __init__(self, job_model: JobModel, job: Job):
+        self.job_model = job_model
+        self.job = job
+        self.processed_count = job.job_processed_count or 0
+        self.checkpoint = dict(job.job_checkpoint or {})
+        self.is_resumed = job.job_checkpoint is not None
+        self.lock = asyncio.Lock()
+
+    async def progress(self, count: int = 0, checkpoint: dict = None, total_count: int = None):
+        # several workers of a job may report at once, the lock keeps the writes ordered
+        async with self.lock:
+            self.processed_count += count
+            if checkpoint is not None:
+                self.checkpoint.update(checkpoint)
+
+            job_status = await self.job_model.update_job_progress(job_id=self.job.job_id,
+                                                                  processed_count=self.processed_count,
+                                                                  total_count=total_count,
+                                                                  checkpoint=self.checkpoint)
+
+        if job_status == JobStatusEnum.CANCELLED.value:
+            raise asyncio.CancelledError()
+
+    async def is_cancelled(self) -> bool:
+        # tells a cancellation of the job apart from a shutdown interrupting it
+        job = await self.job_model.get_job(job_id=self.job.job_id)
+        return job is not None and job.job_status == JobStatusEnum.CANCELLED.value
+
+class JobManager:
+    """
+    Runs jobs persisted in the jobs table as asyncio tasks of this process.
+    Running jobs send heartbeats; jobs whose heartbeat went stale (the process running them died)
+    are claimed and resumed from their checkpoint, including the ones left over by the last restart.
+    """
+
+    def __init__(self, db_client, heartbeat_seconds: int = 30, stale_seconds: int = 120):
+        self.job_model = JobModel(db_client=db_client)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+
+        self.handlers = {}
+        self.tasks = {}
+        self.heartbeat_task = None
+
+        self.logger = logging.getLogger("uvicorn")
+
+    def register(self, job_type: str, handler):
+        # handler(job, context) -> result dict stored with the job
+        self.handlers[job_type] = handler
+
+    async def start(self):
+        self.heartbeat_task = asyncio.create_task(self.heartbeat())
+
+    async def stop(self):
+        # interrupted jobs keep their running status and are resumed by the next process
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def heartbeat(self):
+        while True:
+            try:
+                await self.job_model.touch_jobs(job_ids=list(self.tasks.keys()))
+
+                stale_jobs = await self.job_model.claim_stale_jobs(stale_seconds=self.stale_seconds)
+                for job in stale_jobs:
+                    if job.job_id not in self.tasks:
+                        self.logger.info(f"Resuming job: {job.job_id}")
+                        self.run(job=job)
+            except Exception as e:
+                self.logger.error(f"Error while sending job heartbeats: {e}")
+
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    async def submit(self, job_type: str, project_id: int, params: dict = None):
+
+        job = await self.job_model.create_job(
+            Job(
+                job_type=job_type,
+                job_status=JobStatusEnum.PENDING.value,
+                job_params=params,
+                job_processed_count=0,
+                job_run_start_count=0,
+                job_project_id=project_id
+            )
+        )
+        self.run(job=job)
+        return job
+
+    def run(self, job: Job):
+        task = asyncio.create_task(self.execute(job=job))
+        self.tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(job.job_id, None))
+        return task
+
+    async def execute(self, job: Job):
+
+        handler = self.handlers.get(job.job_type)
+        if handler is None:
+            await self.job_model.finish_job(job_id=job.job_id, job_status=JobStatusEnum.FAILED.value,
+                                            job_error=f"Unknown job type: {job.job_type}")
+            return
+
+        job = await self.job_model.start_job(job_id=job.job_id)
+        if job is None:
+            return
+
+        context = JobContext(job_model=self.job_model, job=job)
+
+        try:
+            result = await handler(job, context)
+        except asyncio.CancelledError:
+            # either cancelled through cancel() (the status is already written) or interrupted by a shutdown
+            return
+        except Exception as e:
+            self.logger.error(f"Job {job.job_id} failed: {e}")
+            await self.job_model.finish_job(job_id=job.job_id, job_status=JobStatusEnum.FAILED.value,
+                                            job_error=str(e))
+            return
+
+        await self.job_model.finish_job(job_id=job.job_id, job_status=JobStatusEnum.SUCCEEDED.value,
+                                        job_result=result)
+
+    async def cancel(self, job_id: int):
+        # None: unknown job, False: already finished
+        job = await self.job_model.get_job(job_id=job_id)
+        if job is None:
+            return None
+
+        if job.job_status not in JobModel.ACTIVE_STATUSES:
+            return False
+
+        # the status is written first so a process running the job elsewhere stops at its next progress update
+        await self.job_model.finish_job(job_id=job_id, job_status=JobStatusEnum.CANCELLED.value)
+
+        task = self.tasks.get(job_id)
+        if task:
+            task.cancel()
+
+        return True
+
+    def get_job_throughput(self, job: Job):
+        # items per second over the current run
+        if job.started_at is None:
+            return None
+
+        finished_at = job.finished_at or datetime.now(timezone.utc)
+        elapsed = (finished_at - job.started_at).total_seconds()
+        if elapsed <= 0:
+            return None
+
+        return round((job.job_processed_count - job.job_run_start_count) / elapsed, 2)
+
+    async def get_job_status(self, job_id: int):
+
+        job = await self.job_model.get_job(job_id=job_id)
+        if job is None:
+            return None
+
+        return {
+            "job_id": job.job_id,
+            "job_uuid": str(job.job_uuid),
+            "job_type": job.job_type,
+            "job_status": job.job_status,
+            "project_id": job.job_project_id,
+            "processed_chunks": job.job_processed_count,
+            "total_chunks": job.job_total_count,
+            "throughput": self.get_job_throughput(job=job),
+            "result": job.job_result,
+            "error": job.job_error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
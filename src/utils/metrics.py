@@ -6,6 +6,17 @@ import time
 # Define metrics
 REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP Requests', ['method', 'endpoint', 'status'])
 REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'HTTP Request Latency', ['method', 'endpoint'])
+EMBEDDING_CACHE_HITS = Counter('embedding_cache_hits_total', 'Embedding Cache Hits', ['tier'])
+EMBEDDING_CACHE_MISSES = Counter('embedding_cache_misses_total', 'Embedding Cache Misses')
+# hit ratio: sum(rate(query_embedding_cache_hits_total)) / (that + rate(query_embedding_cache_misses_total))
+QUERY_EMBEDDING_CACHE_HITS = Counter('query_embedding_cache_hits_total', 'Query Embedding Cache Hits', ['tier'])
+QUERY_EMBEDDING_CACHE_MISSES = Counter('query_embedding_cache_misses_total', 'Query Embedding Cache Misses')
+ANSWER_CACHE_HITS = Counter('answer_cache_hits_total', 'Semantic Answer Cache Hits')
+ANSWER_CACHE_MISSES = Counter('answer_cache_misses_total', 'Semantic Answer Cache Misses')
+RETRIEVAL_CACHE_HITS = Counter('retrieval_cache_hits_total', 'Retrieval Cache Hits')
+RETRIEVAL_CACHE_MISSES = Counter('retrieval_cache_misses_total', 'Retrieval Cache Misses')
+SINGLE_FLIGHT_COALESCED = Counter('single_flight_coalesced_total', 'Requests Served By An In-Flight Computation', ['tier'])
+RAG_ANSWER_TIME_TO_FIRST_TOKEN = Histogram('rag_answer_time_to_first_token_seconds', 'Time To The First Streamed Answer Token')
 
 class PrometheusMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
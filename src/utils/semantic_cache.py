@@ -0,0 +1,76 @@
+from utils.metrics import ANSWER_CACHE_HITS, ANSWER_CACHE_MISSES
+from typing import Any
+import numpy as np
+import time
+
+class SemanticAnswerCache:
+    """
+    Answers of recent questions per collection, looked up by cosine similarity of the query vector.
+    Each collection keeps its entries in a small in-memory matrix searched with one dot product;
+    an entry only matches while the collection version it was answered against is current.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, max_entries: int = 1000, ttl_seconds: float = 3600):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        # collection_name -> {"version": int, "vectors": np.ndarray (n, dim), "entries": [dict]}
+        self.collections = {}
+
+    def normalize(self, vector: list) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get_collection(self, collection_name: str, version: int) -> dict:
+        # entries answered against an older version of the collection are dropped as a whole
+        collection = self.collections.get(collection_name)
+        if collection is None or collection["version"] != version:
+            collection = {"version": version, "vectors": None, "entries": []}
+            self.collections[collection_name] = collection
+        return collection
+
+    def get(self, collection_name: str, version: int, vector: list, limit: int) -> Any:
+
+        collection = self.collections.get(collection_name)
+        if collection is None or collection["version"] != version or not collection["entries"]:
+            ANSWER_CACHE_MISSES.inc()
+            return None
+
+        similarities = collection["vectors"] @ self.normalize(vector)
+        now = time.monotonic()
+
+        # best match first, skipping expired entries and ones retrieved with another limit
+        for idx in np.argsort(-similarities):
+            if similarities[idx] < self.similarity_threshold:
+                break
+            entry = collection["entries"][idx]
+            if entry["expires_at"] >= now and entry["limit"] == limit:
+                ANSWER_CACHE_HITS.inc()
+                return entry["value"]
+
+        ANSWER_CACHE_MISSES.inc()
+        return None
+
+    def set(self, collection_name: str, version: int, vector: list, limit: int, value: Any):
+
+        collection = self.get_collection(collection_name=collection_name, version=version)
+        now = time.monotonic()
+
+        # expired entries go first, then the oldest ones beyond max_entries
+        keep = [
+            idx for idx, entry in enumerate(collection["entries"])
+            if entry["expires_at"] >= now
+        ][-(self.max_entries - 1):] if self.max_entries > 1 else []
+
+        entries = [collection["entries"][idx] for idx in keep]
+        vectors = [collection["vectors"][keep]] if keep else []
+
+        entries.append({"limit": limit, "value": value, "expires_at": now + self.ttl})
+        vectors.append(self.normalize(vector)[np.newaxis, :])
+
+        collection["entries"] = entries
+        collection["vectors"] = np.vstack(vectors)
+
+    def invalidate(self, collection_name: str):
+        self.collections.pop(collection_name, None)
@@ -0,0 +1,118 @@
+from utils.metrics import SINGLE_FLIGHT_COALESCED
+from redis.asyncio import Redis
+from typing import Any, Awaitable, Callable
+import asyncio
+import logging
+import json
+import time
+import uuid
+
+# deletes the lock only while it is still held by the given token
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation whose result they all get.
+    In a process, callers await the same task. With a redis_url, the process holding the key's lock
+    computes and publishes the result under its lock token; other processes wait for it, so only
+    calls that were in flight together share a result. Results must be JSON serializable across processes.
+    """
+
+    def __init__(self, redis_url: str = None, prefix: str = "single_flight",
+                 lock_ttl_seconds: float = 60, result_ttl_seconds: float = 10, poll_seconds: float = 0.05):
+        self.redis = Redis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self.prefix = prefix
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self.poll_seconds = poll_seconds
+
+        self.flights = {}
+
+        self.logger = logging.getLogger("uvicorn")
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+
+        task = self.flights.get(key)
+        if task is None:
+            # not tied to the caller, a disconnecting client doesn't cancel the others' result
+            task = asyncio.create_task(self.run(key=key, fn=fn))
+            self.flights[key] = task
+            task.add_done_callback(lambda _: self.flights.pop(key, None))
+        else:
+            SINGLE_FLIGHT_COALESCED.labels(tier="memory").inc()
+
+        return await asyncio.shield(task)
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.redis is None:
+            return await fn()
+
+        lock_key = f"{self.prefix}:lock:{key}"
+        deadline = time.monotonic() + self.lock_ttl_seconds
+
+        while time.monotonic() < deadline:
+            token = uuid.uuid4().hex
+            try:
+                is_leader = await self.redis.set(lock_key, token, nx=True, px=int(self.lock_ttl_seconds * 1000))
+                if not is_leader:
+                    leader_token = await self.redis.get(lock_key)
+                    found, result = (False, None)
+                    if leader_token is not None:
+                        found, result = await self.follow(key=key, lock_key=lock_key,
+                                                          leader_token=leader_token, deadline=deadline)
+            except Exception as e:
+                self.logger.error(f"Error while coalescing {key} through redis: {e}")
+                break
+
+            if is_leader:
+                return await self.lead(key=key, lock_key=lock_key, token=token, fn=fn)
+
+            if found:
+                SINGLE_FLIGHT_COALESCED.labels(tier="redis").inc()
+                return result
+            # the lock was released without a result (the leader failed), the next attempt may lead
+
+        # no usable result in time, computed here
+        return await fn()
+
+    async def lead(self, key: str, lock_key: str, token: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fn()
+            try:
+                await self.redis.set(f"{self.prefix}:result:{key}:{token}", json.dumps(result),
+                                     ex=max(1, int(self.result_ttl_seconds)))
+            except Exception as e:
+                self.logger.error(f"Error while publishing the result of {key}: {e}")
+            return result
+        finally:
+            try:
+                await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                # expires after lock_ttl_seconds
+                self.logger.error(f"Error while releasing the lock of {key}: {e}")
+
+    async def follow(self, key: str, lock_key: str, leader_token: str, deadline: float) -> tuple:
+        # (True, result) once the leader published it, (False, None) when it released the lock without one
+        result_key = f"{self.prefix}:result:{key}:{leader_token}"
+        while time.monotonic() < deadline:
+            value = await self.redis.get(result_key)
+            if value is not None:
+                return True, json.loads(value)
+
+            if await self.redis.get(lock_key) != leader_token:
+                # the result is written before the lock is released
+                value = await self.redis.get(result_key)
+                return (True, json.loads(value)) if value is not None else (False, None)
+
+            await asyncio.sleep(self.poll_seconds)
+
+        return False, None
@@ -0,0 +1,186 @@
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+import logging
+import json
+
+class TaskStreams:
+    """
+    Ingestion tasks over Redis streams: one stream per (stage, shard) and one consumer group per stage.
+    Tasks are sharded by asset, so a worker started for a subset of shards only sees those assets.
+    Delivery is at-least-once: a task is acked after its handler succeeded, and tasks left pending by
+    a dead consumer are claimed back after min_idle_ms. Each job keeps a counter of the tasks still
+    in flight; children are counted before their parent is acked, so it only reaches 0 once all are done.
+    """
+
+    def __init__(self, redis_url: str = "redis://localhost:6379", prefix: str = "ingestion",
+                 shards: int = 4, redis: Redis = None):
+        # an existing client (e.g. fakeredis) can be passed instead of a url
+        self.redis = redis if redis is not None else Redis.from_url(redis_url)
+        self.prefix = prefix
+        self.shards = shards
+
+        self.logger = logging.getLogger("uvicorn")
+
+    async def close(self):
+        await self.redis.aclose()
+
+    def stream_key(self, stage: str, shard: int) -> str:
+        return f"{self.prefix}:{stage}:{shard}"
+
+    def job_key(self, job_id: int) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def get_shard(self, shard_key: int) -> int:
+        return int(shard_key) % self.shards
+
+    async def ensure_groups(self, stages: list, shards: list = None):
+        shards = range(self.shards) if shards is None else shards
+        for stage in stages:
+            for shard in shards:
+                try:
+                    await self.redis.xgroup_create(name=self.stream_key(stage, shard), groupname=stage,
+                                                   id="0", mkstream=True)
+                except ResponseError as e:
+                    if "BUSYGROUP" not in str(e):
+                        raise
+
+    def decode_message(self, stage: str, stream_key, message_id, fields: dict) -> dict:
+        fields = {
+            (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+            for key, value in fields.items()
+        }
+        return {
+            "stage": stage,
+            "stream_key": stream_key.decode() if isinstance(stream_key, bytes) else stream_key,
+            "message_id": message_id.decode() if isinstance(message_id, bytes) else message_id,
+            "job_id": int(fields["job_id"]),
+            "attempt": int(fields.get("attempt", 0)),
+            "payload": json.loads(fields["payload"]),
+        }
+
+    def add_task(self, pipeline, job_id: int, stage: str, shard_key: int, payload: dict, attempt: int = 0):
+        pipeline.xadd(self.stream_key(stage, self.get_shard(shard_key)), {
+            "job_id": job_id,
+            "attempt": attempt,
+            "payload": json.dumps(payload),
+        })
+
+    async def publish(self, job_id: int, tasks: list):
+        # tasks: [(stage, shard_key, payload)]
+        async with self.redis.pipeline(transaction=True) as pipeline:
+            pipeline.hincrby(self.job_key(job_id), "pending", len(tasks))
+            for stage, shard_key, payload in tasks:
+                self.add_task(pipeline, job_id=job_id, stage=stage, shard_key=shard_key, payload=payload)
+            await pipeline.execute()
+
+    async def read(self, stage: str, consumer: str, shards: list = None,
+                   count: int = 10, block_ms: int = 5000) -> list:
+        shards = range(self.shards) if shards is None else shards
+        response = await self.redis.xreadgroup(groupname=stage, consumername=consumer,
+                                               streams={self.stream_key(stage, shard): ">" for shard in shards},
+                                               count=count, block=block_ms)
+        return [
+            self.decode_message(stage, stream_key, message_id, fields)
+            for stream_key, messages in (response or [])
+            for message_id, fields in messages
+        ]
+
+    async def claim_stale(self, stage: str, consumer: str, shards: list = None,
+                          min_idle_ms: int = 600000, count: int = 10) -> list:
+        # tasks delivered to a consumer that never acked them (crashed or killed worker)
+        shards = range(self.shards) if shards is None else shards
+        messages = []
+        for shard in shards:
+            stream_key = self.stream_key(stage, shard)
+            response = await self.redis.xautoclaim(name=stream_key, groupname=stage, consumername=consumer,
+                                                   min_idle_time=min_idle_ms, start_id="0-0", count=count)
+            messages += [
+                self.decode_message(stage, stream_key, message_id, fields)
+                for message_id, fields in response[1]
+                if fields
+            ]
+        return messages
+
+    async def complete(self, message: dict, tasks: list = None, processed: int = 0, total: int = 0):
+        # children are published and counted in the same transaction that acks their parent
+        job_key = self.job_key(message["job_id"])
+        tasks = tasks or []
+        async with self.redis.pipeline(transaction=True) as pipeline:
+            pipeline.hincrby(job_key, "pending", len(tasks) - 1)
+            for stage, shard_key, payload in tasks:
+                self.add_task(pipeline, job_id=message["job_id"], stage=stage, shard_key=shard_key, payload=payload)
+            if processed:
+                pipeline.hincrby(job_key, "processed", processed)
+            if total:
+                pipeline.hincrby(job_key, "total", total)
+            pipeline.xack(message["stream_key"], message["stage"], message["message_id"])
+            await pipeline.execute()
+
+    async def process(self, message: dict, handler, max_attempts: int = 3):
+        # runs handler(payload) -> {"tasks", "processed", "total"} for a delivered task and settles it:
+        # dropped when its job was cancelled, completed with its children, or retried until max_attempts then failed
+        if await self.is_job_cancelled(job_id=message["job_id"]):
+            # the task is dropped, without children
+            await self.complete(message=message)
+            return
+
+        try:
+            result = await handler(message["payload"])
+        except Exception as e:
+            self.logger.error(f"Job {message['job_id']}: {message['stage']} task failed "
+                              f"(attempt {message['attempt'] + 1}): {e}")
+            if message["attempt"] + 1 < max_attempts:
+                await self.retry(message=message)
+            else:
+                await self.fail(message=message, error=f"{message['stage']}: {e}")
+            return
+
+        await self.complete(message=message,
+                            tasks=result.get("tasks"),
+                            processed=result.get("processed", 0),
+                            total=result.get("total", 0))
+
+    async def retry(self, message: dict):
+        # the task goes back to the end of its stream, pending stays the same
+        async with self.redis.pipeline(transaction=True) as pipeline:
+            pipeline.xadd(message["stream_key"], {
+                "job_id": message["job_id"],
+                "attempt": message["attempt"] + 1,
+                "payload": json.dumps(message["payload"]),
+            })
+            pipeline.xack(message["stream_key"], message["stage"], message["message_id"])
+            await pipeline.execute()
+
+    async def fail(self, message: dict, error: str):
+        job_key = self.job_key(message["job_id"])
+        async with self.redis.pipeline(transaction=True) as pipeline:
+            pipeline.hincrby(job_key, "failed", 1)
+            pipeline.hset(job_key, "error", error)
+            pipeline.hincrby(job_key, "pending", -1)
+            pipeline.xack(message["stream_key"], message["stage"], message["message_id"])
+            await pipeline.execute()
+
+    async def get_job_state(self, job_id: int) -> dict:
+        state = await self.redis.hgetall(self.job_key(job_id))
+        state = {
+            (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+            for key, value in state.items()
+        }
+        return {
+            "pending": int(state.get("pending", 0)),
+            "processed": int(state.get("processed", 0)),
+            "total": int(state.get("total", 0)),
+            "failed": int(state.get("failed", 0)),
+            "error": state.get("error"),
+            "cancelled": state.get("cancelled") == "1",
+        }
+
+    async def cancel_job(self, job_id: int):
+        await self.redis.hset(self.job_key(job_id), "cancelled", 1)
+
+    async def is_job_cancelled(self, job_id: int) -> bool:
+        cancelled = await self.redis.hget(self.job_key(job_id), "cancelled")
+        return cancelled in (b"1", "1")
+
+    async def delete_job(self, job_id: int):
+        await self.redis.delete(self.job_key(job_id))
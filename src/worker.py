@@ -0,0 +1,120 @@
+from helpers.config import get_settings
+from stores.llm.LLMProviderFactory import LLMProviderFactory
+from stores.llm.EmbeddingCache import EmbeddingCache
+from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
+from stores.llm.templates_folder.template_parser import TempelateParser
+from sqlalchemy.ext.asyncio import create_async_engine,AsyncSession
+from sqlalchemy.orm import sessionmaker
+from utils.task_streams import TaskStreams
+from controllers import IngestionController
+from models.enums.JobEnums import IngestionStageEnum
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import logging
+import socket
+import os
+
+# Ingestion worker: consumes parse / chunk / embed / index tasks published by the api
+# (INGESTION_BACKEND="redis"). Run as many of them as needed, e.g.
+#   python worker.py --stages embed index --shards 0 1
+
+logger = logging.getLogger("uvicorn")
+
+async def consume(task_streams: TaskStreams, stage: str, handler, consumer: str, shards: list, settings):
+
+    while True:
+        try:
+            messages = await task_streams.claim_stale(stage=stage, consumer=consumer, shards=shards,
+                                                      min_idle_ms=settings.INGESTION_TASK_CLAIM_IDLE_MS, count=1)
+            if not messages:
+                messages = await task_streams.read(stage=stage, consumer=consumer, shards=shards, count=1)
+        except Exception as e:
+            logger.error(f"Error while reading {stage} tasks: {e}")
+            await asyncio.sleep(settings.INGESTION_POLL_SECONDS)
+            continue
+
+        for message in messages:
+            try:
+                await task_streams.process(message=message, handler=handler,
+                                           max_attempts=settings.INGESTION_TASK_MAX_ATTEMPTS)
+            except Exception as e:
+                # left pending, claimed back once idle for INGESTION_TASK_CLAIM_IDLE_MS
+                logger.error(f"Error while completing {stage} task {message['message_id']}: {e}")
+
+async def main(stages: list, shards: list, consumer: str):
+
+    settings = get_settings()
+
+    postgres_connection = f"postgresql+asyncpg://{settings.POSTGRES_USERNAME}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_MAIN_DATABASE}"
+    db_engine = create_async_engine(url=postgres_connection)
+    db_client = sessionmaker(
+        db_engine,class_=AsyncSession,expire_on_commit=False
+    )
+
+    llm_provider_factory = LLMProviderFactory(settings)
+    vectordb_provider_factory = VectorDBProviderFactory(settings,db_client=db_client)
+
+    generation_client = llm_provider_factory.create(provider=settings.GENERATION_BACKEND)
+    generation_client.set_generation_model(model_id = settings.GENERATION_MODEL_ID)
+
+    embedding_client = llm_provider_factory.create(provider=settings.EMBEDDING_BACKEND)
+    embedding_client.set_embedding_model(model_id=settings.EMBEDDING_MODEL_ID,
+                                         embedding_size=settings.EMBEDDING_MODEL_SIZE)
+    if settings.EMBEDDING_CACHE_ENABLED:
+        embedding_client = EmbeddingCache(embedding_client=embedding_client,
+                                          provider=settings.EMBEDDING_BACKEND,
+                                          db_client=db_client if settings.EMBEDDING_CACHE_PERSISTENT else None,
+                                          max_size=settings.EMBEDDING_CACHE_MAX_SIZE)
+
+    vectordb_client = vectordb_provider_factory.create(provider=settings.VECTOR_DB_BACKEND)
+    await vectordb_client.connect()
+
+    parsing_executor = ProcessPoolExecutor(max_workers=settings.PARSING_MAX_WORKERS or os.cpu_count())
+    task_streams = TaskStreams(redis_url=settings.REDIS_URL, shards=settings.INGESTION_STREAM_SHARDS)
+
+    ingestion_controller = IngestionController(db_client=db_client,
+                                               parsing_executor=parsing_executor,
+                                               vectordb_client=vectordb_client,
+                                               embedding_client=embedding_client,
+                                               generation_client=generation_client,
+                                               template_parser=TempelateParser(language=settings.PRIMARY_LANG,
+                                                                               default_language=settings.DEFAULT_LANG),
+                                               task_streams=task_streams)
+    handlers = {
+        IngestionStageEnum.PARSE.value: ingestion_controller.run_parse_task,
+        IngestionStageEnum.CHUNK.value: ingestion_controller.run_chunk_task,
+        IngestionStageEnum.EMBED.value: ingestion_controller.run_embed_task,
+        IngestionStageEnum.INDEX.value: ingestion_controller.run_index_task,
+    }
+
+    await task_streams.ensure_groups(stages=stages, shards=shards)
+    logger.info(f"Ingestion worker {consumer}: stages {stages}, shards {shards or 'all'}")
+
+    try:
+        await asyncio.gather(*[
+            consume(task_streams=task_streams, stage=stage, handler=handlers[stage],
+                    consumer=f"{consumer}-{i}", shards=shards, settings=settings)
+            for stage in stages
+            for i in range(settings.INGESTION_WORKER_CONCURRENCY)
+        ])
+    finally:
+        await task_streams.close()
+        await db_engine.dispose()
+        await vectordb_client.disconnect()
+        parsing_executor.shutdown(wait=False, cancel_futures=True)
+
+if __name__ == "__main__":
+
+    stages = [stage.value for stage in IngestionStageEnum]
+
+    parser = argparse.ArgumentParser(description="mini-RAG ingestion worker")
+    parser.add_argument("--stages", nargs="+", choices=stages, default=stages)
+    parser.add_argument("--shards", nargs="+", type=int, default=None,
+                        help="stream shards to consume, all of them by default")
+    parser.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}",
+                        help="consumer name, keep it stable across restarts to pick up its own pending tasks")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(stages=args.stages, shards=args.shards, consumer=args.consumer))